@@ -1,10 +1,42 @@
+import asyncio
+import logging
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.staticfiles import StaticFiles
 
 from config import settings
-from routers import pages_router, games_router, users_router, auth_router
+from routers import pages_router, games_router, users_router, auth_router, health_router, models_router
+from services import validate_threshold_strategy
+from services.ml import warmup
+from services.recognition import start_recognition_executor, stop_recognition_executor
+
+logger = logging.getLogger(__name__)
+
+
+async def _warmup_model():
+    """Загрузка и прогрев модели в отдельном потоке."""
+    try:
+        await asyncio.to_thread(warmup)
+    except Exception:
+        logger.exception("Не удалось загрузить модель классификатора")
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Ошибка в настройках останавливает запуск, а не каждый запрос
+    validate_threshold_strategy(settings.BOARD_THRESHOLD_STRATEGY)
+    # Модель прогревается в фоне: приложение сразу принимает запросы,
+    # а /api/health/ready отвечает 503, пока прогрев не завершён
+    warmup_task = asyncio.create_task(_warmup_model())
+    # Распознавание выполняется в ограниченном пуле потоков, а не в цикле событий
+    start_recognition_executor()
+    yield
+    await warmup_task
+    stop_recognition_executor()
+
 
-app = FastAPI()
+app = FastAPI(lifespan=lifespan)
 
 app.mount("/static", StaticFiles(directory=settings.FRONTEND_DIR), name="static")
 
@@ -14,3 +46,5 @@ app.include_router(pages_router)
 app.include_router(games_router)
 app.include_router(users_router)
 app.include_router(auth_router)
+app.include_router(health_router)
+app.include_router(models_router)
@@ -0,0 +1,6 @@
+"""
+Бенчмарки производительности.
+
+Запуск из каталога backend:
+    python -m benchmarks.<имя_модуля>
+"""
@@ -0,0 +1,71 @@
+"""
+Бенчмарк пропускной способности: 64 клетки против всей доски.
+
+Сравнивает режим squares (батч 64x180x180 через model_1) с режимом
+board (доска 512x512 через полносвёрточную модель) — время на доску,
+доски в секунду и число входных пикселей. Время включает подготовку
+входа по найденной на тестовом фото геометрии: 64 перспективных
+преобразования клеток (extract_square_batch) против одного
+преобразования доски (extract_board). Веса случайные: важна только
+стоимость прохода. Оба режима используют tf.function с uint8-входом,
+как в рабочем коде.
+
+Запуск:
+    python -m benchmarks.board_model
+"""
+
+import logging
+from pathlib import Path
+
+import cv2
+import tensorflow as tf
+
+from benchmarks.common import measure
+from services.board_service import (
+    SQUARE_SIZE,
+    _board_homography,
+    _locate_grid,
+    extract_board,
+    extract_square_batch,
+    find_board_contour,
+)
+from services.ml.board_model import CELL_SIZE, build_board_model
+from tests.helpers import build_model_1
+
+TEST_IMAGE_PATH = Path(__file__).parent.parent / "tests" / "test_img.png"
+
+
+def _compiled(model):
+    @tf.function(input_signature=[tf.TensorSpec((None,) + model.input_shape[1:], tf.uint8)])
+    def infer(batch):
+        return model(tf.cast(batch, tf.float32), training=False)
+    return lambda batch: infer(batch).numpy()
+
+
+def main(repeat=10):
+    logging.disable(logging.WARNING)
+    image = cv2.imread(str(TEST_IMAGE_PATH))
+    M, size = _board_homography(find_board_contour(image))
+    row_lines, col_lines, _ = _locate_grid(image, M, size)
+
+    squares_infer = _compiled(build_model_1())
+    board_infer = _compiled(build_board_model(CELL_SIZE))
+
+    def run_squares():
+        return squares_infer(extract_square_batch(image, M, row_lines, col_lines))
+
+    def run_board():
+        return board_infer(extract_board(image, M, row_lines, col_lines)[None])
+
+    print(f"{'режим':<10}{'пикселей':>12}{'мс/доска':>10}{'досок/с':>9}{'MB':>8}")
+    for name, func, pixels in (
+        ("squares", run_squares, 64 * SQUARE_SIZE ** 2),
+        ("board", run_board, (8 * CELL_SIZE) ** 2),
+    ):
+        func()
+        ms, mb = measure(func, repeat=repeat)
+        print(f"{name:<10}{pixels:>12,}{ms:>10.1f}{1000 / ms:>9.1f}{mb:>8.1f}")
+
+
+if __name__ == "__main__":
+    main()
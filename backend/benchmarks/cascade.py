@@ -0,0 +1,85 @@
+"""
+Бенчмарк каскада: средняя стоимость распознавания доски.
+
+Большая модель — архитектура рабочей (ResNet50V2 + голова из ноутбука),
+маленькая — model_1; веса случайные. Клетки берутся с test_img.png
+(20 фигур, 44 пустые клетки). Поскольку у случайной маленькой модели
+уверенность ничего не значит, порог подбирается так, чтобы на
+большую модель ушла заданная доля клеток, прошедших ступень 0.
+
+Запуск:
+    python -m benchmarks.cascade
+"""
+
+import logging
+import tempfile
+import threading
+from pathlib import Path
+
+import numpy as np
+from tensorflow import keras
+
+from benchmarks.common import measure
+from services.board_service import process_board_image
+from services.ml import CLASS_NAMES, cascade, classifier
+from tests.helpers import build_model_1
+
+TEST_IMAGE_PATH = Path(__file__).parent.parent / "tests" / "test_img.png"
+
+
+def build_large_model():
+    """Архитектура model_3/model_4 из ноутбука без аугментации (случайные веса)."""
+    base_model = keras.applications.ResNet50V2(input_shape=(180, 180, 3), include_top=False, weights=None)
+    inputs = keras.Input(shape=(180, 180, 3))
+    x = keras.applications.resnet_v2.preprocess_input(inputs)
+    x = base_model(x, training=False)
+    x = keras.layers.GlobalAveragePooling2D()(x)
+    outputs = keras.layers.Dense(len(CLASS_NAMES), activation="softmax")(x)
+    return keras.Model(inputs, outputs)
+
+
+def _use_models(tmp):
+    classifier.MODEL_PATH = str(Path(tmp) / "model.keras")
+    classifier.settings.INFERENCE_BACKEND = "keras"
+    classifier.settings.CASCADE_SMALL_BACKEND = "keras"
+    classifier.backend = None
+    classifier._ready = threading.Event()
+    cascade.small_backend = None
+    build_large_model().save(classifier.MODEL_PATH)
+    build_model_1().save(cascade.small_model_path("keras"))
+
+
+def main(repeat=5):
+    logging.disable(logging.WARNING)
+    with open(TEST_IMAGE_PATH, "rb") as f:
+        squares = process_board_image(f.read())
+
+    with tempfile.TemporaryDirectory() as tmp:
+        _use_models(tmp)
+        cascade.warmup()
+
+        rest = np.flatnonzero(~cascade.empty_mask(squares.batch))
+        confidence = np.sort(cascade.load_small_model().predict(squares.batch[rest]).max(axis=1))
+
+        classifier.settings.RECOGNITION_MODE = "squares"
+        squares_ms, _ = measure(classifier.predict_all_squares, squares, repeat=repeat)
+        print(f"{'режим':<24}{'мс/доска':>10}{'ступени 0/1/2':>16}{'доля':>8}")
+        print(f"{'squares (большая)':<24}{squares_ms:>10.1f}{'-/-/64':>16}{1:>8.0%}")
+
+        classifier.settings.RECOGNITION_MODE = "cascade"
+        for share in (0.0, 0.25, 0.5, 1.0):
+            escalate = int(round(share * len(rest)))
+            classifier.settings.CASCADE_CONFIDENCE = (
+                float(confidence[escalate - 1]) + 1e-6 if escalate else 0.0
+            )
+            cascade.cascade_stats.clear()
+            cascade_ms, _ = measure(classifier.predict_all_squares, squares, repeat=repeat)
+            stats = cascade.cascade_stats.snapshot()
+            boards = stats["boards"]
+            stages = f"{stats['stage0'] // boards}/{stats['stage1'] // boards}/{stats['stage2'] // boards}"
+            print(f"{f'cascade, эскалация {share:.0%}':<24}{cascade_ms:>10.1f}{stages:>16}"
+                  f"{cascade_ms / squares_ms:>8.0%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,38 @@
+"""
+Бенчмарк проверки шахматного паттерна (_verify_checkerboard).
+
+Сравнивает векторную проверку по батчу клеток с исходной
+(cvtColor + np.mean для каждой клетки, списки по чётности).
+
+Запуск:
+    python -m benchmarks.checkerboard
+"""
+
+import logging
+from pathlib import Path
+
+from benchmarks.common import measure
+from services.board_service import cell_brightness, checkerboard_score, process_board_image
+from tests.reference import checkerboard_ratio_legacy
+
+TEST_IMAGE_PATH = Path(__file__).parent.parent / "tests" / "test_img.png"
+
+
+def _checkerboard_ratio(squares):
+    return checkerboard_score(cell_brightness(squares))
+
+
+def main(repeat=20):
+    logging.disable(logging.WARNING)
+    squares = process_board_image(TEST_IMAGE_PATH.read_bytes())
+    squares.brightness = None
+
+    legacy_ms, _ = measure(checkerboard_ratio_legacy, squares, repeat=repeat)
+    vector_ms, _ = measure(_checkerboard_ratio, squares, repeat=repeat)
+    print(f"legacy: {legacy_ms:.2f} мс, ratio={checkerboard_ratio_legacy(squares):.3f}")
+    print(f"vector: {vector_ms:.2f} мс, ratio={_checkerboard_ratio(squares):.3f}")
+    print(f"ускорение: {legacy_ms / vector_ms:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
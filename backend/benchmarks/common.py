@@ -0,0 +1,35 @@
+"""
+Общие помощники для бенчмарков.
+"""
+
+import time
+import tracemalloc
+
+import numpy as np
+
+
+def measure(func, *args, repeat=5):
+    """
+    Замеряет время и пиковую память вызова func(*args).
+
+    Время — медиана по repeat запускам. Пиковая память считается
+    tracemalloc по отдельному запуску (учитываются массивы NumPy
+    и результаты OpenCV, которые тоже выделяются через NumPy).
+
+    Returns:
+        (median_ms, peak_mb)
+    """
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(*args)
+        times.append((time.perf_counter() - start) * 1000)
+
+    tracemalloc.start()
+    try:
+        func(*args)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return float(np.median(times)), peak / 2 ** 20
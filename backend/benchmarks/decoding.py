@@ -0,0 +1,57 @@
+"""
+Бенчмарк декодирования фото с телефона.
+
+Сравнивает полное декодирование (IMREAD_COLOR) с decode_image,
+которое для больших JPEG декодирует сразу уменьшенную копию.
+Фото имитируются увеличенным тестовым изображением (12 и 48 Мп).
+Строка PNG (исходный скриншот) проверяет, что чтение заголовка
+не декодирует изображение второй раз: decode_image должен стоить
+столько же, сколько полное декодирование.
+
+Запуск:
+    python -m benchmarks.decoding
+"""
+
+import logging
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+from benchmarks.common import measure
+from services.board_service import decode_image, process_board_image
+
+TEST_IMAGE_PATH = Path(__file__).parent.parent / "tests" / "test_img.png"
+
+
+def phone_photo(width, height):
+    """JPEG заданного размера с тестовой доской, как фото с телефона."""
+    image = cv2.imread(str(TEST_IMAGE_PATH))
+    photo = cv2.resize(image, (width, height), interpolation=cv2.INTER_CUBIC)
+    ok, encoded = cv2.imencode(".jpg", photo, [cv2.IMWRITE_JPEG_QUALITY, 90])
+    assert ok
+    return encoded.tobytes()
+
+
+def _decode_full(image_bytes):
+    return cv2.imdecode(np.frombuffer(image_bytes, np.uint8), cv2.IMREAD_COLOR)
+
+
+def main(repeat=5):
+    logging.disable(logging.WARNING)
+
+    print(f"{'фото':<12}{'full, мс':>10}{'MB':>8}{'reduced, мс':>13}{'MB':>8}{'размер после':>15}"
+          f"{'pipeline, мс':>14}")
+    inputs = [(f"{w}x{h}", phone_photo(w, h)) for w, h in ((4000, 3000), (8000, 6000))]
+    inputs.append(("PNG", TEST_IMAGE_PATH.read_bytes()))
+    for name, data in inputs:
+        full_ms, full_mb = measure(_decode_full, data, repeat=repeat)
+        reduced_ms, reduced_mb = measure(decode_image, data, repeat=repeat)
+        pipeline_ms, _ = measure(process_board_image, data, repeat=repeat)
+        reduced = decode_image(data)
+        print(f"{name:<12}{full_ms:>10.1f}{full_mb:>8.1f}{reduced_ms:>13.1f}{reduced_mb:>8.1f}"
+              f"{f'{reduced.shape[1]}x{reduced.shape[0]}':>15}{pipeline_ms:>14.1f}")
+
+
+if __name__ == "__main__":
+    main()
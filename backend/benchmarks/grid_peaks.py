@@ -0,0 +1,56 @@
+"""
+Бенчмарк поиска линий сетки (_find_grid_peaks).
+
+Сравнивает векторизованную реализацию с исходной циклической
+на профилях тестовых изображений и на синтетических профилях.
+
+Запуск:
+    python -m benchmarks.grid_peaks
+"""
+
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+from benchmarks.common import measure
+from services.board_service import _find_grid_peaks, find_board_contour, four_point_transform
+from tests.reference import find_grid_peaks_legacy, synthetic_profile
+
+TESTS_DIR = Path(__file__).parent.parent / "tests"
+TEST_IMAGES = [TESTS_DIR / "test_img.png", TESTS_DIR / "test_img_2.png"]
+
+
+def image_profiles(path):
+    """
+    Профили градиента (строки, столбцы) выровненной доски с тестового изображения.
+    """
+    image = cv2.imread(str(path))
+    contour = find_board_contour(image)
+    aligned = four_point_transform(image, contour) if contour is not None else image
+    gray = cv2.cvtColor(aligned, cv2.COLOR_BGR2GRAY)
+    grad_x = np.abs(cv2.Sobel(gray, cv2.CV_64F, 1, 0, ksize=3))
+    grad_y = np.abs(cv2.Sobel(gray, cv2.CV_64F, 0, 1, ksize=3))
+    return np.sum(grad_y, axis=1), np.sum(grad_x, axis=0)
+
+
+def main(repeat=5):
+    cases = []
+    for path in TEST_IMAGES:
+        rows, cols = image_profiles(path)
+        cases.append((f"{path.name} rows", rows))
+        cases.append((f"{path.name} cols", cols))
+    for n in (1000, 3000, 6000):
+        cases.append((f"synthetic n={n}", synthetic_profile(n)))
+
+    print(f"{'профиль':<24}{'n':>7}{'legacy, мс':>13}{'vector, мс':>13}{'ускорение':>11}  совпадает")
+    for name, profile in cases:
+        legacy_ms, _ = measure(find_grid_peaks_legacy, profile, repeat=repeat)
+        vector_ms, _ = measure(_find_grid_peaks, profile, repeat=repeat)
+        same = find_grid_peaks_legacy(profile) == _find_grid_peaks(profile)
+        print(f"{name:<24}{len(profile):>7}{legacy_ms:>13.2f}{vector_ms:>13.2f}"
+              f"{legacy_ms / vector_ms:>10.1f}x  {'да' if same else 'НЕТ'}")
+
+
+if __name__ == "__main__":
+    main()
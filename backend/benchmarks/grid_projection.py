@@ -0,0 +1,57 @@
+"""
+Бенчмарк поиска линий сетки (_find_grid_lines).
+
+Сравнивает исходную реализацию (два полноразмерных градиента
+CV_64F) с текущей (int16-проекции на уменьшенной копии +
+уточнение линий на полном разрешении) по времени, пиковой памяти
+и расхождению найденных линий.
+
+Запуск:
+    python -m benchmarks.grid_projection
+"""
+
+import logging
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+from benchmarks.common import measure
+from services.board_service import _find_grid_lines, find_board_contour, four_point_transform
+from tests.reference import find_grid_lines_legacy
+
+TESTS_DIR = Path(__file__).parent.parent / "tests"
+TEST_IMAGES = [TESTS_DIR / "test_img.png", TESTS_DIR / "test_img_2.png"]
+
+
+def aligned_board(path, factor=1):
+    """Выровненная доска с тестового изображения (или всё изображение, если контура нет)."""
+    image = cv2.imread(str(path))
+    if factor != 1:
+        image = cv2.resize(image, None, fx=factor, fy=factor, interpolation=cv2.INTER_CUBIC)
+    contour = find_board_contour(image)
+    return four_point_transform(image, contour) if contour is not None else image
+
+
+def _max_line_diff(a, b):
+    if a is None or b is None:
+        return "-" if a is b else "нет"
+    return str(int(max(np.abs(np.subtract(a[0], b[0])).max(), np.abs(np.subtract(a[1], b[1])).max())))
+
+
+def main(repeat=5):
+    logging.disable(logging.WARNING)
+
+    print(f"{'доска':<22}{'legacy, мс':>12}{'MB':>8}{'reduced, мс':>13}{'MB':>8}{'Δ линий, px':>13}")
+    for path in TEST_IMAGES:
+        for factor in (1, 3):
+            board = aligned_board(path, factor)
+            legacy_ms, legacy_mb = measure(find_grid_lines_legacy, board, repeat=repeat)
+            new_ms, new_mb = measure(_find_grid_lines, board, repeat=repeat)
+            diff = _max_line_diff(find_grid_lines_legacy(board), _find_grid_lines(board))
+            name = f"{path.name} {board.shape[1]}px"
+            print(f"{name:<22}{legacy_ms:>12.1f}{legacy_mb:>8.1f}{new_ms:>13.1f}{new_mb:>8.1f}{diff:>13}")
+
+
+if __name__ == "__main__":
+    main()
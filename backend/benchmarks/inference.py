@@ -0,0 +1,115 @@
+"""
+Бенчмарк инференса классификатора.
+
+Сравнивает model.predict с скомпилированной функцией predict_batch:
+время первого вызова на только что загруженной модели (трассировка
+графа, подготовка ядер) и установившееся время на батчах 1 и 64.
+Затем модель экспортируется в ONNX, TFLite и .npz (NumPy-движок),
+и все бэкенды сравниваются по времени старта нового процесса,
+времени на батче 64 и расхождению с Keras.
+Веса рабочей модели в репозитории не хранятся, поэтому используется
+архитектура model_1 из ноутбука со случайными весами.
+
+Запуск:
+    python -m benchmarks.inference
+"""
+
+import logging
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+import numpy as np
+
+from benchmarks.common import measure
+from services.ml import classifier
+from services.ml.backends import BACKENDS, create_backend
+from services.ml.export import EXPORT_FORMATS, _exported_backends, check_parity, export_model
+from tests.helpers import build_model_1
+
+
+def _reset_classifier(path):
+    classifier.MODEL_PATH = str(path)
+    classifier.settings.INFERENCE_BACKEND = "keras"
+    classifier.backend = None
+    classifier._ready = threading.Event()
+    classifier._load_error = None
+
+
+def _first_call_ms(func):
+    start = time.perf_counter()
+    func()
+    return (time.perf_counter() - start) * 1000
+
+
+_STARTUP_SCRIPT = """
+import sys, time
+start = time.perf_counter()
+import numpy as np
+from services.ml.backends import create_backend
+create_backend(sys.argv[1], sys.argv[2]).predict(np.zeros((1, 180, 180, 3), np.uint8))
+print((time.perf_counter() - start) * 1000)
+"""
+
+
+def _startup_ms(name, model_file):
+    """Время от старта нового процесса до первого предсказания (импорт + загрузка)."""
+    result = subprocess.run(
+        [sys.executable, "-c", _STARTUP_SCRIPT, name, str(model_file)],
+        cwd=Path(__file__).parent.parent, capture_output=True, text=True, check=True,
+    )
+    return float(result.stdout.strip().splitlines()[-1])
+
+
+def main(repeat=10):
+    logging.disable(logging.WARNING)
+    rng = np.random.default_rng(0)
+    boards = {n: rng.integers(0, 256, (n, 180, 180, 3), dtype=np.uint8) for n in (1, 64)}
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "model_1.keras"
+        build_model_1().save(path)
+
+        model = keras.models.load_model(path)
+        predict_first = _first_call_ms(lambda: model.predict(boards[64], verbose=0))
+
+        _reset_classifier(path)
+        classifier.load_model()
+        compiled_first = _first_call_ms(lambda: classifier.predict_batch(boards[64]))
+
+        _reset_classifier(path)
+        classifier.warmup()
+        warm_first = _first_call_ms(lambda: classifier.predict_batch(boards[64]))
+
+        print(f"{'первый вызов, батч 64':<28}{'мс':>10}")
+        print(f"{'model.predict':<28}{predict_first:>10.1f}")
+        print(f"{'predict_batch без прогрева':<28}{compiled_first:>10.1f}")
+        print(f"{'predict_batch после warmup':<28}{warm_first:>10.1f}")
+        print()
+
+        print(f"{'батч':<8}{'predict, мс':>13}{'predict_batch, мс':>19}")
+        for n, batch in boards.items():
+            predict_ms, _ = measure(lambda b: model.predict(b, verbose=0), batch, repeat=repeat)
+            compiled_ms, _ = measure(classifier.predict_batch, batch, repeat=repeat)
+            print(f"{n:<8}{predict_ms:>13.1f}{compiled_ms:>19.1f}")
+        print()
+
+        formats = EXPORT_FORMATS + ("npz",)
+        export_model(str(path), formats)
+        names = _exported_backends(formats)
+        diffs = check_parity(str(path), names, batch=boards[64])
+        print(f"{'бэкенд':<10}{'старт, мс':>11}{'батч 64, мс':>13}{'max |diff|':>12}")
+        for name in ["keras"] + names:
+            model_file = path.with_suffix(BACKENDS[name].suffix)
+            backend = create_backend(name, model_file)
+            backend.warmup()
+            backend_ms, _ = measure(backend.predict, boards[64], repeat=repeat)
+            print(f"{name:<10}{_startup_ms(name, model_file):>11.0f}{backend_ms:>13.1f}"
+                  f"{diffs.get(name, 0.0):>12.1e}")
+
+
+if __name__ == "__main__":
+    main()
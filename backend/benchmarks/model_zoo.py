@@ -0,0 +1,247 @@
+"""
+Бенчмарк моделей из model/ (model_1..4 из ноутбука).
+
+Каждая модель замеряется в отдельном процессе на каждом числе ядер
+(привязка процесса к ядрам и потоки TensorFlow), чтобы время
+загрузки и пиковый RSS не смешивались между моделями:
+
+    - время загрузки модели и прогрева;
+    - задержка (медиана) на батчах 1, 64 (доска) и 256; каждый батч
+      проходит через модель одним вызовом (256 — размером 256 из
+      BATCH_BUCKETS, а не четырьмя проходами по 64);
+    - пропускная способность на батче 256 (клеток и досок в секунду);
+    - пиковый RSS процесса до загрузки датасета и прирост RSS от
+      загрузки модели и инференса (пик минус RSS до загрузки модели,
+      когда TensorFlow уже импортирован);
+    - точность на тестовой части датасета (model/data/test),
+      если датасет есть.
+
+Результат пишется в JSON (для сравнения между релизами) и таблицу
+markdown.
+
+Запуск:
+    python -m benchmarks.model_zoo [--models PATH ...] [--cores 1 2 4]
+                                   [--json model_zoo.json] [--markdown model_zoo.md]
+"""
+
+import argparse
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+import numpy as np
+
+from config import settings
+
+# Каталог моделей ноутбука
+ZOO_DIR = settings.BASE_DIR / "model"
+
+# Размеры батча: одна клетка, доска, несколько досок
+BATCH_SIZES = (1, 64, 256)
+
+# Батч для пропускной способности
+THROUGHPUT_BATCH = 256
+
+# Начало файла-указателя Git LFS (веса не скачаны)
+_LFS_POINTER = b"version https://git-lfs"
+
+
+def _core_counts():
+    """1, 2, 4, ... до числа доступных ядер (и само это число)."""
+    available = len(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else os.cpu_count()
+    counts = [1]
+    while counts[-1] * 2 <= available:
+        counts.append(counts[-1] * 2)
+    if counts[-1] != available:
+        counts.append(available)
+    return counts
+
+
+def _limit_cores(cores):
+    """Привязывает процесс к первым cores ядрам и задаёт потоки TensorFlow."""
+    if hasattr(os, "sched_setaffinity"):
+        os.sched_setaffinity(0, sorted(os.sched_getaffinity(0))[:cores])
+
+    import tensorflow as tf
+    tf.config.threading.set_intra_op_parallelism_threads(cores)
+    tf.config.threading.set_inter_op_parallelism_threads(1)
+
+
+def _peak_rss_mb():
+    # ru_maxrss в Linux — в килобайтах
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def _median_ms(func, repeat):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        times.append((time.perf_counter() - start) * 1000)
+    return float(np.median(times))
+
+
+def measure_model(path, cores, data_dir, repeat):
+    """
+    Замеры одной модели в текущем процессе (вызывается в подпроцессе).
+
+    Returns:
+        dict: Строка отчёта
+    """
+    with open(path, "rb") as f:
+        if f.read(len(_LFS_POINTER)) == _LFS_POINTER:
+            raise ValueError("файл — указатель Git LFS, веса не скачаны (git lfs pull)")
+
+    _limit_cores(cores)
+    from services.ml.backends import INPUT_SHAPE, create_backend
+    baseline_rss_mb = _peak_rss_mb()
+
+    start = time.perf_counter()
+    backend = create_backend("keras", path)
+    load_ms = (time.perf_counter() - start) * 1000
+
+    start = time.perf_counter()
+    backend.warmup(THROUGHPUT_BATCH)
+    warmup_ms = (time.perf_counter() - start) * 1000
+
+    rng = np.random.default_rng(0)
+    latency = {}
+    for n in BATCH_SIZES:
+        batch = rng.integers(0, 256, (n,) + INPUT_SHAPE, dtype=np.uint8)
+        latency[str(n)] = _median_ms(lambda: backend.predict(batch, limit=n), repeat)
+    # Пик до датасета: его изображения в RSS модели не входят
+    peak_rss_mb = _peak_rss_mb()
+
+    accuracy = None
+    test_dir = os.path.join(data_dir, "test")
+    if os.path.isdir(test_dir):
+        from services.ml.quantize import evaluate, load_split
+        images, labels = load_split(test_dir)
+        accuracy = evaluate(backend, images, labels)
+
+    throughput_ms = latency[str(THROUGHPUT_BATCH)]
+    return {
+        "load_ms": load_ms,
+        "warmup_ms": warmup_ms,
+        "latency_ms": latency,
+        "squares_per_s": THROUGHPUT_BATCH / throughput_ms * 1000,
+        "boards_per_s": THROUGHPUT_BATCH / 64 / throughput_ms * 1000,
+        "peak_rss_mb": peak_rss_mb,
+        "model_rss_mb": peak_rss_mb - baseline_rss_mb,
+        "accuracy": accuracy,
+    }
+
+
+def _run_worker(path, cores, data_dir, repeat):
+    """Замеры модели в отдельном процессе; ошибка попадает в отчёт."""
+    result = subprocess.run(
+        [sys.executable, "-m", "benchmarks.model_zoo", "--worker", str(path),
+         "--cores", str(cores), "--data", str(data_dir), "--repeat", str(repeat)],
+        cwd=Path(__file__).parent.parent, capture_output=True, text=True,
+    )
+    lines = result.stdout.strip().splitlines()
+    if result.returncode != 0 or not lines:
+        error = (result.stderr.strip().splitlines() or ["процесс завершился с ошибкой"])[-1]
+        return {"error": error}
+    return json.loads(lines[-1])
+
+
+def run_zoo(models, cores, data_dir, repeat):
+    """Отчёт по всем моделям и числам ядер."""
+    import tensorflow as tf
+
+    rows = []
+    for path in models:
+        for n in cores:
+            row = {
+                "model": Path(path).stem,
+                "size_mb": os.path.getsize(path) / 2 ** 20,
+                "cores": n,
+            }
+            row.update(_run_worker(path, n, data_dir, repeat))
+            rows.append(row)
+            print(f"{row['model']:<10}{n:>3} ядер  {'ошибка: ' + row['error'] if 'error' in row else 'OK'}",
+                  file=sys.stderr)
+
+    return {
+        "generated_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "host": {
+            "platform": platform.platform(),
+            "processor": platform.processor(),
+            "cpu_count": os.cpu_count(),
+            "python": platform.python_version(),
+            "tensorflow": tf.__version__,
+        },
+        "batch_sizes": list(BATCH_SIZES),
+        "data_dir": str(data_dir),
+        "results": rows,
+    }
+
+
+def _fmt(value, spec):
+    return "—" if value is None else format(value, spec)
+
+
+def to_markdown(report):
+    """Таблица markdown по отчёту run_zoo."""
+    batches = report["batch_sizes"]
+    header = (["модель", "ядер", "файл, МБ", "загрузка, мс", "прогрев, мс"]
+              + [f"батч {n}, мс" for n in batches]
+              + ["клеток/с", "досок/с", "пиковый RSS, МБ", "RSS модели, МБ", "точность"])
+    lines = [
+        f"Модели: {report['generated_at']}, {report['host']['processor'] or report['host']['platform']}, "
+        f"TensorFlow {report['host']['tensorflow']}",
+        "",
+        "| " + " | ".join(header) + " |",
+        "|" + "|".join("---" for _ in header) + "|",
+    ]
+    for row in report["results"]:
+        if "error" in row:
+            cells = [row["model"], str(row["cores"]), f"{row['size_mb']:.1f}", f"ошибка: {row['error']}"]
+            cells += [""] * (len(header) - len(cells))
+        else:
+            cells = [row["model"], str(row["cores"]), f"{row['size_mb']:.1f}",
+                     f"{row['load_ms']:.0f}", f"{row['warmup_ms']:.0f}"]
+            cells += [f"{row['latency_ms'][str(n)]:.1f}" for n in batches]
+            cells += [f"{row['squares_per_s']:.0f}", f"{row['boards_per_s']:.1f}",
+                      f"{row['peak_rss_mb']:.0f}", f"{row['model_rss_mb']:.0f}", _fmt(row["accuracy"], ".4f")]
+        lines.append("| " + " | ".join(cells) + " |")
+    return "\n".join(lines) + "\n"
+
+
+def main():
+    from services.ml.quantize import DATA_DIR
+
+    parser = argparse.ArgumentParser(description="Бенчмарк моделей из model/")
+    parser.add_argument("--models", nargs="+", help="пути к .keras (по умолчанию все из model/)")
+    parser.add_argument("--cores", nargs="+", type=int, help="числа ядер (по умолчанию 1, 2, 4, ... все)")
+    parser.add_argument("--data", default=str(DATA_DIR), help="каталог датасета с test/")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--json", default="model_zoo.json", help="куда записать JSON-отчёт")
+    parser.add_argument("--markdown", default="model_zoo.md", help="куда записать таблицу markdown")
+    parser.add_argument("--worker", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        print(json.dumps(measure_model(args.worker, args.cores[0], args.data, args.repeat)))
+        return
+
+    models = args.models or sorted(str(p) for p in ZOO_DIR.glob("*.keras"))
+    report = run_zoo(models, args.cores or _core_counts(), args.data, args.repeat)
+
+    with open(args.json, "w") as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+    markdown = to_markdown(report)
+    with open(args.markdown, "w") as f:
+        f.write(markdown)
+    print(markdown)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""
+Бенчмарк подготовки батча клеток из фото.
+
+Сравнивает исходную цепочку (полноразмерное выравнивание ->
+обрезка рамки -> словарь клеток -> 64 resize) с текущей
+(выравнивание в разрешении поиска сетки -> батч клеток напрямую).
+Поиск контура в замер не входит, он одинаков для обоих вариантов.
+
+Запуск:
+    python -m benchmarks.preprocessing
+"""
+
+import logging
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+from benchmarks.common import measure
+from services.board_service import (
+    SQUARE_NAMES,
+    SQUARE_SIZE,
+    _board_homography,
+    _cut_square_batch,
+    _locate_grid,
+    extract_square_batch,
+    find_board_contour,
+    find_board_grid,
+    four_point_transform,
+    split_board_to_squares,
+)
+
+TEST_IMAGE_PATH = Path(__file__).parent.parent / "tests" / "test_img.png"
+
+
+def legacy_batch(image, contour):
+    """Исходная цепочка: warp в полном размере, обрезка, 64 resize."""
+    aligned = four_point_transform(image, contour)
+    board, h_lines, v_lines = find_board_grid(aligned)
+    squares = split_board_to_squares(board, h_lines, v_lines)
+    return np.array([cv2.resize(squares[name], (SQUARE_SIZE, SQUARE_SIZE)) for name in SQUARE_NAMES])
+
+
+def fused_batch(image, contour):
+    """Текущая цепочка process_board_image (без декодирования и поиска контура)."""
+    M, size = _board_homography(contour)
+    row_lines, col_lines, warped = _locate_grid(image, M, size)
+    if warped.shape[0] == size:
+        return _cut_square_batch(warped, row_lines, col_lines)
+    return extract_square_batch(image, M, row_lines, col_lines)
+
+
+def main(repeat=5):
+    logging.disable(logging.WARNING)
+    base = cv2.imread(str(TEST_IMAGE_PATH))
+
+    print(f"{'изображение':<14}{'legacy, мс':>12}{'MB':>8}{'fused, мс':>12}{'MB':>8}{'ускорение':>11}")
+    for factor in (1, 2, 3, 4):
+        image = base if factor == 1 else cv2.resize(
+            base, None, fx=factor, fy=factor, interpolation=cv2.INTER_CUBIC)
+        contour = find_board_contour(image)
+
+        legacy_ms, legacy_mb = measure(legacy_batch, image, contour, repeat=repeat)
+        fused_ms, fused_mb = measure(fused_batch, image, contour, repeat=repeat)
+        size = f"{image.shape[1]}x{image.shape[0]}"
+        print(f"{size:<14}{legacy_ms:>12.1f}{legacy_mb:>8.1f}{fused_ms:>12.1f}{fused_mb:>8.1f}"
+              f"{legacy_ms / fused_ms:>10.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+"""
+Бенчмарк стратегий бинаризации при поиске контура доски.
+
+Для каждой стратегии из THRESHOLD_STRATEGIES считает:
+- долю изображений, на которых найден контур;
+- долю изображений, на которых доска прошла всю проверку
+  (сетка найдена, шахматный паттерн подтверждён);
+- медианное время поиска контура.
+
+Набор изображений: тестовые фото, их варианты (масштаб, яркость,
+шум) и, опционально, фотографии из каталога --images.
+
+Запуск:
+    python -m benchmarks.threshold_strategies [--images DIR] [--repeat N]
+"""
+
+import argparse
+import logging
+import time
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+from services.board_service import (
+    THRESHOLD_STRATEGIES,
+    _detect_board_contour,
+    _verify_checkerboard,
+    find_board_grid,
+    four_point_transform,
+    split_board_to_squares,
+)
+
+TESTS_DIR = Path(__file__).parent.parent / "tests"
+TEST_IMAGES = [TESTS_DIR / "test_img.png", TESTS_DIR / "test_img_2.png"]
+
+
+def image_variants(image):
+    """Варианты изображения: масштаб, яркость, гамма и шум."""
+    rng = np.random.default_rng(0)
+    yield "orig", image
+    yield "x3", cv2.resize(image, None, fx=3, fy=3, interpolation=cv2.INTER_CUBIC)
+    yield "dark", cv2.convertScaleAbs(image, alpha=0.6, beta=0)
+    yield "bright", cv2.convertScaleAbs(image, alpha=1.0, beta=50)
+    lut = np.array([((i / 255) ** 1.8) * 255 for i in range(256)], dtype=np.uint8)
+    yield "gamma", cv2.LUT(image, lut)
+    noise = rng.normal(0, 12, image.shape)
+    yield "noise", np.clip(image + noise, 0, 255).astype(np.uint8)
+
+
+def load_dataset(images_dir=None):
+    """Список (имя, изображение) для бенчмарка."""
+    paths = list(TEST_IMAGES)
+    if images_dir:
+        paths += sorted(p for p in Path(images_dir).iterdir()
+                        if p.suffix.lower() in (".jpg", ".jpeg", ".png"))
+
+    dataset = []
+    for path in paths:
+        image = cv2.imread(str(path))
+        if image is None:
+            continue
+        variants = image_variants(image) if path in TEST_IMAGES else [("orig", image)]
+        for variant, img in variants:
+            dataset.append((f"{path.name}:{variant}", img))
+    return dataset
+
+
+def _board_verified(image, contour):
+    """Проходит ли найденная доска проверку сетки и шахматного паттерна."""
+    grid = find_board_grid(four_point_transform(image, contour))
+    if grid is None:
+        return False
+    board, h_lines, v_lines = grid
+    return _verify_checkerboard(split_board_to_squares(board, h_lines, v_lines))
+
+
+def run(dataset, repeat=3):
+    """
+    Прогоняет все стратегии по набору изображений.
+
+    Returns:
+        dict: {стратегия: {"contour_rate", "verified_rate", "median_ms"}}
+    """
+    report = {}
+    for strategy in THRESHOLD_STRATEGIES:
+        found = verified = 0
+        times = []
+        for _, image in dataset:
+            for _ in range(repeat):
+                start = time.perf_counter()
+                contour, _ = _detect_board_contour(image, strategy=strategy)
+                times.append((time.perf_counter() - start) * 1000)
+            if contour is not None:
+                found += 1
+                verified += _board_verified(image, contour)
+        report[strategy] = {
+            "contour_rate": found / len(dataset),
+            "verified_rate": verified / len(dataset),
+            "median_ms": float(np.median(times)),
+        }
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--images", help="Каталог с дополнительными фото досок")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    logging.disable(logging.WARNING)
+    dataset = load_dataset(args.images)
+    report = run(dataset, args.repeat)
+
+    print(f"Изображений: {len(dataset)}")
+    print(f"{'стратегия':<12}{'контур':>9}{'доска':>9}{'медиана, мс':>14}")
+    for strategy, row in report.items():
+        print(f"{strategy:<12}{row['contour_rate']:>9.0%}{row['verified_rate']:>9.0%}"
+              f"{row['median_ms']:>14.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -33,6 +33,71 @@ class Settings:
     # Лимит элементов на странице
     PAGE_LIMIT: int = int(os.getenv("PAGE_LIMIT", 10))
 
+    # Стратегия бинаризации при поиске контура доски:
+    # sequential, otsu, adaptive или parallel
+    BOARD_THRESHOLD_STRATEGY: str = os.getenv("BOARD_THRESHOLD_STRATEGY", "sequential")
+
+    # Минимальная короткая сторона фото после декодирования (в пикселях).
+    # Большие JPEG декодируются сразу уменьшенными в 2, 4 или 8 раз;
+    # 0 — всегда декодировать в полном разрешении.
+    BOARD_DECODE_TARGET_SIDE: int = int(os.getenv("BOARD_DECODE_TARGET_SIDE", 1440))
+
+    # Кэш геометрии доски по партиям: число партий и время жизни записи (в секундах)
+    BOARD_GEOMETRY_CACHE_SIZE: int = int(os.getenv("BOARD_GEOMETRY_CACHE_SIZE", 256))
+    BOARD_GEOMETRY_CACHE_TTL: int = int(os.getenv("BOARD_GEOMETRY_CACHE_TTL", 3600))
+
+    # Среда выполнения классификатора: keras, tflite, tflite_int8, onnx,
+    # opencv, numpy, numpy_mmap (веса отображаются в память и общие
+    # для всех воркеров) или daemon (модель в отдельном процессе).
+    # Модели для tflite/onnx/opencv/numpy/numpy_mmap создаются из
+    # model.keras командой python -m services.ml.export,
+    # для tflite_int8 — python -m services.ml.quantize
+    INFERENCE_BACKEND: str = os.getenv("INFERENCE_BACKEND", "keras")
+
+    # Демон инференса (python -m services.ml.daemon, INFERENCE_BACKEND=daemon):
+    # Unix-сокет, бэкенд модели внутри демона и сколько ждать ответа, с
+    INFERENCE_DAEMON_SOCKET: str = os.getenv("INFERENCE_DAEMON_SOCKET", "/tmp/chess-inference.sock")
+    INFERENCE_DAEMON_BACKEND: str = os.getenv("INFERENCE_DAEMON_BACKEND", "keras")
+    INFERENCE_DAEMON_TIMEOUT: float = float(os.getenv("INFERENCE_DAEMON_TIMEOUT", 30))
+
+    # Режим распознавания: squares — классификатор по 64 клеткам,
+    # board — вся доска одним проходом полносвёрточной модели
+    # (services/ml/board_model.py), cascade — пустые клетки отсекаются
+    # статистикой, остальные идут через маленькую модель и только
+    # неуверенные — через основную (services/ml/cascade.py)
+    RECOGNITION_MODE: str = os.getenv("RECOGNITION_MODE", "squares")
+
+    # Каскад: бэкенд маленькой модели (model_small.*) и порог уверенности,
+    # ниже которого клетка уходит на основную модель
+    CASCADE_SMALL_BACKEND: str = os.getenv("CASCADE_SMALL_BACKEND", "keras")
+    CASCADE_CONFIDENCE: float = float(os.getenv("CASCADE_CONFIDENCE", 0.9))
+
+    # Индекс шаблонов клеток для скриншотов (services/ml/templates.py):
+    # сколько шаблонов хранить; 0 — не использовать
+    TEMPLATE_INDEX_SIZE: int = int(os.getenv("TEMPLATE_INDEX_SIZE", 512))
+
+    # Порог уверенности, ниже которого клетка уточняется аугментациями
+    # (services/ml/tta.py, режим squares); 0 — не уточнять
+    TTA_CONFIDENCE: float = float(os.getenv("TTA_CONFIDENCE", 0))
+
+    # Исполнитель распознавания (services/recognition.py): число потоков
+    # и сколько загрузок может ждать в очереди, прежде чем новые получат 503
+    RECOGNITION_WORKERS: int = int(os.getenv("RECOGNITION_WORKERS", 1))
+    RECOGNITION_QUEUE_SIZE: int = int(os.getenv("RECOGNITION_QUEUE_SIZE", 8))
+
+    # Объединение батчей одновременных распознаваний (services/ml/batcher.py):
+    # наибольший батч (клеток, до 256 — четыре доски) и сколько ждать других
+    # запросов, мс; 0 — не объединять. Объединять есть что только при
+    # одновременных распознаваниях:
+    #   - RECOGNITION_WORKERS > 1 — доски потоков одного воркера uvicorn;
+    #   - демон инференса (INFERENCE_BACKEND=daemon, MICROBATCH_MAX_WAIT_MS
+    #     в окружении демона) — доски всех воркеров uvicorn.
+    # При RECOGNITION_WORKERS=1 без демона до модели доходит одна доска
+    # за раз: объединение только добавляет ожидание, и при запуске
+    # выводится предупреждение
+    MICROBATCH_MAX_SIZE: int = int(os.getenv("MICROBATCH_MAX_SIZE", 256))
+    MICROBATCH_MAX_WAIT_MS: float = float(os.getenv("MICROBATCH_MAX_WAIT_MS", 0))
+
     BASE_DIR: Path = Path(__file__).parent.parent
     BACKEND_DIR: Path = Path(__file__).parent
     FRONTEND_DIR: Path = BASE_DIR / "frontend"
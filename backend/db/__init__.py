@@ -4,7 +4,7 @@
 
 from .database import Base, get_async_session, engine
 from .models import User, UserRole, Game, GameStatus, Snapshot
-from .schemas import GameCreate, UserCreateByAdmin, UserUpdateByAdmin, UserUpdateSelf
+from .schemas import GameCreate, ModelActivate, ModelShadow, UserCreateByAdmin, UserUpdateByAdmin, UserUpdateSelf
 
 __all__ = [
     "Base",
@@ -19,4 +19,6 @@ __all__ = [
     "UserCreateByAdmin",
     "UserUpdateByAdmin",
     "UserUpdateSelf",
+    "ModelActivate",
+    "ModelShadow",
 ]
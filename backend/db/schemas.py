@@ -55,3 +55,16 @@ class GameCreate(BaseModel):
     title: str
     player1Id: int
     player2Id: int
+
+
+class ModelActivate(BaseModel):
+    """Схема замены активной модели классификатора."""
+    name: str
+    backend: str | None = None
+
+
+class ModelShadow(BaseModel):
+    """Схема назначения модели-кандидата для теневой проверки."""
+    name: str
+    sampleRate: float = 0.1
+    backend: str | None = None
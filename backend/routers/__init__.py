@@ -6,10 +6,14 @@ from .pages import router as pages_router
 from .games import router as games_router
 from .users import router as users_router
 from .auth import router as auth_router
+from .health import router as health_router
+from .models import router as models_router
 
 __all__ = [
     "pages_router",
     "games_router",
     "users_router",
     "auth_router",
+    "health_router",
+    "models_router",
 ]
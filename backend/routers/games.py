@@ -19,11 +19,26 @@ from services import (
     process_board_image,
     predictions_to_fen,
     predict_all_squares,
+    ImageQualityError,
+    RecognitionBusyError,
+    get_recognition_executor,
 )
 
 router = APIRouter(prefix="/api/games", tags=["games"])
 
 
+def recognize_snapshot(contents: bytes, cache_key=None) -> str:
+    """
+    Поиск доски, распознавание фигур и FEN.
+
+    Выполняется в исполнителе распознавания одной задачей: снимок
+    занимает одно место в очереди, и доска, уже найденная на снимке,
+    не теряется из-за заполненной очереди перед классификацией.
+    """
+    squares = process_board_image(contents, cache_key=cache_key)
+    return predictions_to_fen(predict_all_squares(squares))
+
+
 async def get_game_with_access_check(
     game_id: int,
     session: AsyncSession = Depends(get_async_session),
@@ -155,13 +170,18 @@ async def add_snapshot(
 
     contents = await image.read()
 
+    # Поиск доски и нейросеть нагружают процессор: выполняем их
+    # в исполнителе распознавания, не блокируя цикл событий
+    executor = get_recognition_executor()
     try:
-        squares = process_board_image(contents)
+        position = await executor.run(recognize_snapshot, contents, cache_key=game.id)
+    except RecognitionBusyError as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "1"})
+    except ImageQualityError as e:
+        raise HTTPException(status_code=400, detail=str(e), headers={"X-Error-Code": e.code})
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
 
-    predictions = predict_all_squares(squares)
-    position = predictions_to_fen(predictions)
     snapshot = await create_snapshot(session, game.id, position)
     move_number = len(game.snapshots) + 1
 
@@ -0,0 +1,45 @@
+"""
+Роутер проверок состояния приложения.
+"""
+
+from fastapi import APIRouter
+from fastapi.responses import JSONResponse
+
+from services.board_cache import board_geometry_cache
+from services.ml import cascade_stats, micro_batcher, model_status, template_index
+
+router = APIRouter(prefix="/api/health", tags=["health"])
+
+
+@router.get("/ready")
+async def readiness():
+    """Готовность к распознаванию: модель загружена и прогрета."""
+    status = model_status()
+    return JSONResponse(
+        status_code=200 if status == "ready" else 503,
+        content={"status": status},
+    )
+
+
+@router.get("/cascade")
+async def cascade_counters():
+    """Сколько клеток решено на каждой ступени каскада (RECOGNITION_MODE=cascade)."""
+    return cascade_stats.snapshot()
+
+
+@router.get("/templates")
+async def template_counters():
+    """Размер индекса шаблонов клеток и доля клеток, распознанных по нему."""
+    return template_index.snapshot()
+
+
+@router.get("/batcher")
+async def batcher_counters():
+    """Заполнение объединённых батчей и ожидание в очереди (MICROBATCH_MAX_WAIT_MS > 0)."""
+    return micro_batcher.stats.snapshot()
+
+
+@router.get("/board-cache")
+async def board_cache_counters():
+    """Размер кэша геометрии доски, попадания, промахи, отклонения и вытеснения."""
+    return board_geometry_cache.stats()
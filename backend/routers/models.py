@@ -0,0 +1,48 @@
+"""
+Роутер реестра моделей классификатора (только для администраторов).
+"""
+
+import asyncio
+
+from fastapi import APIRouter, Depends, HTTPException
+
+from auth import require_admin
+from db import ModelActivate, ModelShadow, User
+from services.ml import model_registry
+
+router = APIRouter(prefix="/api/models", tags=["models"])
+
+
+@router.get("")
+async def get_models(user: User = Depends(require_admin)):
+    """Доступные модели, активная модель и теневая проверка кандидата."""
+    return model_registry.status()
+
+
+@router.post("/active")
+async def activate_model(data: ModelActivate, user: User = Depends(require_admin)):
+    """Заменить активную модель без перезапуска"""
+    try:
+        version = await asyncio.to_thread(model_registry.activate, data.name, data.backend)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    return version._asdict()
+
+
+@router.post("/shadow")
+async def set_shadow_model(data: ModelShadow, user: User = Depends(require_admin)):
+    """Назначить модель-кандидата для теневой проверки"""
+    try:
+        version = await asyncio.to_thread(model_registry.set_shadow, data.name, data.sampleRate, data.backend)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    return {**version._asdict(), "sampleRate": data.sampleRate}
+
+
+@router.delete("/shadow")
+async def clear_shadow_model(user: User = Depends(require_admin)):
+    """Отключить теневую проверку"""
+    model_registry.clear_shadow()
+    return {"message": "Теневая проверка отключена"}
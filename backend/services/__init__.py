@@ -1,11 +1,25 @@
 """
 Слой сервисов для бизнес-логики.
+
+Распознавание доски (OpenCV, модель классификатора) загружается
+при первом обращении к его функциям: процессы и тесты, которым нужны
+только пользователи и партии, не платят за импорт OpenCV и ML-модуля.
 """
 
+import importlib
+
 from .game_service import get_game_by_id, get_games_count, get_games_list, create_game, create_snapshot, delete_last_snapshot, update_game_status
-from .board_service import process_board_image, predictions_to_fen
 from .user_service import get_users_list, get_users_count, get_user_by_id, hash_password
-from .ml import predict_all_squares
+from .recognition import RecognitionBusyError, get_recognition_executor
+
+# Имена, которые загружаются лениво: {имя: подмодуль}
+_LAZY_IMPORTS = {
+    "process_board_image": ".board_service",
+    "predictions_to_fen": ".board_service",
+    "ImageQualityError": ".board_service",
+    "validate_threshold_strategy": ".board_service",
+    "predict_all_squares": ".ml",
+}
 
 __all__ = [
     "get_games_list",
@@ -17,9 +31,25 @@ __all__ = [
     "update_game_status",
     "process_board_image",
     "predictions_to_fen",
+    "ImageQualityError",
+    "validate_threshold_strategy",
     "predict_all_squares",
+    "RecognitionBusyError",
+    "get_recognition_executor",
     "get_users_list",
     "get_users_count",
     "get_user_by_id",
     "hash_password",
 ]
+
+
+def __getattr__(name):
+    if name not in _LAZY_IMPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(_LAZY_IMPORTS[name], __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
@@ -0,0 +1,95 @@
+"""
+Кэш геометрии доски по партиям.
+
+Ученики обычно снимают доску со штатива, и от снимка к снимку
+положение доски в кадре не меняется. Кэш хранит последнюю
+подтверждённую геометрию (гомографию, линии сетки, порог
+бинаризации) для каждой партии, чтобы не искать доску заново.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+
+from config import settings
+
+
+class BoardGeometryCache:
+    """
+    LRU-кэш геометрии доски с ограничением размера и временем жизни.
+
+    Потокобезопасен. Считает попадания (геометрия подошла),
+    промахи (геометрии нет или она устарела), отклонения
+    (геометрия не прошла проверку на новом снимке) и вытеснения.
+    """
+
+    def __init__(self, max_size: int, ttl: float):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.rejections = 0
+        self.evictions = 0
+
+    def get(self, key):
+        """
+        Возвращает геометрию для ключа или None.
+
+        Отсутствие записи или истёкший срок жизни считается промахом.
+        Попадание засчитывается только после проверки (confirm).
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and time.monotonic() - entry[1] > self.ttl:
+                del self._entries[key]
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            return entry[0]
+
+    def put(self, key, geometry):
+        """Сохраняет геометрию, вытесняя самые давние записи сверх max_size."""
+        with self._lock:
+            self._entries[key] = (geometry, time.monotonic())
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def confirm(self, key):
+        """Отмечает, что геометрия из кэша подошла к новому снимку."""
+        with self._lock:
+            self.hits += 1
+
+    def reject(self, key):
+        """Удаляет геометрию, не прошедшую проверку на новом снимке."""
+        with self._lock:
+            self._entries.pop(key, None)
+            self.rejections += 1
+
+    def clear(self):
+        """Очищает кэш и счётчики."""
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = self.rejections = self.evictions = 0
+
+    def stats(self) -> dict:
+        """Счётчики кэша."""
+        with self._lock:
+            return {
+                "size": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "rejections": self.rejections,
+                "evictions": self.evictions,
+            }
+
+
+board_geometry_cache = BoardGeometryCache(
+    max_size=settings.BOARD_GEOMETRY_CACHE_SIZE,
+    ttl=settings.BOARD_GEOMETRY_CACHE_TTL,
+)
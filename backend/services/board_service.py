@@ -1,13 +1,114 @@
-import bisect
+import io
 import logging
 import os
+import threading
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
 import cv2
 import numpy as np
+from PIL import Image
+
+from config import settings
+from .board_cache import board_geometry_cache
 
 logger = logging.getLogger(__name__)
 
 DEBUG_SQUARES_DIR = os.path.join(os.path.dirname(__file__), "..", "debug_squares")
 
+# Максимальная сторона копии изображения, на которой ищется контур доски
+CONTOUR_MAX_SIDE = 1024
+
+# Максимальная полуширина окна уточнения углов на полном разрешении
+CORNER_REFINE_MAX_WIN = 15
+
+# Пороги бинаризации для перебора (в порядке приоритета)
+CONTOUR_THRESHOLDS = (100, 80, 60, 40)
+
+# Сколько крупнейших контуров проверять на каждом пороге
+CONTOUR_TOP_K = 5
+
+# Сторона клетки на входе классификатора
+SQUARE_SIZE = 180
+
+# Сторона клетки выровненной доски на входе модели доски (RECOGNITION_MODE=board)
+BOARD_CELL_SIZE = 64
+
+# Названия клеток в порядке батча: a8, b8, ..., h8, a7, ..., h1
+SQUARE_NAMES = [f"{chr(ord('a') + col)}{8 - row}" for row in range(8) for col in range(8)]
+
+# Максимальная сторона выровненной доски, на которой ищется сетка.
+# Классификатор видит доску с разрешением 8 * SQUARE_SIZE,
+# более точные линии сетки ему не нужны.
+GRID_MAX_SIDE = 8 * SQUARE_SIZE
+
+# Флаги imdecode для уменьшенного декодирования JPEG (в DCT-области)
+_REDUCED_DECODE_FLAGS = {
+    8: cv2.IMREAD_REDUCED_COLOR_8,
+    4: cv2.IMREAD_REDUCED_COLOR_4,
+    2: cv2.IMREAD_REDUCED_COLOR_2,
+}
+
+# Тег EXIF Orientation
+_EXIF_ORIENTATION = 0x0112
+
+# Максимальная сторона копии доски, на которой строятся проекции
+# градиента для поиска сетки (линии затем уточняются на полном разрешении)
+PROJECTION_MAX_SIDE = 512
+
+# Минимальная доля клеток, подтверждающих шахматный паттерн
+CHECKERBOARD_MIN_RATIO = 0.75
+
+# Насколько доля шахматного паттерна на новом снимке может быть ниже,
+# чем при сохранении геометрии в кэш
+CACHE_RATIO_MARGIN = 0.1
+
+# Скриншот: доля от максимума проекции градиента, ниже которой пики
+# не считаются кандидатами в линии сетки
+SCREENSHOT_PEAK_FLOOR = 0.3
+
+# Скриншот: допустимое отклонение шага сетки от среднего, в пикселях
+SCREENSHOT_MAX_SPACING_DEV = 1.0
+
+# Скриншот: порог шума — 25-й перцентиль стандартного отклонения
+# яркости в центральной части клеток. Заливка скриншота однородна,
+# у фотографии всегда есть шум сенсора и неравномерное освещение
+SCREENSHOT_MAX_NOISE = 1.0
+
+# Предварительная проверка качества: копия с такой большей стороной
+QUALITY_MAX_SIDE = 256
+
+# Минимальная короткая сторона изображения, в пикселях
+QUALITY_MIN_SIDE = 160
+
+# Минимальная дисперсия лапласиана на уменьшенной копии (резкость).
+# Порог консервативный: доска на test_img.png находится даже после
+# размытия, при котором дисперсия падает до ~30
+QUALITY_MIN_SHARPNESS = 10.0
+
+# Минимальное стандартное отклонение яркости на уменьшенной копии
+QUALITY_MIN_CONTRAST = 8.0
+
+# Чётность клеток (row + col) % 2 для матрицы 8x8
+_CELL_PARITY = np.add.outer(np.arange(8), np.arange(8)) % 2
+
+
+_threshold_executor = None
+_threshold_executor_lock = threading.Lock()
+
+
+class ImageQualityError(ValueError):
+    """
+    Изображение отклонено до поиска доски.
+
+    Атрибут code — машиночитаемая причина: "image_too_small",
+    "image_too_blurry" или "image_low_contrast".
+    """
+
+    def __init__(self, code, message):
+        super().__init__(message)
+        self.code = code
+
 
 def _is_square_like(approx):
     """
@@ -30,40 +131,264 @@ def _is_square_like(approx):
     return True
 
 
-def find_board_contour(image):
+def _largest_contours(contours, k):
     """
-    Находит контур шахматной доски на изображении.
+    Возвращает k крупнейших контуров по убыванию площади.
 
-    Ищет четырёхугольник, похожий на квадрат (с учётом перспективы),
-    занимающий значительную часть изображения.
+    Вместо полной сортировки используется частичный отбор
+    (argpartition): нужны только первые k контуров.
 
     Returns:
-        np.array: 4 точки углов доски или None, если доска не найдена
+        list: [(контур, площадь), ...]
     """
-    gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+    areas = np.array([cv2.contourArea(c) for c in contours])
+    if len(areas) > k:
+        top = np.argpartition(-areas, k - 1)[:k]
+    else:
+        top = np.arange(len(areas))
+    top = top[np.argsort(-areas[top], kind="stable")]
+    return [(contours[i], areas[i]) for i in top]
+
+
+def _quad_from_binary(binary, img_area):
+    """
+    Ищет четырёхугольник доски среди крупнейших внешних контуров
+    бинарного изображения.
+    """
+    contours, _ = cv2.findContours(binary, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+    if not contours:
+        return None
+
+    for contour, area in _largest_contours(contours, CONTOUR_TOP_K):
+        if area < img_area * 0.1:
+            break
+
+        peri = cv2.arcLength(contour, True)
+        approx = cv2.approxPolyDP(contour, 0.02 * peri, True)
+
+        if len(approx) == 4 and _is_square_like(approx):
+            return approx
+
+    return None
+
+
+def _threshold_sequential(blurred):
+    """Перебирает фиксированные пороги по очереди до первого успеха."""
+    for thresh_val in CONTOUR_THRESHOLDS:
+        _, binary = cv2.threshold(blurred, thresh_val, 255, cv2.THRESH_BINARY)
+        approx = _quad_from_binary(binary, blurred.size)
+        if approx is not None:
+            return approx, thresh_val
+    return None, None
+
+
+def _threshold_otsu(blurred):
+    """Один проход с порогом, выбранным методом Оцу."""
+    thresh_val, binary = cv2.threshold(blurred, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
+    approx = _quad_from_binary(binary, blurred.size)
+    return (approx, int(thresh_val)) if approx is not None else (None, None)
+
+
+def _threshold_adaptive(blurred):
+    """
+    Один проход адаптивной бинаризации: порог — среднее по окну
+    в половину изображения минус константа.
+    """
+    block = max(3, min(blurred.shape) // 2) | 1
+    binary = cv2.adaptiveThreshold(
+        blurred, 255, cv2.ADAPTIVE_THRESH_MEAN_C, cv2.THRESH_BINARY, block, 20
+    )
+    return _quad_from_binary(binary, blurred.size), None
+
+
+def _get_threshold_executor():
+    """Пул потоков для параллельного перебора порогов (создаётся лениво)."""
+    global _threshold_executor
+
+    with _threshold_executor_lock:
+        if _threshold_executor is None:
+            _threshold_executor = ThreadPoolExecutor(
+                max_workers=len(CONTOUR_THRESHOLDS),
+                thread_name_prefix="board-threshold",
+            )
+    return _threshold_executor
+
+
+def _threshold_parallel(blurred):
+    """
+    Проверяет все фиксированные пороги одновременно в пуле потоков.
+
+    OpenCV отпускает GIL, поэтому пороги обрабатываются параллельно.
+    Результат совпадает с последовательным перебором: выбирается
+    первый по приоритету порог, давший доску.
+    """
+    def attempt(thresh_val):
+        _, binary = cv2.threshold(blurred, thresh_val, 255, cv2.THRESH_BINARY)
+        return _quad_from_binary(binary, blurred.size)
+
+    results = _get_threshold_executor().map(attempt, CONTOUR_THRESHOLDS)
+    for thresh_val, approx in zip(CONTOUR_THRESHOLDS, results):
+        if approx is not None:
+            return approx, thresh_val
+    return None, None
+
+
+# Стратегии бинаризации: имя -> функция(blurred) -> (контур | None, порог | None)
+THRESHOLD_STRATEGIES = {
+    "sequential": _threshold_sequential,
+    "otsu": _threshold_otsu,
+    "adaptive": _threshold_adaptive,
+    "parallel": _threshold_parallel,
+}
+
+
+def validate_threshold_strategy(strategy):
+    """
+    Проверяет имя стратегии бинаризации.
+
+    Вызывается при старте приложения для settings.BOARD_THRESHOLD_STRATEGY:
+    ошибка конфигурации останавливает запуск, а не превращается
+    в 400 на каждой загрузке снимка.
+
+    Raises:
+        ValueError: Если стратегии нет в THRESHOLD_STRATEGIES
+    """
+    if strategy not in THRESHOLD_STRATEGIES:
+        raise ValueError(
+            f"Неизвестная стратегия бинаризации: {strategy}. "
+            f"Доступны: {', '.join(THRESHOLD_STRATEGIES)}"
+        )
+
+
+def _search_board_quad(gray, strategy, preferred_threshold=None):
+    """
+    Ищет четырёхугольник доски на полутоновом изображении
+    выбранной стратегией бинаризации.
+
+    Если задан preferred_threshold (например, сработавший на прошлом
+    снимке той же партии), сначала пробуется он.
+
+    Returns:
+        (approx, thresh_val): контур (или None) и сработавший порог
+    """
+    validate_threshold_strategy(strategy)
+    search = THRESHOLD_STRATEGIES[strategy]
+
     blurred = cv2.GaussianBlur(gray, (5, 5), 0)
-    img_area = image.shape[0] * image.shape[1]
 
-    for thresh_val in [100, 80, 60, 40]:
-        _, thresh = cv2.threshold(blurred, thresh_val, 255, cv2.THRESH_BINARY)
-        contours, _ = cv2.findContours(thresh, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+    if preferred_threshold is not None:
+        _, binary = cv2.threshold(blurred, preferred_threshold, 255, cv2.THRESH_BINARY)
+        approx = _quad_from_binary(binary, blurred.size)
+        if approx is not None:
+            return approx, preferred_threshold
 
-        if not contours:
-            continue
+    return search(blurred)
 
-        contours = sorted(contours, key=cv2.contourArea, reverse=True)
 
-        for contour in contours[:5]:
-            if cv2.contourArea(contour) < img_area * 0.1:
-                break
+def _refine_corners(image, corners, scale):
+    """
+    Уточняет углы доски на полноразмерном изображении.
 
-            peri = cv2.arcLength(contour, True)
-            approx = cv2.approxPolyDP(contour, 0.02 * peri, True)
+    Углы, найденные на уменьшенной копии, известны с точностью
+    порядка 1/scale пикселей. Для каждого угла вырезается небольшое
+    окно исходного изображения, и положение уточняется cornerSubPix.
+    Полное изображение в оттенки серого не переводится.
 
-            if len(approx) == 4 and _is_square_like(approx):
-                return approx
+    Args:
+        image: Полноразмерное BGR-изображение
+        corners: Углы в координатах полноразмерного изображения, форма (4, 2)
+        scale: Коэффициент уменьшения, на котором искался контур (< 1)
 
-    return None
+    Returns:
+        np.array: Уточнённые углы формы (4, 1, 2), float32
+    """
+    h, w = image.shape[:2]
+    win = int(min(CORNER_REFINE_MAX_WIN, max(5, np.ceil(3 / scale))))
+    criteria = (cv2.TERM_CRITERIA_EPS + cv2.TERM_CRITERIA_MAX_ITER, 30, 0.01)
+
+    refined = np.empty((4, 1, 2), dtype="float32")
+    for i, (x, y) in enumerate(corners):
+        x = float(np.clip(x, 0, w - 1))
+        y = float(np.clip(y, 0, h - 1))
+
+        # Окно с запасом, чтобы cornerSubPix не упирался в край
+        pad = 2 * win + 2
+        x0, y0 = max(0, int(x) - pad), max(0, int(y) - pad)
+        x1, y1 = min(w, int(x) + pad + 1), min(h, int(y) + pad + 1)
+        patch = cv2.cvtColor(image[y0:y1, x0:x1], cv2.COLOR_BGR2GRAY)
+
+        point = np.array([[[x - x0, y - y0]]], dtype="float32")
+        if patch.shape[0] > 2 * win + 5 and patch.shape[1] > 2 * win + 5:
+            cv2.cornerSubPix(patch, point, (win, win), (-1, -1), criteria)
+
+        # Уточнение не должно уводить угол дальше окна поиска
+        px, py = point[0, 0] + (x0, y0)
+        if abs(px - x) <= win and abs(py - y) <= win:
+            x, y = px, py
+        refined[i, 0] = (x, y)
+
+    return refined
+
+
+def _detect_board_contour(image, max_side=CONTOUR_MAX_SIDE, strategy=None, preferred_threshold=None):
+    """
+    Находит контур доски и порог бинаризации, на котором он найден.
+
+    Returns:
+        (contour, thresh_val): углы доски (или None) и порог
+                               (None, если стратегия без фиксированного порога)
+    """
+    strategy = strategy or settings.BOARD_THRESHOLD_STRATEGY
+    h, w = image.shape[:2]
+    scale = 1.0
+    if max_side and max(h, w) > max_side:
+        scale = max_side / max(h, w)
+        # INTER_LINEAR заметно быстрее INTER_AREA при дробном масштабе,
+        # а сглаживание всё равно выполняется GaussianBlur перед порогом
+        small = cv2.resize(
+            image, (max(1, round(w * scale)), max(1, round(h * scale))),
+            interpolation=cv2.INTER_LINEAR,
+        )
+    else:
+        small = image
+
+    approx, thresh_val = _search_board_quad(
+        cv2.cvtColor(small, cv2.COLOR_BGR2GRAY), strategy, preferred_threshold
+    )
+    if approx is None or scale == 1.0:
+        return approx, thresh_val
+
+    # Переводим углы в полное разрешение (с учётом центров пикселей)
+    sx, sy = w / small.shape[1], h / small.shape[0]
+    corners = (approx.reshape(4, 2).astype("float32") + 0.5) * (sx, sy) - 0.5
+    return _refine_corners(image, corners, scale), thresh_val
+
+
+def find_board_contour(image, max_side=CONTOUR_MAX_SIDE, strategy=None):
+    """
+    Находит контур шахматной доски на изображении.
+
+    Ищет четырёхугольник, похожий на квадрат (с учётом перспективы),
+    занимающий значительную часть изображения.
+
+    Большие изображения обрабатываются по схеме coarse-to-fine:
+    контур ищется на копии, уменьшенной до max_side по большей
+    стороне, а углы затем уточняются на исходном разрешении.
+    Поэтому время поиска почти не зависит от разрешения камеры.
+
+    Args:
+        image: BGR-изображение
+        max_side: Максимальная сторона копии для поиска контура.
+                  None — искать на полном разрешении.
+        strategy: Стратегия бинаризации из THRESHOLD_STRATEGIES.
+                  По умолчанию — settings.BOARD_THRESHOLD_STRATEGY.
+
+    Returns:
+        np.array: 4 точки углов доски (в координатах исходного
+                  изображения) или None, если доска не найдена
+    """
+    contour, _ = _detect_board_contour(image, max_side, strategy)
+    return contour
 
 
 def _order_points(pts):
@@ -80,9 +405,12 @@ def _order_points(pts):
     return rect
 
 
-def four_point_transform(image, pts):
+def _board_homography(pts):
     """
-    Перспективное преобразование области из 4 точек в квадрат.
+    Гомография, переводящая область из 4 точек в квадрат.
+
+    Returns:
+        (M, size): матрица 3x3 и сторона квадрата в пикселях
     """
     rect = _order_points(pts.reshape(4, 2).astype("float32"))
     (tl, tr, br, bl) = rect
@@ -96,100 +424,208 @@ def four_point_transform(image, pts):
         [size - 1, size - 1], [0, size - 1]
     ], dtype="float32")
 
-    M = cv2.getPerspectiveTransform(rect, dst)
+    return cv2.getPerspectiveTransform(rect, dst), size
+
+
+def four_point_transform(image, pts):
+    """
+    Перспективное преобразование области из 4 точек в квадрат.
+    """
+    M, size = _board_homography(pts)
     return cv2.warpPerspective(image, M, (size, size))
 
 
+def _find_local_maxima(profile, window):
+    """
+    Возвращает индексы локальных максимумов профиля.
+
+    Точка считается максимумом, если она не меньше всех значений
+    в окне [i - window, i + window]. Края профиля (ближе window
+    к границе) не рассматриваются.
+    """
+    n = len(profile)
+    if n < 2 * window + 1:
+        return np.empty(0, dtype=np.intp)
+
+    windows = np.lib.stride_tricks.sliding_window_view(profile, 2 * window + 1)
+    centers = profile[window:n - window]
+    return np.flatnonzero(centers >= windows.max(axis=1)) + window
+
+
 def _find_grid_peaks(profile):
     """
     Находит 9 равноотстоящих пиков градиента — линии сетки 8x8.
 
     Возвращает список из 9 позиций или None, если сетка не найдена.
     """
+    profile = np.asarray(profile)
     n = len(profile)
     window = max(3, n // 80)
 
-    # Локальные максимумы
-    peaks = []
-    for i in range(window, n - window):
-        if profile[i] >= np.max(profile[max(0, i - window):min(n, i + window + 1)]):
-            peaks.append((i, profile[i]))
-
+    peaks = _find_local_maxima(profile, window)
     if len(peaks) < 9:
         return None
 
-    # Топ-30 пиков по силе
-    top_peaks = sorted([p[0] for p in sorted(peaks, key=lambda x: x[1], reverse=True)[:30]])
+    # Топ-30 пиков по силе (stable — при равной силе сохраняется порядок)
+    strongest = np.argsort(-profile[peaks], kind="stable")[:30]
+    top_peaks = np.sort(peaks[strongest])
+    count = len(top_peaks)
+
+    # Все пары (начало, конец) решётки, покрывающие не меньше половины профиля
+    first, last = np.triu_indices(count, k=1)
+    spans = top_peaks[last] - top_peaks[first]
+    keep = spans >= n * 0.5
+    first, spans = first[keep], spans[keep]
+    if len(spans) == 0:
+        return None
 
+    # Ожидаемые позиции 9 линий для каждой пары: (кандидаты, 9)
+    spacing = spans / 8
+    expected = top_peaks[first][:, None] + np.arange(9) * spacing[:, None]
+    threshold = (spacing * 0.15)[:, None]
+
+    # Ближайший пик слева и справа от ожидаемой позиции (аналог bisect)
+    idx = np.searchsorted(top_peaks, expected, side="left")
+    lo = np.clip(idx - 1, 0, count - 1)
+    hi = np.clip(idx, 0, count - 1)
+    dist_lo = np.where(idx > 0, np.abs(top_peaks[lo] - expected), np.inf)
+    dist_hi = np.where(idx < count, np.abs(top_peaks[hi] - expected), np.inf)
+
+    # При равном расстоянии предпочитаем левый пик
+    use_hi = dist_hi < np.minimum(threshold, dist_lo)
+    use_lo = ~use_hi & (dist_lo < threshold)
+    complete = (use_hi | use_lo).all(axis=1)
+    if not complete.any():
+        return None
+
+    matched = np.where(use_hi, top_peaks[hi], top_peaks[lo])[complete]
+    spans = spans[complete]
+
+    # Проверяем равномерность расстояний между соседними пиками
+    spacings = np.diff(matched, axis=1)
+    mean_sp = spacings.mean(axis=1)
+    valid = mean_sp != 0
+    cv = np.full(len(matched), np.inf)
+    cv[valid] = spacings[valid].std(axis=1) / mean_sp[valid]
+
+    candidates = np.flatnonzero(cv <= 0.10)
+    if len(candidates) == 0:
+        return None
+
+    # Лучшая решётка — минимальный разброс шага, при равенстве — больший охват
     best_score = -float('inf')
     best_span = 0
-    best_matched = None
-
-    for i in range(len(top_peaks)):
-        for j in range(i + 1, len(top_peaks)):
-            span = top_peaks[j] - top_peaks[i]
-            spacing = span / 8
-
-            if span < n * 0.5:
-                continue
-
-            # Для каждой ожидаемой позиции ищем ближайший пик (bisect)
-            matched = []
-            threshold = spacing * 0.15
-            for k in range(9):
-                expected = top_peaks[i] + k * spacing
-                idx = bisect.bisect_left(top_peaks, expected)
-                best_match = None
-                best_dist = threshold
-                for ci in (idx - 1, idx):
-                    if 0 <= ci < len(top_peaks):
-                        dist = abs(top_peaks[ci] - expected)
-                        if dist < best_dist:
-                            best_dist = dist
-                            best_match = top_peaks[ci]
-                if best_match is not None:
-                    matched.append(best_match)
-
-            if len(matched) < 9:
-                continue
-
-            # Проверяем равномерность расстояний между соседними пиками
-            spacings = [matched[k + 1] - matched[k] for k in range(8)]
-            mean_sp = np.mean(spacings)
-            if mean_sp == 0:
-                continue
-            cv = np.std(spacings) / mean_sp
-            if cv > 0.10:
-                continue
-
-            score = -cv
-            if score > best_score or (np.isclose(score, best_score) and span > best_span):
-                best_score = score
-                best_span = span
-                best_matched = matched
-
-    return best_matched
-
-
-def _find_grid_lines(image):
+    best_idx = None
+    for c in candidates:
+        score = -cv[c]
+        if score > best_score or (np.isclose(score, best_score) and spans[c] > best_span):
+            best_score = score
+            best_span = spans[c]
+            best_idx = c
+
+    return matched[best_idx].tolist()
+
+
+def _gradient_profiles(gray):
+    """
+    Проекции модуля градиента: сумма |dI/dy| по строкам и |dI/dx|
+    по столбцам.
+
+    Градиенты считаются в int16 (Sobel 3x3 по uint8 не выходит
+    за ±1020) и по одному, чтобы не держать в памяти оба сразу.
+
+    Returns:
+        (row_profile, col_profile): целочисленные профили
+    """
+    grad = cv2.Sobel(gray, cv2.CV_16S, 0, 1, ksize=3)
+    row_profile = np.abs(grad, out=grad).sum(axis=1, dtype=np.int64)
+
+    grad = cv2.Sobel(gray, cv2.CV_16S, 1, 0, ksize=3)
+    col_profile = np.abs(grad, out=grad).sum(axis=0, dtype=np.int64)
+
+    return row_profile, col_profile
+
+
+def _refine_lines(gray, lines, radius, axis):
+    """
+    Уточняет положение линий сетки на полном разрешении.
+
+    Для каждой линии градиент считается только в полосе шириной
+    2 * radius + 1 вокруг грубой позиции, и линия переносится
+    в максимум проекции внутри полосы.
+
+    Args:
+        gray: Полутоновое изображение в полном разрешении
+        lines: Грубые позиции линий (в координатах gray)
+        radius: Полуширина полосы поиска
+        axis: 0 — горизонтальные линии (строки), 1 — вертикальные (столбцы)
+    """
+    n = gray.shape[axis]
+    refined = []
+    for pos in lines:
+        lo, hi = max(1, pos - radius), min(n - 2, pos + radius)
+        if hi < lo:
+            refined.append(pos)
+            continue
+
+        # Полоса с запасом в 1 пиксель под ядро Sobel
+        if axis == 0:
+            grad = cv2.Sobel(gray[lo - 1:hi + 2], cv2.CV_16S, 0, 1, ksize=3)[1:-1]
+        else:
+            grad = cv2.Sobel(gray[:, lo - 1:hi + 2], cv2.CV_16S, 1, 0, ksize=3)[:, 1:-1]
+        profile = np.abs(grad).sum(axis=1 - axis, dtype=np.int64)
+        refined.append(lo + int(np.argmax(profile)))
+
+    return refined
+
+
+def _find_grid_lines(image, max_side=PROJECTION_MAX_SIDE, peak_floor=None):
     """
     Находит 9 горизонтальных и 9 вертикальных линий сетки.
 
+    Проекции градиента строятся на копии, уменьшенной до max_side
+    по большей стороне, а найденные линии затем уточняются на полном
+    разрешении в узких полосах вокруг грубых позиций.
+
+    Args:
+        image: Выровненная доска (BGR)
+        max_side: Максимальная сторона копии для проекций.
+                  None — строить проекции на полном разрешении.
+        peak_floor: Доля от максимума проекции, ниже которой значения
+                    обнуляются перед поиском пиков (None — не обнулять).
+                    Убирает слабые края фигур и надписей, когда линии
+                    сетки заведомо самые контрастные.
+
     Returns:
         (h_lines, v_lines) или None, если сетка не найдена.
     """
     gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
     h, w = gray.shape
 
-    grad_x = np.abs(cv2.Sobel(gray, cv2.CV_64F, 1, 0, ksize=3))
-    grad_y = np.abs(cv2.Sobel(gray, cv2.CV_64F, 0, 1, ksize=3))
+    small = gray
+    if max_side and max(h, w) > max_side:
+        scale = max_side / max(h, w)
+        small = cv2.resize(
+            gray, (max(1, round(w * scale)), max(1, round(h * scale))),
+            interpolation=cv2.INTER_AREA,
+        )
 
-    row_lines = _find_grid_peaks(np.sum(grad_y, axis=1))
-    col_lines = _find_grid_peaks(np.sum(grad_x, axis=0))
+    row_profile, col_profile = _gradient_profiles(small)
+    if peak_floor is not None:
+        row_profile = np.where(row_profile >= peak_floor * row_profile.max(), row_profile, 0)
+        col_profile = np.where(col_profile >= peak_floor * col_profile.max(), col_profile, 0)
+    row_lines = _find_grid_peaks(row_profile)
+    col_lines = _find_grid_peaks(col_profile)
 
     if row_lines is None or col_lines is None:
         return None
 
+    if small is not gray:
+        sy, sx = h / small.shape[0], w / small.shape[1]
+        radius = int(np.ceil(max(sx, sy))) + 1
+        row_lines = _refine_lines(gray, [round((y + 0.5) * sy - 0.5) for y in row_lines], radius, axis=0)
+        col_lines = _refine_lines(gray, [round((x + 0.5) * sx - 0.5) for x in col_lines], radius, axis=1)
+
     row_span = row_lines[-1] - row_lines[0]
     col_span = col_lines[-1] - col_lines[0]
 
@@ -259,74 +695,579 @@ def split_board_to_squares(image, h_lines, v_lines):
     return squares
 
 
-def _verify_checkerboard(squares):
+def _locate_grid(image, M, size):
     """
-    Проверяет шахматный паттерн: соседние клетки чередуются по яркости.
-    Проверяет обе ориентации и выбирает лучшую.
+    Находит линии сетки без полноразмерного выравнивания доски.
+
+    Доска выравнивается с разрешением не больше GRID_MAX_SIDE,
+    найденные линии пересчитываются в координаты полноразмерной
+    выровненной доски (стороной size).
+
+    Returns:
+        (row_lines, col_lines, warped): 9 горизонтальных и 9 вертикальных
+            линий (float) и выровненная доска, на которой искалась сетка;
+            None, если сетка не найдена.
+    """
+    grid_side = min(size, GRID_MAX_SIDE)
+    scale = (grid_side - 1) / (size - 1) if size > 1 else 1.0
+    warped = cv2.warpPerspective(image, np.diag([scale, scale, 1.0]) @ M, (grid_side, grid_side))
+
+    result = _find_grid_lines(warped)
+    if result is None:
+        return None
+
+    row_lines, col_lines = result
+    logger.warning(
+        "locate_grid: board=%d, grid=%d, cell=%.0f",
+        size, grid_side, (row_lines[-1] - row_lines[0]) / 8 / scale,
+    )
+    return np.asarray(row_lines) / scale, np.asarray(col_lines) / scale, warped
+
+
+def extract_square_batch(image, M, row_lines, col_lines, out=None):
     """
-    vals = {}
+    Вырезает 64 клетки из исходного фото сразу в батч для классификатора.
+
+    Для каждой клетки перспективное преобразование, вырезание по
+    сетке и масштабирование до SQUARE_SIZE объединяются в одну
+    гомографию, и клетка строится прямо в своём слоте батча.
+    Полноразмерная выровненная доска и отдельные resize не нужны,
+    а стоимость не зависит от разрешения исходного фото.
+
+    Args:
+        image: Исходное BGR-изображение
+        M: Гомография из исходного изображения в выровненную доску
+        row_lines: 9 горизонтальных линий сетки (в координатах выровненной доски)
+        col_lines: 9 вертикальных линий сетки
+        out: Необязательный буфер формы (64, SQUARE_SIZE, SQUARE_SIZE, 3), uint8
+
+    Returns:
+        np.ndarray: Батч формы (64, SQUARE_SIZE, SQUARE_SIZE, 3) в порядке SQUARE_NAMES
+    """
+    n = SQUARE_SIZE
+    if out is None:
+        out = np.empty((64, n, n, 3), dtype=np.uint8)
+
+    Minv = np.linalg.inv(M)
     for row in range(8):
+        sy = (row_lines[row + 1] - row_lines[row]) / n
         for col in range(8):
-            name = f"{chr(ord('a') + col)}{8 - row}"
-            img = squares.get(name)
-            if img is None or img.size == 0:
-                return False
-            gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY) if len(img.shape) == 3 else img
-            vals[(row, col)] = np.mean(gray)
-
-    best_ratio = 0
-    # Проверяем обе ориентации (parity=0 и parity=1)
-    for parity in (0, 1):
-        group_a = [v for (r, c), v in vals.items() if (c + r) % 2 == parity]
-        group_b = [v for (r, c), v in vals.items() if (c + r) % 2 != parity]
-
-        avg_a = np.mean(group_a)
-        avg_b = np.mean(group_b)
-
-        if abs(avg_a - avg_b) < 20:
-            continue
+            sx = (col_lines[col + 1] - col_lines[col]) / n
+            # Пиксель клетки -> выровненная доска (как cv2.resize с INTER_LINEAR)
+            cell = np.array([
+                [sx, 0, col_lines[col] + 0.5 * sx - 0.5],
+                [0, sy, row_lines[row] + 0.5 * sy - 0.5],
+                [0, 0, 1],
+            ])
+            cv2.warpPerspective(
+                image, Minv @ cell, (n, n), dst=out[row * 8 + col],
+                flags=cv2.INTER_LINEAR | cv2.WARP_INVERSE_MAP,
+            )
+    return out
+
+
+def extract_board(image, M, row_lines, col_lines, cell_size=BOARD_CELL_SIZE):
+    """
+    Строит выровненную доску для модели доски одним перспективным
+    преобразованием исходного фото.
+
+    Гомография и внешние линии сетки объединяются в одну матрицу,
+    и доска строится сразу со стороной 8 * cell_size: ни батча
+    клеток SQUARE_SIZE, ни повторного масштабирования.
+
+    Args:
+        image: Исходное BGR-изображение
+        M: Гомография из исходного изображения в выровненную доску
+        row_lines: 9 горизонтальных линий сетки (в координатах выровненной доски)
+        col_lines: 9 вертикальных линий сетки
+        cell_size: Сторона клетки на выходе
+
+    Returns:
+        np.ndarray: Доска (8*cell_size, 8*cell_size, 3), строка 0 — восьмая горизонталь
+    """
+    side = 8 * cell_size
+    sx = (col_lines[8] - col_lines[0]) / side
+    sy = (row_lines[8] - row_lines[0]) / side
+    # Пиксель доски -> выровненная доска (как в extract_square_batch)
+    board = np.array([
+        [sx, 0, col_lines[0] + 0.5 * sx - 0.5],
+        [0, sy, row_lines[0] + 0.5 * sy - 0.5],
+        [0, 0, 1],
+    ])
+    return cv2.warpPerspective(
+        image, np.linalg.inv(M) @ board, (side, side),
+        flags=cv2.INTER_LINEAR | cv2.WARP_INVERSE_MAP,
+    )
+
+
+def _cut_board(image, row_lines, col_lines, cell_size=BOARD_CELL_SIZE):
+    """Вырезает доску, выровненную по осям (скриншот), сразу со стороной 8 * cell_size."""
+    rows = np.round(row_lines).astype(int)
+    cols = np.round(col_lines).astype(int)
+    side = 8 * cell_size
+    return cv2.resize(image[rows[0]:rows[8], cols[0]:cols[8]], (side, side), interpolation=cv2.INTER_AREA)
+
+
+def _cut_square_batch(board, row_lines, col_lines, out=None):
+    """
+    Нарезает уже выровненную доску на 64 клетки прямо в батч.
+
+    Используется, когда доска выровнена в полном разрешении
+    ради поиска сетки и повторное преобразование не нужно.
+    """
+    n = SQUARE_SIZE
+    if out is None:
+        out = np.empty((64, n, n, 3), dtype=np.uint8)
+
+    rows = np.round(row_lines).astype(int)
+    cols = np.round(col_lines).astype(int)
+    for row in range(8):
+        for col in range(8):
+            cv2.resize(
+                board[rows[row]:rows[row + 1], cols[col]:cols[col + 1]], (n, n),
+                dst=out[row * 8 + col],
+            )
+    return out
+
+
+class BoardSquares(dict):
+    """
+    Клетки доски: словарь {"a8": изображение, ..., "h1": изображение}.
+
+    Изображения — представления одного батча формы
+    (64, SQUARE_SIZE, SQUARE_SIZE, 3), который доступен через
+    атрибут batch. Классификатор использует его напрямую,
+    без повторной сборки и масштабирования клеток.
+
+    Атрибут brightness — матрица 8x8 средней яркости клеток
+    (строка 0 — восьмая горизонталь), посчитанная при проверке
+    шахматного паттерна.
+
+    Атрибут path — каким путём найдена доска: "screenshot"
+    (прямая нарезка скриншота), "cached" (геометрия из кэша)
+    или "detected" (полный поиск).
+
+    В режиме board клетки — представления выровненной доски
+    (атрибут board, см. from_board), а батча нет (batch = None).
+    """
 
-        mid = (avg_a + avg_b) / 2
-        correct = sum(
-            1 for (r, c), v in vals.items()
-            if ((c + r) % 2 == parity) == (v > mid)
+    def __init__(self, batch, brightness=None, path=None):
+        super().__init__(zip(SQUARE_NAMES, batch))
+        self.batch = batch
+        self.board = None
+        self.brightness = brightness
+        self.path = path
+
+    @classmethod
+    def from_board(cls, board, brightness=None, path=None):
+        """Клетки выровненной доски (8*c, 8*c, 3) без батча для классификатора."""
+        c = board.shape[0] // 8
+        squares = cls(
+            [board[row * c:(row + 1) * c, col * c:(col + 1) * c] for row in range(8) for col in range(8)],
+            brightness, path,
         )
+        squares.batch = None
+        squares.board = board
+        return squares
 
-        ratio = correct / 64
-        best_ratio = max(best_ratio, ratio)
 
-    logger.warning("checkerboard: best_ratio=%d/64 (%.0f%%)", int(best_ratio * 64), best_ratio * 100)
-    return best_ratio >= 0.75
+def cell_brightness(squares):
+    """
+    Средняя яркость каждой из 64 клеток.
 
+    Для BoardSquares весь батч (или выровненная доска) переводится
+    в оттенки серого одним вызовом cvtColor, а суммы по клеткам
+    считаются одной редукцией.
 
-def process_board_image(image_bytes: bytes) -> dict:
+    Returns:
+        np.ndarray: Матрица (8, 8), строка 0 — восьмая горизонталь;
+                    None, если каких-то клеток нет или они пустые.
     """
-    Обрабатывает изображение шахматной доски и возвращает 64 клетки.
+    board = getattr(squares, "board", None)
+    if board is not None:
+        c = board.shape[0] // 8
+        gray = cv2.cvtColor(board, cv2.COLOR_BGR2GRAY)
+        return gray.reshape(8, c, 8, c).mean(axis=(1, 3))
+
+    batch = getattr(squares, "batch", None)
+    if batch is not None:
+        n, h, w = batch.shape[:3]
+        gray = cv2.cvtColor(batch.reshape(n * h, w, 3), cv2.COLOR_BGR2GRAY)
+        sums = gray.reshape(n, h * w).sum(axis=1, dtype=np.uint32)
+        return (sums / (h * w)).reshape(8, 8)
+
+    values = np.empty(64)
+    for i, name in enumerate(SQUARE_NAMES):
+        img = squares.get(name)
+        if img is None or img.size == 0:
+            return None
+        gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY) if img.ndim == 3 else img
+        values[i] = gray.mean()
+    return values.reshape(8, 8)
+
+
+def checkerboard_score(brightness):
+    """
+    Доля клеток, яркость которых соответствует шахматному чередованию.
 
-    Raises:
-        ValueError: Если не удалось найти/распознать доску
+    Обе ориентации (какой цвет у a8) оцениваются векторно,
+    возвращается лучшая. Ориентация не учитывается, если средние
+    яркости двух групп клеток отличаются меньше чем на 20.
+
+    Args:
+        brightness: Матрица (8, 8) средней яркости клеток
+
+    Returns:
+        float: Доля совпавших клеток (0..1)
+    """
+    # masks[p] — клетки с (row + col) % 2 == p
+    masks = np.stack([_CELL_PARITY == 0, _CELL_PARITY == 1])
+    avg_a = (brightness * masks).sum(axis=(1, 2)) / 32
+    avg_b = (brightness * ~masks).sum(axis=(1, 2)) / 32
+    mid = (avg_a + avg_b) / 2
+
+    correct = (masks == (brightness > mid[:, None, None])).sum(axis=(1, 2))
+    ratios = np.where(np.abs(avg_a - avg_b) >= 20, correct / 64, 0.0)
+    return float(ratios.max())
+
+
+def _verify_checkerboard(squares):
+    """
+    Проверяет шахматный паттерн: соседние клетки чередуются по яркости.
+    Проверяет обе ориентации и выбирает лучшую.
+    """
+    brightness = getattr(squares, "brightness", None)
+    if brightness is None:
+        brightness = cell_brightness(squares)
+    if brightness is None:
+        return False
+
+    best_ratio = checkerboard_score(brightness)
+    logger.warning("checkerboard: best_ratio=%d/64 (%.0f%%)", round(best_ratio * 64), best_ratio * 100)
+    return best_ratio >= CHECKERBOARD_MIN_RATIO
+
+
+def read_image_header(image_bytes: bytes):
+    """
+    Читает заголовок изображения без декодирования пикселей.
+
+    EXIF читается только у JPEG: уменьшение при декодировании
+    (_decode_reduction) касается только JPEG, а у PNG Pillow ради
+    getexif() декодирует всё изображение.
+
+    Returns:
+        dict: {"format", "width", "height", "orientation"} — ширина и
+              высота с учётом поворота по EXIF (у других форматов
+              orientation = 1); None, если формат не распознан.
+    """
+    try:
+        with Image.open(io.BytesIO(image_bytes)) as img:
+            width, height = img.size
+            image_format = img.format
+            orientation = img.getexif().get(_EXIF_ORIENTATION, 1) if image_format == "JPEG" else 1
+    except Exception:
+        return None
+
+    # Ориентации 5-8 — поворот на 90°, ширина и высота меняются местами
+    if orientation in (5, 6, 7, 8):
+        width, height = height, width
+
+    return {"format": image_format, "width": width, "height": height, "orientation": orientation}
+
+
+def _decode_reduction(header, target_side):
     """
+    Во сколько раз уменьшать изображение при декодировании.
+
+    Выбирается наибольший коэффициент из 8, 4, 2, при котором
+    короткая сторона остаётся не меньше target_side. Уменьшение
+    применяется только к JPEG: там оно выполняется в DCT-области
+    и ускоряет само декодирование.
+    """
+    if not header or header["format"] != "JPEG" or not target_side:
+        return 1
+
+    short_side = min(header["width"], header["height"])
+    for factor in _REDUCED_DECODE_FLAGS:
+        if short_side // factor >= target_side:
+            return factor
+    return 1
+
+
+def decode_image(image_bytes: bytes, target_side=None):
+    """
+    Декодирует изображение в разрешении, достаточном для распознавания.
+
+    Сначала читается заголовок (размеры и EXIF-ориентация). Большие
+    JPEG декодируются сразу в уменьшенном виде (IMREAD_REDUCED_COLOR_*),
+    так что короткая сторона не меньше target_side. Поворот по EXIF
+    применяет imdecode.
+
+    Args:
+        image_bytes: Содержимое файла
+        target_side: Минимальная короткая сторона после декодирования.
+                     По умолчанию — settings.BOARD_DECODE_TARGET_SIDE,
+                     0 — всегда декодировать в полном разрешении.
+
+    Returns:
+        np.ndarray: BGR-изображение или None, если декодировать не удалось
+    """
+    if target_side is None:
+        target_side = settings.BOARD_DECODE_TARGET_SIDE
+
+    header = read_image_header(image_bytes)
+    factor = _decode_reduction(header, target_side)
+
     nparr = np.frombuffer(image_bytes, np.uint8)
-    image = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
-    if image is None:
-        raise ValueError("Не удалось декодировать изображение")
+    image = cv2.imdecode(nparr, _REDUCED_DECODE_FLAGS.get(factor, cv2.IMREAD_COLOR))
+
+    if header and image is not None:
+        logger.warning(
+            "decode_image: %s %dx%d, orientation=%d, reduced=1/%d -> %dx%d",
+            header["format"], header["width"], header["height"], header["orientation"],
+            factor, image.shape[1], image.shape[0],
+        )
+    return image
+
+
+def check_image_quality(image):
+    """
+    Дешёвая проверка перед поиском доски: размер, резкость, контраст.
+
+    Резкость и контраст оцениваются на копии с большей стороной
+    QUALITY_MAX_SIDE (INTER_LINEAR — на дробном масштабе INTER_AREA
+    в разы медленнее), так что проверка занимает единицы миллисекунд
+    при любом размере снимка.
+
+    Raises:
+        ImageQualityError: Если на изображении заведомо не найти доску
+    """
+    h, w = image.shape[:2]
+    if min(h, w) < QUALITY_MIN_SIDE:
+        raise ImageQualityError(
+            "image_too_small",
+            f"Изображение слишком маленькое ({w}x{h}), нужно не меньше "
+            f"{QUALITY_MIN_SIDE} пикселей по короткой стороне",
+        )
+
+    small = image
+    if max(h, w) > QUALITY_MAX_SIDE:
+        scale = QUALITY_MAX_SIDE / max(h, w)
+        small = cv2.resize(
+            image, (max(1, round(w * scale)), max(1, round(h * scale))),
+            interpolation=cv2.INTER_LINEAR,
+        )
+    gray = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY)
+
+    contrast = float(gray.std())
+    if contrast < QUALITY_MIN_CONTRAST:
+        raise ImageQualityError("image_low_contrast", "Изображение слишком однородное, доска не видна")
+
+    sharpness = float(cv2.Laplacian(gray, cv2.CV_64F).var())
+    if sharpness < QUALITY_MIN_SHARPNESS:
+        raise ImageQualityError("image_too_blurry", "Изображение слишком размытое")
+
 
-    contour = find_board_contour(image)
+# Геометрия доски на снимке: всё, что нужно, чтобы вырезать клетки
+# без повторного поиска. Координаты — в декодированном изображении.
+BoardGeometry = namedtuple(
+    "BoardGeometry",
+    ["image_shape", "M", "row_lines", "col_lines", "threshold", "ratio"],
+)
+
+
+def _board_mode():
+    """Режим board: модели доски нужна выровненная доска, а не батч клеток."""
+    return settings.RECOGNITION_MODE == "board"
+
+
+def _make_squares(batch=None, board=None):
+    """BoardSquares (из батча или из выровненной доски) с посчитанной матрицей яркости клеток."""
+    squares = BoardSquares(batch) if board is None else BoardSquares.from_board(board)
+    squares.brightness = cell_brightness(squares)
+    return squares
+
+
+def _extract_squares(image, M, row_lines, col_lines):
+    """Клетки по геометрии доски: батч для классификатора или доска для модели доски."""
+    if _board_mode():
+        return _make_squares(board=extract_board(image, M, row_lines, col_lines))
+    return _make_squares(extract_square_batch(image, M, row_lines, col_lines))
+
+
+def _detect_board(image, preferred_threshold=None):
+    """
+    Полный поиск доски: контур, выравнивание, сетка, проверка паттерна.
+
+    Returns:
+        (BoardSquares, BoardGeometry)
+
+    Raises:
+        ValueError: Если доска не найдена
+    """
+    contour, threshold = _detect_board_contour(image, preferred_threshold=preferred_threshold)
     if contour is None:
         raise ValueError("Не удалось найти шахматную доску на изображении")
 
-    aligned = four_point_transform(image, contour)
+    M, size = _board_homography(contour)
 
-    grid = find_board_grid(aligned)
+    grid = _locate_grid(image, M, size)
     if grid is None:
         raise ValueError("Не удалось найти шахматную доску на изображении")
 
-    board, h_lines, v_lines = grid
-    squares = split_board_to_squares(board, h_lines, v_lines)
+    # Вместе с клетками считается матрица яркости: она нужна для
+    # проверки паттерна и пригодится следующим этапам (например,
+    # фильтру пустых клеток)
+    row_lines, col_lines, warped = grid
+    if warped.shape[0] == size and not _board_mode():
+        # Доска уже выровнена в полном разрешении — режем клетки из неё
+        squares = _make_squares(_cut_square_batch(warped, row_lines, col_lines))
+    else:
+        squares = _extract_squares(image, M, row_lines, col_lines)
 
     if not _verify_checkerboard(squares):
         raise ValueError("Не удалось найти шахматную доску на изображении")
 
+    geometry = BoardGeometry(
+        image.shape, M, row_lines, col_lines, threshold, checkerboard_score(squares.brightness)
+    )
+    return squares, geometry
+
+
+def _is_periodic(lines, spacing):
+    """Все шаги сетки совпадают со средним с точностью до пикселя."""
+    return np.abs(np.diff(lines) - spacing).max() <= SCREENSHOT_MAX_SPACING_DEV
+
+
+def _detect_screenshot(image):
+    """
+    Быстрый путь для скриншотов: доска уже выровнена по осям.
+
+    Сетка ищется прямо на исходном изображении, без контура
+    и перспективного преобразования. Путь принимается, только если
+    шаг линий строго периодичен и одинаков по обеим осям, шахматный
+    паттерн подтверждён, а клетки залиты однородно — у фотографий
+    ровной доски такого не бывает, и они уходят на полный поиск.
+
+    Returns:
+        BoardSquares или None, если изображение не похоже на скриншот
+    """
+    grid = _find_grid_lines(image, peak_floor=SCREENSHOT_PEAK_FLOOR)
+    if grid is None:
+        return None
+
+    row_lines, col_lines = grid
+    row_spacing = (row_lines[-1] - row_lines[0]) / 8
+    col_spacing = (col_lines[-1] - col_lines[0]) / 8
+    if abs(row_spacing - col_spacing) > SCREENSHOT_MAX_SPACING_DEV:
+        return None
+    if not (_is_periodic(row_lines, row_spacing) and _is_periodic(col_lines, col_spacing)):
+        return None
+
+    if _board_mode():
+        squares = _make_squares(board=_cut_board(image, row_lines, col_lines))
+    else:
+        squares = _make_squares(_cut_square_batch(image, row_lines, col_lines))
+    if checkerboard_score(squares.brightness) < CHECKERBOARD_MIN_RATIO:
+        return None
+
+    # Шум заливки: центральная часть клеток, без краёв и линий сетки
+    if squares.board is not None:
+        c = squares.board.shape[0] // 8
+        gray = cv2.cvtColor(squares.board, cv2.COLOR_BGR2GRAY)
+        gray = gray.reshape(8, c, 8, c).transpose(0, 2, 1, 3).reshape(64, c, c)
+    else:
+        gray = cv2.cvtColor(
+            squares.batch.reshape(-1, SQUARE_SIZE, 3), cv2.COLOR_BGR2GRAY
+        ).reshape(64, SQUARE_SIZE, SQUARE_SIZE)
+    margin = gray.shape[1] // 6
+    noise = gray[:, margin:-margin, margin:-margin].reshape(64, -1).std(axis=1)
+    if np.percentile(noise, 25) > SCREENSHOT_MAX_NOISE:
+        return None
+
+    squares.path = "screenshot"
+    return squares
+
+
+def _squares_from_cache(image, geometry):
+    """
+    Вырезает клетки по геометрии из кэша и проверяет, что она подходит.
+
+    Проверка дешёвая: шахматный паттерн должен сохраниться почти
+    так же хорошо, как на снимке, по которому геометрия найдена.
+
+    Returns:
+        BoardSquares или None, если геометрия не подошла
+    """
+    if geometry.image_shape != image.shape:
+        return None
+
+    squares = _extract_squares(image, geometry.M, geometry.row_lines, geometry.col_lines)
+    ratio = checkerboard_score(squares.brightness)
+    if ratio < max(CHECKERBOARD_MIN_RATIO, geometry.ratio - CACHE_RATIO_MARGIN):
+        return None
+    return squares
+
+
+def process_board_image(image_bytes: bytes, cache_key=None) -> dict:
+    """
+    Обрабатывает изображение шахматной доски и возвращает 64 клетки.
+
+    Args:
+        image_bytes: Содержимое файла
+        cache_key: Ключ кэша геометрии (например, ID партии). Если задан,
+                   сначала пробуется геометрия прошлого снимка с этим
+                   ключом, и полный поиск выполняется, только если она
+                   не подошла.
+
+    Скриншоты (доска выровнена по осям, сетка строго периодична)
+    нарезаются напрямую, без поиска контура и выравнивания.
+
+    При RECOGNITION_MODE=board батч клеток не строится: доска
+    выравнивается одним преобразованием со стороной 8 * BOARD_CELL_SIZE.
+
+    Returns:
+        BoardSquares: {"a8": np.array, ..., "h1": np.array},
+                      клетки размером SQUARE_SIZE x SQUARE_SIZE
+                      (в режиме board — BOARD_CELL_SIZE, атрибут board).
+                      Атрибут path — каким путём найдена доска.
+
+    Raises:
+        ImageQualityError: Если изображение не прошло предварительную
+                           проверку качества (атрибут code — причина)
+        ValueError: Если не удалось найти/распознать доску
+    """
+    image = decode_image(image_bytes)
+    if image is None:
+        raise ValueError("Не удалось декодировать изображение")
+
+    check_image_quality(image)
+
+    squares = _detect_screenshot(image)
+    if squares is not None:
+        logger.warning("process_board_image: path=screenshot")
+        return squares
+
+    if cache_key is None:
+        squares, _ = _detect_board(image)
+        squares.path = "detected"
+        logger.warning("process_board_image: path=detected")
+        return squares
+
+    cached = board_geometry_cache.get(cache_key)
+    if cached is not None:
+        squares = _squares_from_cache(image, cached)
+        if squares is not None:
+            board_geometry_cache.confirm(cache_key)
+            squares.path = "cached"
+            logger.warning("process_board_image: path=cached, key=%s", cache_key)
+            return squares
+        board_geometry_cache.reject(cache_key)
+
+    squares, geometry = _detect_board(image, cached.threshold if cached is not None else None)
+    board_geometry_cache.put(cache_key, geometry)
+    squares.path = "detected"
+    logger.warning("process_board_image: path=detected, key=%s", cache_key)
     return squares
 
 
@@ -1,12 +1,39 @@
 """
 ML-модуль для классификации шахматных фигур.
+
+Тонкий фасад: подмодули загружаются при первом обращении к их
+функциям. TensorFlow (и другие среды выполнения модели) импортируется
+только при загрузке модели, а не при импорте services.ml.
 """
 
-from .classifier import CLASS_NAMES, predict_square, predict_all_squares, preprocess_square
+import importlib
+
+# Публичные имена: {имя: подмодуль}
+_LAZY_IMPORTS = {
+    "CLASS_NAMES": ".classifier",
+    "SquarePredictions": ".classifier",
+    "predict_batch": ".classifier",
+    "predict_square": ".classifier",
+    "predict_all_squares": ".classifier",
+    "preprocess_square": ".classifier",
+    "warmup": ".classifier",
+    "model_status": ".classifier",
+    "cascade_stats": ".cascade",
+    "template_index": ".templates",
+    "model_registry": ".registry",
+    "micro_batcher": ".batcher",
+}
+
+__all__ = list(_LAZY_IMPORTS)
+
+
+def __getattr__(name):
+    if name not in _LAZY_IMPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(_LAZY_IMPORTS[name], __name__), name)
+    globals()[name] = value
+    return value
+
 
-__all__ = [
-    "CLASS_NAMES",
-    "predict_square",
-    "predict_all_squares",
-    "preprocess_square",
-]
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
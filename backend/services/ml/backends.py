@@ -0,0 +1,324 @@
+"""
+Бэкенды инференса классификатора клеток.
+
+Один интерфейс для разных сред выполнения одной и той же модели:
+Keras (TensorFlow), TFLite (LiteRT, float и INT8), ONNX Runtime и
+OpenCV DNN, а для простых свёрточных сетей — чистый NumPy. Бэкенд
+daemon передаёт клетки модели в отдельном процессе (services.ml.daemon).
+Вход всех бэкендов — uint8-батч (N, 180, 180, 3), выход —
+вероятности классов (N, 13). Модели для TFLite и ONNX получаются
+из model.keras конвертером services.ml.export, INT8-модель —
+services.ml.quantize.
+
+Тяжёлые зависимости импортируются только при создании бэкенда,
+поэтому, например, ONNX Runtime в продакшене не тянет TensorFlow.
+"""
+
+import threading
+
+import numpy as np
+
+# Размеры батча, до которых дополняется вход модели. Бэкенд
+# прогревается на каждом из них (до своего предела батча), поэтому
+# любой запрос попадает на уже подготовленную форму. 128 и 256 —
+# несколько досок, объединённых services/ml/batcher.py
+BATCH_BUCKETS = (1, 8, 16, 32, 64, 128, 256)
+
+# Предел батча по умолчанию: одна доска. Батчи больше режутся
+# на части; объединённые батчи передают в predict свой предел
+CHUNK_LIMIT = 64
+
+# Форма одной клетки на входе модели
+INPUT_SHAPE = (180, 180, 3)
+
+
+def _bucket_size(n: int) -> int:
+    """Наименьший размер из BATCH_BUCKETS, вмещающий n изображений."""
+    for size in BATCH_BUCKETS:
+        if n <= size:
+            return size
+    return BATCH_BUCKETS[-1]
+
+
+class InferenceBackend:
+    """
+    Базовый бэкенд: дополнение батча до BATCH_BUCKETS и разбиение
+    больших батчей. Наследники реализуют _run для одного куска.
+
+    Атрибуты класса:
+        name: Имя бэкенда в настройке INFERENCE_BACKEND
+        suffix: Расширение файла модели
+        pad: Дополнять ли батч до BATCH_BUCKETS
+    """
+
+    name = None
+    suffix = None
+    pad = True
+
+    def __init__(self, path):
+        self.path = str(path)
+
+    def _run(self, batch: np.ndarray) -> np.ndarray:
+        raise NotImplementedError
+
+    def predict(self, batch: np.ndarray, limit: int = CHUNK_LIMIT) -> np.ndarray:
+        """
+        Вероятности классов для батча клеток.
+
+        Args:
+            batch: Массив (N, 180, 180, 3), uint8
+            limit: Наибольший кусок, который подаётся в модель за раз
+                   (не больше последнего из BATCH_BUCKETS)
+
+        Returns:
+            np.ndarray: Массив (N, 13), float32
+        """
+        batch = np.asarray(batch, dtype=np.uint8)
+        limit = min(limit, BATCH_BUCKETS[-1])
+        outputs = []
+        for start in range(0, len(batch), limit):
+            chunk = batch[start:start + limit]
+            count = len(chunk)
+            size = _bucket_size(count) if self.pad else count
+            if size != count:
+                padded = np.zeros((size,) + chunk.shape[1:], dtype=np.uint8)
+                padded[:count] = chunk
+                chunk = padded
+            outputs.append(np.asarray(self._run(chunk), dtype=np.float32)[:count])
+
+        if not outputs:
+            return np.empty((0, 0), dtype=np.float32)
+        return np.concatenate(outputs)
+
+    def warmup(self, limit: int = CHUNK_LIMIT):
+        """Прогоняет модель на каждом размере из BATCH_BUCKETS, который даёт predict с пределом limit."""
+        for size in BATCH_BUCKETS:
+            if size <= _bucket_size(limit):
+                self.predict(np.zeros((size,) + INPUT_SHAPE, dtype=np.uint8), limit)
+
+
+class KerasBackend(InferenceBackend):
+    """
+    Исходная модель Keras в tf.function с фиксированной сигнатурой.
+
+    Приведение к float32 происходит внутри графа. В отличие от
+    model.predict, вызов не создаёт адаптер данных и цикл колбэков,
+    а граф трассируется один раз.
+    """
+
+    name = "keras"
+    suffix = ".keras"
+
+    def __init__(self, path):
+        super().__init__(path)
+        import tensorflow as tf
+        from tensorflow import keras
+
+        model = keras.models.load_model(self.path)
+
+        @tf.function(input_signature=[tf.TensorSpec((None,) + INPUT_SHAPE, tf.uint8)])
+        def infer(batch):
+            return model(tf.cast(batch, tf.float32), training=False)
+
+        self.model = model
+        self._infer = infer
+
+    def _run(self, batch):
+        return self._infer(batch).numpy()
+
+
+class TFLiteBackend(InferenceBackend):
+    """
+    Модель TFLite в интерпретаторе LiteRT (ai_edge_litert), а если
+    он не установлен — в tf.lite.Interpreter.
+
+    Интерпретатор не потокобезопасен и держит тензоры под одну форму,
+    поэтому на каждый размер батча заводится свой интерпретатор,
+    а вызовы сериализуются.
+    """
+
+    name = "tflite"
+    suffix = ".tflite"
+
+    def __init__(self, path):
+        super().__init__(path)
+        try:
+            from ai_edge_litert.interpreter import Interpreter
+        except ImportError:
+            from tensorflow.lite import Interpreter
+
+        self._interpreter_cls = Interpreter
+        self._interpreters = {}
+        self._lock = threading.Lock()
+
+    def _interpreter(self, size):
+        interpreter = self._interpreters.get(size)
+        if interpreter is None:
+            interpreter = self._interpreter_cls(model_path=self.path)
+            index = interpreter.get_input_details()[0]["index"]
+            interpreter.resize_tensor_input(index, (size,) + INPUT_SHAPE)
+            interpreter.allocate_tensors()
+            self._interpreters[size] = interpreter
+        return interpreter
+
+    def _run(self, batch):
+        with self._lock:
+            interpreter = self._interpreter(len(batch))
+            interpreter.set_tensor(interpreter.get_input_details()[0]["index"], batch)
+            interpreter.invoke()
+            return interpreter.get_tensor(interpreter.get_output_details()[0]["index"]).copy()
+
+
+class TFLiteInt8Backend(TFLiteBackend):
+    """
+    INT8-модель TFLite (services.ml.quantize). Вход и выход те же,
+    что у float-модели: uint8-клетки и float32-вероятности.
+    """
+
+    name = "tflite_int8"
+    suffix = ".int8.tflite"
+
+
+class OnnxRuntimeBackend(InferenceBackend):
+    """Модель ONNX в ONNX Runtime (CPUExecutionProvider)."""
+
+    name = "onnx"
+    suffix = ".onnx"
+
+    def __init__(self, path):
+        super().__init__(path)
+        import onnxruntime
+
+        self.session = onnxruntime.InferenceSession(self.path, providers=["CPUExecutionProvider"])
+        self._input_name = self.session.get_inputs()[0].name
+
+    def _run(self, batch):
+        return self.session.run(None, {self._input_name: batch})[0]
+
+
+class NumpyBackend(InferenceBackend):
+    """
+    Простая свёрточная модель (model_1) на NumPy, без TensorFlow
+    и других сред выполнения (services.ml.numpy_engine).
+
+    Батч не дополняется: NumPy не готовит ядра под форму,
+    и лишние клетки были бы чистой потерей времени.
+    """
+
+    name = "numpy"
+    suffix = ".npz"
+    pad = False
+
+    def __init__(self, path):
+        super().__init__(path)
+        from .numpy_engine import NumpyModel
+
+        self.model = NumpyModel.load(self.path)
+
+    def _run(self, batch):
+        return self.model.predict(batch)
+
+    def warmup(self, limit: int = CHUNK_LIMIT):
+        self.predict(np.zeros((1,) + INPUT_SHAPE, dtype=np.uint8))
+
+
+class MappedNumpyBackend(NumpyBackend):
+    """
+    NumPy-движок с весами из плоского файла .weights, отображённого
+    в память только для чтения (services.ml.weights).
+
+    Воркеры на одном хосте делят одну физическую копию весов через
+    страничный кэш, а не держат каждый свою.
+    """
+
+    name = "numpy_mmap"
+    suffix = ".weights"
+
+
+class OpenCVBackend(InferenceBackend):
+    """
+    Модель ONNX в модуле OpenCV DNN.
+
+    Импортёр OpenCV фиксирует размер батча в Reshape перед Dense
+    по первому прогону, и на батчах больше 1 результат неверен.
+    Поэтому клетки подаются по одной (pad = False), а вызовы
+    сериализуются — cv2.dnn.Net не потокобезопасен.
+    """
+
+    name = "opencv"
+    suffix = ".onnx"
+    pad = False
+
+    def __init__(self, path):
+        super().__init__(path)
+        import cv2
+
+        self.net = cv2.dnn.readNetFromONNX(self.path)
+        self._lock = threading.Lock()
+
+    def _run(self, batch):
+        outputs = []
+        with self._lock:
+            for image in batch:
+                self.net.setInput(image[None])
+                outputs.append(self.net.forward()[0])
+        return np.stack(outputs)
+
+    def warmup(self, limit: int = CHUNK_LIMIT):
+        self.predict(np.zeros((1,) + INPUT_SHAPE, dtype=np.uint8))
+
+
+class DaemonBackend(InferenceBackend):
+    """
+    Модель в процессе-демоне (services.ml.daemon): батч передаётся
+    через разделяемую память, по Unix-сокету — только описание.
+
+    Модель и её бэкенд выбирает демон (INFERENCE_DAEMON_BACKEND),
+    path не используется. Батч дополняет до BATCH_BUCKETS бэкенд демона,
+    он же объединяет батчи разных воркеров.
+    """
+
+    name = "daemon"
+    suffix = ".keras"
+    pad = False
+
+    def __init__(self, path):
+        super().__init__(path)
+        from config import settings
+        from .daemon import DaemonClient
+
+        self.client = DaemonClient(settings.INFERENCE_DAEMON_SOCKET, settings.INFERENCE_DAEMON_TIMEOUT)
+
+    def _run(self, batch):
+        return self.client.predict(batch)
+
+    def warmup(self, limit: int = CHUNK_LIMIT):
+        self.predict(np.zeros((1,) + INPUT_SHAPE, dtype=np.uint8))
+
+
+BACKENDS = {
+    backend.name: backend
+    for backend in (
+        KerasBackend, TFLiteBackend, TFLiteInt8Backend, OnnxRuntimeBackend, OpenCVBackend, NumpyBackend,
+        MappedNumpyBackend, DaemonBackend,
+    )
+}
+
+
+def create_backend(name: str, path) -> InferenceBackend:
+    """
+    Создаёт бэкенд по имени.
+
+    Args:
+        name: keras, tflite, tflite_int8, onnx, opencv, numpy, numpy_mmap или daemon
+        path: Путь к файлу модели в формате бэкенда
+
+    Raises:
+        ValueError: Если бэкенд с таким именем не существует
+    """
+    if name not in BACKENDS:
+        raise ValueError(
+            f"Неизвестный бэкенд инференса: {name}. "
+            f"Доступны: {', '.join(BACKENDS)}"
+        )
+    return BACKENDS[name](path)
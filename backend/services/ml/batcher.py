@@ -0,0 +1,185 @@
+"""
+Динамическое объединение батчей (micro-batching) классификатора.
+
+Когда несколько досок распознаются одновременно (RECOGNITION_WORKERS > 1),
+каждый поток без объединения гонит через модель свой батч из 64 клеток,
+а частичные батчи — клетки после каскада, индекса шаблонов или виды
+TTA — дополняются нулями до BATCH_BUCKETS.
+
+MicroBatcher собирает клетки от одновременных вызовов predict_batch
+в один батч до max_size клеток (несколько досок), ожидая не дольше
+max_wait_ms после первого запроса, делает один проход модели на
+объединённом батче (размеры 128 и 256 из BATCH_BUCKETS) и раздаёт
+каждому вызывающему его строки результата.
+
+Включается настройкой MICROBATCH_MAX_WAIT_MS > 0 и имеет смысл при
+RECOGNITION_WORKERS > 1 или в демоне инференса (services/ml/daemon.py),
+см. config.py.
+"""
+
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+
+import numpy as np
+
+from config import settings
+
+# По скольким последним батчам и запросам считаются метрики
+STATS_WINDOW = 1000
+
+
+class BatcherStats:
+    """
+    Метрики объединения: заполнение батчей и ожидание в очереди.
+    Потокобезопасны.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.clear()
+
+    def clear(self):
+        with self._lock:
+            self.batches = 0
+            self.requests = 0
+            self.squares = 0
+            self._fill = deque(maxlen=STATS_WINDOW)
+            self._requests_per_batch = deque(maxlen=STATS_WINDOW)
+            self._wait_ms = deque(maxlen=STATS_WINDOW)
+
+    def record(self, squares, max_size, waits_ms):
+        with self._lock:
+            self.batches += 1
+            self.requests += len(waits_ms)
+            self.squares += squares
+            self._fill.append(squares / max_size)
+            self._requests_per_batch.append(len(waits_ms))
+            self._wait_ms.extend(waits_ms)
+
+    def snapshot(self) -> dict:
+        """Счётчики, среднее заполнение батча и ожидание в очереди (медиана, p95)."""
+        with self._lock:
+            waits = np.array(self._wait_ms) if self._wait_ms else None
+            return {
+                "batches": self.batches,
+                "requests": self.requests,
+                "squares": self.squares,
+                "mean_fill": float(np.mean(self._fill)) if self._fill else 0.0,
+                "mean_requests_per_batch": float(np.mean(self._requests_per_batch)) if self._requests_per_batch else 0.0,
+                "wait_ms_p50": float(np.percentile(waits, 50)) if waits is not None else None,
+                "wait_ms_p95": float(np.percentile(waits, 95)) if waits is not None else None,
+            }
+
+
+class _Request:
+    __slots__ = ("batch", "future", "enqueued")
+
+    def __init__(self, batch):
+        self.batch = batch
+        self.future = Future()
+        self.enqueued = time.perf_counter()
+
+
+class MicroBatcher:
+    """
+    Планировщик: очередь запросов и поток, который собирает их
+    в батчи и прогоняет через predict.
+
+    Args:
+        predict: Функция uint8-батч (N, ...) -> вероятности (N, C)
+        max_size: Наибольший размер объединённого батча (клеток)
+        max_wait_ms: Сколько ждать других запросов после первого
+    """
+
+    def __init__(self, predict, max_size: int, max_wait_ms: float):
+        self.predict_fn = predict
+        self.max_size = max_size
+        self.max_wait = max_wait_ms / 1000
+        self.stats = BatcherStats()
+        self._queue = queue.Queue()
+        self._thread = None
+        self._start_lock = threading.Lock()
+
+    def _ensure_started(self):
+        if self._thread is None:
+            with self._start_lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._loop, name="microbatch", daemon=True)
+                    self._thread.start()
+
+    def predict(self, batch: np.ndarray) -> np.ndarray:
+        """
+        Вероятности для батча клеток; ждёт, пока его объединённый батч
+        пройдёт через модель. Батч не меньше max_size проходит один.
+        """
+        self._ensure_started()
+        request = _Request(batch)
+        self._queue.put(request)
+        return request.future.result()
+
+    def close(self):
+        """Останавливает поток планировщика (запросы в очереди дорабатываются)."""
+        if self._thread is not None:
+            self._queue.put(None)
+            self._thread.join()
+            self._thread = None
+
+    def _collect(self, first):
+        """Запросы для одного батча, начиная с first; возвращает (запросы, перенос, стоп)."""
+        requests = [first]
+        size = len(first.batch)
+        deadline = first.enqueued + self.max_wait
+        while size < self.max_size:
+            timeout = deadline - time.perf_counter()
+            try:
+                request = self._queue.get(timeout=timeout) if timeout > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if request is None:
+                return requests, None, True
+            if size + len(request.batch) > self.max_size:
+                return requests, request, False
+            requests.append(request)
+            size += len(request.batch)
+        return requests, None, False
+
+    def _loop(self):
+        carry = None
+        stop = False
+        while not stop or carry is not None:
+            first = carry if carry is not None else self._queue.get()
+            if first is None:
+                break
+            requests, carry, stop = self._collect(first)
+            self._run(requests)
+            # Не держим батчи до следующего запроса: они могут быть
+            # представлениями разделяемой памяти (services/ml/daemon.py)
+            del first, requests
+
+    def _run(self, requests):
+        start = time.perf_counter()
+        try:
+            batch = np.concatenate([r.batch for r in requests]) if len(requests) > 1 else requests[0].batch
+            probabilities = self.predict_fn(batch)
+        except Exception as e:
+            for request in requests:
+                request.future.set_exception(e)
+            return
+
+        offset = 0
+        for request in requests:
+            request.future.set_result(probabilities[offset:offset + len(request.batch)])
+            offset += len(request.batch)
+        self.stats.record(len(batch), self.max_size, [(start - r.enqueued) * 1000 for r in requests])
+
+
+def _predict_with_model(batch):
+    from .classifier import load_model
+    # Объединённый батч проходит через модель целиком, а не кусками по доске
+    return load_model().predict(batch, limit=settings.MICROBATCH_MAX_SIZE)
+
+
+micro_batcher = MicroBatcher(_predict_with_model, settings.MICROBATCH_MAX_SIZE, settings.MICROBATCH_MAX_WAIT_MS)
@@ -0,0 +1,256 @@
+"""
+Распознавание всей доски одной полносвёрточной сетью.
+
+Вместо 64 клеток 180x180 (~6.2 млн входных пикселей) сеть получает
+выровненную доску 8x8 клеток по CELL_SIZE пикселей (512x512 —
+~0.26 млн пикселей) и за один проход выдаёт сетку 8x8x13 логитов.
+Каждая ступень сети — свёртка 3x3 и пулинг 2x2, так что после
+log2(CELL_SIZE) ступеней одна клетка доски соответствует одной
+позиции выхода.
+
+Обучение использует датасет клеток из ноутбука (model/data): доски
+собираются из случайных клеток, метки — классы этих клеток.
+
+Режим включается настройкой RECOGNITION_MODE=board, модель ищется
+в BOARD_MODEL_PATH. В этом режиме process_board_image не строит
+батч клеток: доска выравнивается одним преобразованием сразу
+со стороной 8 * CELL_SIZE (BoardSquares.board). Обучение (из backend/):
+    python -m services.ml.board_model [--data DIR] [--epochs N]
+"""
+
+import argparse
+import logging
+import math
+import os
+import threading
+
+import cv2
+import numpy as np
+
+from ..board_service import BOARD_CELL_SIZE
+from .classifier import CLASS_NAMES, SquarePredictions
+
+logger = logging.getLogger(__name__)
+
+# Размер клетки на входе сети (степень двойки); в таком размере
+# process_board_image выравнивает доску
+CELL_SIZE = BOARD_CELL_SIZE
+
+# Путь к обученной модели доски
+BOARD_MODEL_PATH = os.path.join(os.path.dirname(__file__), "board_model.keras")
+
+# Число фильтров на ступенях сети (ступеней — log2(CELL_SIZE))
+STAGE_FILTERS = (16, 32, 64, 128, 128, 128)
+
+# Глобальная переменная для загруженной модели доски и её
+# скомпилированной функции; None — ещё не загружена
+model = None
+_infer = None
+_model_lock = threading.Lock()
+
+
+def build_board_model(cell_size=CELL_SIZE):
+    """
+    Полносвёрточная сеть: доска (8*cell_size)^2 -> логиты (8, 8, 13).
+
+    Args:
+        cell_size: Размер клетки в пикселях, степень двойки
+    """
+    from tensorflow import keras
+    from tensorflow.keras import layers
+
+    stages = int(math.log2(cell_size))
+    if 2 ** stages != cell_size or stages > len(STAGE_FILTERS):
+        raise ValueError(f"Размер клетки должен быть степенью двойки до {2 ** len(STAGE_FILTERS)}")
+
+    inputs = keras.Input(shape=(8 * cell_size, 8 * cell_size, 3))
+    x = layers.Rescaling(1. / 255)(inputs)
+    for filters in STAGE_FILTERS[:stages]:
+        x = layers.Conv2D(filters, 3, padding="same", activation="relu")(x)
+        x = layers.MaxPooling2D(pool_size=2)(x)
+    # Контекст соседних клеток и классификатор 1x1 по каждой клетке
+    x = layers.Conv2D(STAGE_FILTERS[stages - 1], 3, padding="same", activation="relu")(x)
+    outputs = layers.Conv2D(len(CLASS_NAMES), 1)(x)
+    return keras.Model(inputs=inputs, outputs=outputs)
+
+
+def board_from_squares(squares, cell_size=CELL_SIZE):
+    """
+    Собирает выровненную доску из 64 клеток (обучение и клетки
+    без готовой доски).
+
+    Клетки уменьшаются до cell_size (INTER_AREA) и укладываются
+    по сетке, строка 0 — восьмая горизонталь, как в SQUARE_NAMES.
+
+    Args:
+        squares: BoardSquares (берётся батч) или словарь
+                 {"a8": изображение, ..., "h1": изображение}
+
+    Returns:
+        np.ndarray: Доска (8*cell_size, 8*cell_size, 3), uint8
+    """
+    batch = getattr(squares, "batch", None)
+    if batch is None:
+        batch = [squares[name] for name in squares]
+
+    board = np.empty((8 * cell_size, 8 * cell_size, 3), dtype=np.uint8)
+    for i, square in enumerate(batch):
+        row, col = divmod(i, 8)
+        cv2.resize(
+            square, (cell_size, cell_size),
+            dst=board[row * cell_size:(row + 1) * cell_size, col * cell_size:(col + 1) * cell_size],
+            interpolation=cv2.INTER_AREA,
+        )
+    return board
+
+
+def tile_boards(images, labels, count, cell_size=CELL_SIZE, seed=0):
+    """
+    Синтетические доски для обучения из датасета клеток.
+
+    Args:
+        images: uint8 (N, H, W, 3) — клетки
+        labels: int (N,) — их классы
+        count: Сколько досок собрать
+
+    Returns:
+        (boards, grids): uint8 (count, 8*cell, 8*cell, 3) и int (count, 8, 8)
+    """
+    rng = np.random.default_rng(seed)
+    side = 8 * cell_size
+    boards = np.empty((count, side, side, 3), dtype=np.uint8)
+    grids = np.empty((count, 8, 8), dtype=np.int64)
+    for b in range(count):
+        picks = rng.integers(0, len(images), 64)
+        grids[b] = labels[picks].reshape(8, 8)
+        boards[b] = board_from_squares({i: images[p] for i, p in enumerate(picks)}, cell_size)
+    return boards, grids
+
+
+def train_board_model(data_dir, epochs=20, boards_per_epoch=512, cell_size=CELL_SIZE, out_path=BOARD_MODEL_PATH):
+    """
+    Обучает модель доски на досках, собранных из train/ и val/.
+
+    Оптимизатор и колбэки — как в fit_model из ноутбука. Лучшая
+    по val_loss модель сохраняется в out_path.
+
+    Returns:
+        keras.callbacks.History
+    """
+    from tensorflow import keras
+
+    from .quantize import load_split
+
+    train_images, train_labels = load_split(os.path.join(data_dir, "train"))
+    val_images, val_labels = load_split(os.path.join(data_dir, "val"))
+    train = tile_boards(train_images, train_labels, boards_per_epoch, cell_size, seed=0)
+    val = tile_boards(val_images, val_labels, max(1, boards_per_epoch // 4), cell_size, seed=1)
+
+    model = build_board_model(cell_size)
+    model.compile(
+        optimizer=keras.optimizers.Adam(learning_rate=0.001),
+        loss=keras.losses.SparseCategoricalCrossentropy(from_logits=True),
+        metrics=["accuracy"],
+    )
+    callbacks = [
+        keras.callbacks.ModelCheckpoint(filepath=str(out_path), save_best_only=True, monitor="val_loss"),
+        keras.callbacks.EarlyStopping(monitor="val_loss", patience=10, restore_best_weights=True),
+        keras.callbacks.ReduceLROnPlateau(monitor="val_loss", factor=0.5, patience=5, min_lr=1e-7),
+    ]
+    return model.fit(*train, batch_size=8, epochs=epochs, validation_data=val, callbacks=callbacks)
+
+
+def load_board_model():
+    """
+    Загружает модель доски из BOARD_MODEL_PATH (потокобезопасно, один раз).
+
+    Returns:
+        keras.Model: Загруженная модель
+    """
+    global model, _infer
+
+    if model is None:
+        with _model_lock:
+            if model is None:
+                import tensorflow as tf
+                from tensorflow import keras
+
+                loaded = keras.models.load_model(BOARD_MODEL_PATH)
+
+                @tf.function(input_signature=[tf.TensorSpec((None,) + loaded.input_shape[1:], tf.uint8)])
+                def infer(boards):
+                    return loaded(tf.cast(boards, tf.float32), training=False)
+
+                _infer = infer
+                model = loaded
+
+    return model
+
+
+def predict_board_logits(boards):
+    """
+    Логиты для батча досок.
+
+    Args:
+        boards: uint8 (N, 8*cell, 8*cell, 3)
+
+    Returns:
+        np.ndarray: (N, 8, 8, 13)
+    """
+    load_board_model()
+    return _infer(np.asarray(boards, dtype=np.uint8)).numpy()
+
+
+def predict_board(squares) -> SquarePredictions:
+    """
+    Предсказывает фигуры на всех 64 клетках одним проходом модели доски.
+
+    Выровненная доска из BoardSquares.board подаётся в модель как
+    есть; доска собирается из клеток, только если её нет.
+
+    Args:
+        squares: BoardSquares или словарь {название_клетки: изображение}
+                 в порядке SQUARE_NAMES
+
+    Returns:
+        SquarePredictions: Как у predict_all_squares (вероятности — softmax логитов)
+    """
+    side = load_board_model().input_shape[1]
+    board = getattr(squares, "board", None)
+    if board is None:
+        board = board_from_squares(squares, side // 8)
+    elif board.shape[0] != side:
+        # Модель обучена с другим размером клетки (--cell-size)
+        board = cv2.resize(board, (side, side), interpolation=cv2.INTER_AREA)
+    # Доска приходит из OpenCV в BGR, а модель обучена на RGB (load_split)
+    board = cv2.cvtColor(board, cv2.COLOR_BGR2RGB)
+    logits = predict_board_logits(board[None])[0].reshape(-1, len(CLASS_NAMES))
+    probabilities = np.exp(logits - logits.max(axis=1, keepdims=True))
+    probabilities /= probabilities.sum(axis=1, keepdims=True)
+    return SquarePredictions(squares.keys(), probabilities)
+
+
+def warmup():
+    """Загружает модель доски и прогоняет её один раз."""
+    shape = load_board_model().input_shape[1:]
+    predict_board_logits(np.zeros((1,) + shape, dtype=np.uint8))
+    logger.warning("board model warmup: input=%s", shape)
+
+
+def main():
+    from .quantize import DATA_DIR
+
+    parser = argparse.ArgumentParser(description="Обучение модели доски")
+    parser.add_argument("--data", default=str(DATA_DIR), help="каталог с train/ и val/")
+    parser.add_argument("--epochs", type=int, default=20)
+    parser.add_argument("--boards", type=int, default=512, help="досок в обучающей выборке")
+    parser.add_argument("--cell-size", type=int, default=CELL_SIZE)
+    parser.add_argument("--out", default=BOARD_MODEL_PATH)
+    args = parser.parse_args()
+
+    train_board_model(args.data, args.epochs, args.boards, args.cell_size, args.out)
+    print(f"Модель сохранена: {args.out}")
+
+
+if __name__ == "__main__":
+    main()
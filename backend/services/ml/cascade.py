@@ -0,0 +1,173 @@
+"""
+Каскадная классификация клеток.
+
+Обычно 30–50 из 64 клеток пустые, и гонять каждую через большую
+модель незачем. Каскад из трёх ступеней:
+
+    0. Статистический тест: в центре клетки почти нет разброса
+       яркости и границ — клетка заведомо пустая.
+    1. Маленькая CNN (model_1 из ноутбука) для остальных клеток.
+    2. Большая модель (бэкенд классификатора) — только для клеток,
+       где уверенность маленькой модели ниже CASCADE_CONFIDENCE.
+
+Режим включается настройкой RECOGNITION_MODE=cascade. Число клеток,
+решённых на каждой ступени, доступно через cascade_stats().
+"""
+
+import logging
+import os
+import threading
+
+import cv2
+import numpy as np
+
+from config import settings
+from .backends import BACKENDS, create_backend
+from .classifier import CLASS_NAMES, MODEL_PATH, SquarePredictions, batch_limit, load_model, predict_batch
+
+logger = logging.getLogger(__name__)
+
+# Маленькая модель ступени 1 лежит рядом с основной: model_small.keras
+# (или .onnx/.npz и т. д. — по бэкенду CASCADE_SMALL_BACKEND)
+SMALL_MODEL_NAME = "model_small"
+
+# Ступень 0: центральная часть клетки без краёв и линий сетки
+EMPTY_MARGIN = 1 / 6
+
+# Ступень 0: максимальное стандартное отклонение яркости пустой клетки.
+# На test_img.png у клеток с фигурами оно не ниже ~10, у пустых — до ~7
+# (тени от соседних фигур), так что порог с запасом отсекает только
+# заведомо пустые клетки, а сомнительные уходят на ступень 1
+EMPTY_MAX_STD = 5.0
+
+# Ступень 0: максимальная доля пикселей-границ (Canny) в пустой клетке
+EMPTY_MAX_EDGES = 0.002
+
+_EMPTY_INDEX = CLASS_NAMES.index("empty")
+
+
+class CascadeStats:
+    """
+    Счётчики каскада: сколько досок обработано и сколько клеток
+    решено на каждой ступени. Потокобезопасны.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.clear()
+
+    def clear(self):
+        with self._lock:
+            self.boards = 0
+            self.stages = [0, 0, 0]
+
+    def record(self, stage0, stage1, stage2):
+        with self._lock:
+            self.boards += 1
+            self.stages[0] += stage0
+            self.stages[1] += stage1
+            self.stages[2] += stage2
+
+    def snapshot(self) -> dict:
+        """Счётчики и доля клеток, дошедших до большой модели."""
+        with self._lock:
+            total = sum(self.stages)
+            return {
+                "boards": self.boards,
+                "stage0": self.stages[0],
+                "stage1": self.stages[1],
+                "stage2": self.stages[2],
+                "large_model_ratio": self.stages[2] / total if total else 0.0,
+            }
+
+
+cascade_stats = CascadeStats()
+
+# Бэкенд маленькой модели; None — ещё не загружен
+small_backend = None
+_small_lock = threading.Lock()
+
+
+def small_model_path(name: str) -> str:
+    """Путь к маленькой модели для бэкенда name (рядом с MODEL_PATH)."""
+    return os.path.join(os.path.dirname(MODEL_PATH), SMALL_MODEL_NAME + BACKENDS[name].suffix)
+
+
+def load_small_model():
+    """Загружает маленькую модель ступени 1 (потокобезопасно, один раз)."""
+    global small_backend
+
+    if small_backend is None:
+        with _small_lock:
+            if small_backend is None:
+                name = settings.CASCADE_SMALL_BACKEND
+                small_backend = create_backend(name, small_model_path(name))
+
+    return small_backend
+
+
+def empty_mask(batch: np.ndarray) -> np.ndarray:
+    """
+    Ступень 0: какие клетки заведомо пустые.
+
+    Весь батч переводится в оттенки серого одним вызовом cvtColor,
+    разброс яркости считается одной редукцией, границы — Canny
+    по центральной части каждой клетки.
+
+    Args:
+        batch: uint8 (N, S, S, 3)
+
+    Returns:
+        np.ndarray: bool (N,)
+    """
+    n, size = batch.shape[:2]
+    gray = cv2.cvtColor(batch.reshape(-1, size, 3), cv2.COLOR_BGR2GRAY).reshape(n, size, size)
+    margin = int(size * EMPTY_MARGIN)
+    center = gray[:, margin:size - margin, margin:size - margin]
+
+    mask = center.reshape(n, -1).std(axis=1) <= EMPTY_MAX_STD
+    for i in np.flatnonzero(mask):
+        mask[i] = np.count_nonzero(cv2.Canny(center[i], 50, 150)) <= EMPTY_MAX_EDGES * center[i].size
+    return mask
+
+
+def predict_cascade(squares: dict) -> SquarePredictions:
+    """
+    Предсказывает фигуры на всех 64 клетках каскадом.
+
+    Args:
+        squares: Словарь {название_клетки: изображение} или BoardSquares
+
+    Returns:
+        SquarePredictions: Как у predict_all_squares; пустым клеткам
+            ступени 0 достаётся класс empty с вероятностью 1
+    """
+    names = list(squares.keys())
+    batch = getattr(squares, "batch", None)
+    if batch is None:
+        batch = np.array([cv2.resize(squares[name], (180, 180)) for name in names])
+
+    probabilities = np.zeros((len(names), len(CLASS_NAMES)), dtype=np.float32)
+    probabilities[:, _EMPTY_INDEX] = 1
+
+    # Ступень 0: заведомо пустые клетки
+    rest = np.flatnonzero(~empty_mask(batch))
+
+    # Ступень 1: маленькая модель для остальных
+    unsure = rest[:0]
+    if len(rest):
+        probabilities[rest] = load_small_model().predict(batch[rest])
+        unsure = rest[probabilities[rest].max(axis=1) < settings.CASCADE_CONFIDENCE]
+
+    # Ступень 2: большая модель для неуверенных
+    if len(unsure):
+        probabilities[unsure] = predict_batch(batch[unsure])
+
+    cascade_stats.record(len(names) - len(rest), len(rest) - len(unsure), len(unsure))
+    return SquarePredictions(names, probabilities)
+
+
+def warmup():
+    """Загружает и прогревает обе модели каскада."""
+    load_small_model().warmup()
+    load_model().warmup(batch_limit())
@@ -2,16 +2,26 @@
 Модуль классификации шахматных фигур.
 
 Использует предобученную нейросеть для определения фигуры
-на изображении клетки шахматной доски.
+на изображении клетки шахматной доски. Среда выполнения модели
+выбирается настройкой INFERENCE_BACKEND (см. backends.py).
 """
 
+import logging
 import os
+import threading
+import time
+
 import cv2
 import numpy as np
-from tensorflow import keras
+
+from config import settings
+from .backends import BACKENDS, BATCH_BUCKETS, CHUNK_LIMIT, create_backend
+
+logger = logging.getLogger(__name__)
 
 
-# Путь к файлу модели
+# Путь к файлу модели. Модели для других бэкендов лежат рядом
+# с тем же именем и своим расширением (model.onnx, model.tflite)
 MODEL_PATH = os.path.join(os.path.dirname(__file__), "model.keras")
 
 # Названия классов в алфавитном порядке (так их видит модель)
@@ -20,28 +30,158 @@ MODEL_PATH = os.path.join(os.path.dirname(__file__), "model.keras")
 # P = Pawn (пешка), Q = Queen (ферзь), R = Rook (ладья)
 CLASS_NAMES = ["bB", "bK", "bN", "bP", "bQ", "bR", "empty", "wB", "wK", "wN", "wP", "wQ", "wR"]
 
-# Глобальная переменная для хранения загруженной модели
+# Сколько наиболее вероятных классов отдавать для каждой клетки (top_k)
+TOP_K = 3
+
+# Глобальная переменная для хранения бэкенда инференса с загруженной моделью
 # None означает, что модель ещё не загружена
-model = None
+backend = None
+
+_model_lock = threading.Lock()
+
+# Модель загружена и прогрета на BATCH_BUCKETS до batch_limit()
+_ready = threading.Event()
+
+# Ошибка загрузки/прогрева (для проверки готовности)
+_load_error = None
+
+
+class SquarePredictions(dict):
+    """
+    Предсказания для клеток: словарь {"a8": фигура, ..., "h1": фигура}.
+
+    Атрибут probabilities — матрица (N, len(CLASS_NAMES)) вероятностей
+    в порядке ключей, по ней считаются top_k и confidence. Атрибут
+    refined — клетки, уточнённые аугментациями (см. tta.py).
+    """
+
+    def __init__(self, names, probabilities, refined=()):
+        probabilities = np.asarray(probabilities, dtype=np.float32)
+        super().__init__(zip(names, (CLASS_NAMES[idx] for idx in probabilities.argmax(axis=1))))
+        self.probabilities = probabilities
+        self.refined = list(refined)
+
+    @property
+    def top_k(self) -> dict:
+        """{название_клетки: [(фигура, вероятность), ...]} — TOP_K самых вероятных классов."""
+        order = np.argsort(-self.probabilities, axis=1)[:, :TOP_K]
+        return {
+            name: [(CLASS_NAMES[idx], float(probs[idx])) for idx in row]
+            for name, probs, row in zip(self, self.probabilities, order)
+        }
+
+    @property
+    def confidence(self) -> dict:
+        """{название_клетки: вероятность выбранного класса}."""
+        return dict(zip(self, self.probabilities.max(axis=1).tolist()))
+
+
+def model_path(name: str) -> str:
+    """Путь к файлу модели для бэкенда name (рядом с MODEL_PATH)."""
+    if name not in BACKENDS:
+        return MODEL_PATH
+    return os.path.splitext(MODEL_PATH)[0] + BACKENDS[name].suffix
 
 
 def load_model():
     """
-    Загружает модель Keras из файла.
+    Загружает модель в бэкенд из settings.INFERENCE_BACKEND.
+
+    Потокобезопасно: при одновременных вызовах модель загружается
+    один раз. Обычно вызывается заранее, из warmup() при старте
+    приложения, а не на первом запросе.
+
+    Returns:
+        InferenceBackend: Бэкенд с загруженной моделью
+    """
+    global backend
+
+    if backend is None:
+        with _model_lock:
+            # Повторная проверка: модель мог загрузить другой поток
+            if backend is None:
+                name = settings.INFERENCE_BACKEND
+                backend = create_backend(name, model_path(name))
+
+    return backend
+
+
+def batch_limit() -> int:
+    """
+    Наибольший батч, который подаётся в модель за раз: объединённый
+    (MICROBATCH_MAX_SIZE) при объединении батчей, иначе одна доска.
+    """
+    return settings.MICROBATCH_MAX_SIZE if settings.MICROBATCH_MAX_WAIT_MS > 0 else CHUNK_LIMIT
 
-    Использует паттерн "ленивая загрузка" (lazy loading):
-    модель загружается только при первом вызове.
+
+def predict_batch(batch: np.ndarray) -> np.ndarray:
+    """
+    Вероятности классов для батча клеток.
+
+    Батч дополняется нулями до ближайшего размера из BATCH_BUCKETS,
+    батчи больше доски обрабатываются частями. При
+    MICROBATCH_MAX_WAIT_MS > 0 батч объединяется с батчами
+    одновременных вызовов и проходит через модель вместе с ними
+    (services/ml/batcher.py).
+
+    Args:
+        batch: Массив (N, 180, 180, 3), uint8
 
     Returns:
-        keras.Model: Загруженная модель
+        np.ndarray: Массив (N, len(CLASS_NAMES)) вероятностей
+    """
+    if len(batch) == 0:
+        return np.empty((0, len(CLASS_NAMES)), dtype=np.float32)
+    if settings.MICROBATCH_MAX_WAIT_MS > 0:
+        from .batcher import micro_batcher
+        return micro_batcher.predict(batch)
+    return load_model().predict(batch)
+
+
+def warmup():
     """
-    global model
+    Загружает модель и прогревает бэкенд на BATCH_BUCKETS до batch_limit()
+    (в режиме board — модель доски, в режиме cascade — обе модели каскада).
 
-    # Загружаем только если ещё не загружена
-    if model is None:
-        model = keras.models.load_model(MODEL_PATH)
+    Вызывается при старте приложения, чтобы первый запрос после
+    деплоя не платил за загрузку, трассировку графа и подготовку
+    ядер. Ошибка сохраняется для проверки готовности и пробрасывается.
+    """
+    global _load_error
+
+    try:
+        if settings.RECOGNITION_MODE == "board":
+            from .board_model import warmup as warmup_board
+            warmup_board()
+        elif settings.RECOGNITION_MODE == "cascade":
+            from .cascade import warmup as warmup_cascade
+            warmup_cascade()
+        else:
+            load_model().warmup(batch_limit())
+    except Exception as e:
+        _load_error = e
+        raise
+
+    _load_error = None
+    _ready.set()
+    if backend is not None:
+        buckets = [size for size in BATCH_BUCKETS if size <= batch_limit()]
+        logger.warning("classifier warmup: backend=%s, buckets=%s", backend.name, buckets)
+
+
+def model_status() -> str:
+    """
+    Состояние модели для проверки готовности.
 
-    return model
+    Returns:
+        str: "ready" — загружена и прогрета, "error" — загрузка
+             не удалась, "loading" — ещё загружается
+    """
+    if _ready.is_set():
+        return "ready"
+    if _load_error is not None:
+        return "error"
+    return "loading"
 
 
 def preprocess_square(image: np.ndarray) -> np.ndarray:
@@ -82,16 +222,12 @@ def predict_square(image: np.ndarray) -> tuple[str, float]:
         tuple: (название_класса, уверенность)
                Например: ("wK", 0.95) - белый король с уверенностью 95%
     """
-    # Получаем модель (загружаем при первом вызове)
-    model = load_model()
-
     # Подготавливаем изображение
     preprocessed = preprocess_square(image)
 
     # Получаем предсказания модели
-    # verbose=0 отключает вывод прогресса в консоль
     # predictions - массив вероятностей для каждого класса
-    predictions = model.predict(preprocessed, verbose=0)
+    predictions = predict_batch(preprocessed)
 
     # Находим индекс класса с максимальной вероятностью
     class_idx = np.argmax(predictions[0])
@@ -105,39 +241,69 @@ def predict_square(image: np.ndarray) -> tuple[str, float]:
     return class_name, confidence
 
 
-def predict_all_squares(squares: dict) -> dict:
+def predict_all_squares(squares: dict) -> SquarePredictions:
     """
     Предсказывает фигуры на всех 64 клетках доски.
 
-    Использует batch inference. Подаёт все 64 изображения в модель.
+    Использует batch inference. Подаёт все 64 изображения в модель
+    одним вызовом бэкенда инференса. При RECOGNITION_MODE=board
+    вместо этого вся доска распознаётся одним проходом
+    полносвёрточной модели (см. board_model.py), при
+    RECOGNITION_MODE=cascade — каскадом (см. cascade.py). Клетки
+    скриншотов сначала ищутся в индексе шаблонов (см. templates.py).
+
+    При settings.TTA_CONFIDENCE > 0 клетки, уверенность которых ниже
+    порога, уточняются аугментациями (см. tta.py). Если в реестре
+    назначен кандидат, часть досок проверяется им в фоне (см. registry.py).
 
     Args:
         squares: Словарь {название_клетки: изображение}
                  Например: {"a8": np.array, "b8": np.array, ...}
 
     Returns:
-        dict: Словарь {название_клетки: фигура}
-              Например: {"a8": "bR", "b8": "bN", "c8": "empty", ...}
+        SquarePredictions: Словарь {название_клетки: фигура}
+              Например: {"a8": "bR", "b8": "bN", "c8": "empty", ...},
+              с вероятностями классов (top_k, confidence)
     """
-    model = load_model()
+    if settings.RECOGNITION_MODE == "board":
+        from .board_model import predict_board
+        return predict_board(squares)
+    if settings.RECOGNITION_MODE == "cascade":
+        from .cascade import predict_cascade
+        return predict_cascade(squares)
 
     # Сохраняем порядок клеток для сопоставления с результатами
     square_names = list(squares.keys())
 
     # Собираем все изображения в один batch
     # Форма: (64, 180, 180, 3)
-    batch = np.array([
-        cv2.resize(squares[name], (180, 180))
-        for name in square_names
-    ])
-
-    # Вызов модели для всех 64 клеток
-    predictions = model.predict(batch, verbose=0)
-
-    # Разбираем результаты
-    results = {}
-    for i, square_name in enumerate(square_names):
-        class_idx = np.argmax(predictions[i])
-        results[square_name] = CLASS_NAMES[class_idx]
-
-    return results
+    # Если клетки уже вырезаны готовым батчем (BoardSquares), берём его
+    batch = getattr(squares, "batch", None)
+    if batch is None:
+        batch = np.array([
+            cv2.resize(squares[name], (180, 180))
+            for name in square_names
+        ])
+
+    start = time.perf_counter()
+
+    # Клетки скриншота повторяются от доски к доске: сначала индекс шаблонов
+    if settings.TEMPLATE_INDEX_SIZE > 0 and getattr(squares, "path", None) == "screenshot":
+        from .templates import predict_with_templates
+        probabilities = predict_with_templates(batch)
+    else:
+        # Вызов модели для всех 64 клеток
+        probabilities = predict_batch(batch)
+
+    # Неуверенные клетки — ещё раз, по аугментированным видам
+    refined = []
+    if settings.TTA_CONFIDENCE > 0:
+        from .tta import refine
+        probabilities, unsure = refine(batch, probabilities, settings.TTA_CONFIDENCE)
+        refined = [square_names[i] for i in unsure]
+
+    # Доля досок уходит кандидату из реестра моделей (в фоне, не дожидаясь)
+    from .registry import model_registry
+    model_registry.observe(batch, probabilities, (time.perf_counter() - start) * 1000)
+
+    return SquarePredictions(square_names, probabilities, refined)
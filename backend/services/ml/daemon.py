@@ -0,0 +1,358 @@
+"""
+Демон инференса: модель в отдельном процессе на Unix-сокете.
+
+Без демона каждый воркер uvicorn загружает свою копию модели
+(и TensorFlow), и воркеры конкурируют за одни и те же ядра. Демон
+держит единственную модель, а воркеры с INFERENCE_BACKEND=daemon
+остаются лёгкими и передают ему клетки:
+
+    - клиент пишет uint8-батч (N, 180, 180, 3) в свой сегмент
+      multiprocessing.shared_memory (имя с префиксом SEGMENT_PREFIX)
+      и отправляет по сокету только описание
+      {"op": "predict", "shm": имя, "count": N};
+    - демон читает батч прямо из сегмента, без копирования,
+      и записывает вероятности (N, C) float32 в тот же сегмент
+      сразу за батчем;
+    - по сокету ходят только короткие JSON-сообщения, батч
+      в десятки мегабайт не сериализуется.
+
+Каждое подключение обслуживается своим потоком. При
+MICROBATCH_MAX_WAIT_MS > 0 демон объединяет батчи всех подключений
+(services/ml/batcher.py), то есть всех воркеров, и прогоняет
+объединённый батч через модель одним проходом.
+
+Сокет создаётся с правами 0600: подключиться к демону может только
+пользователь, от имени которого он запущен. Демон открывает только
+сегменты с префиксом SEGMENT_PREFIX.
+
+Сообщения — JSON с префиксом длины (uint32, little-endian).
+
+Запуск:
+    python -m services.ml.daemon [--socket PATH] [--backend keras] [--model PATH]
+"""
+
+import argparse
+import contextlib
+import json
+import logging
+import os
+import secrets
+import socket
+import socketserver
+import stat
+import struct
+import threading
+from multiprocessing import resource_tracker, shared_memory
+
+import numpy as np
+
+from config import settings
+from .backends import CHUNK_LIMIT, INPUT_SHAPE, create_backend
+
+logger = logging.getLogger(__name__)
+
+# Байт на одну клетку во входном батче
+SQUARE_BYTES = int(np.prod(INPUT_SHAPE))
+
+# Размер сегмента клиента по умолчанию (клеток): одна доска
+SEGMENT_SQUARES = CHUNK_LIMIT
+
+# Префикс имён сегментов клиентов; другие сегменты демон не открывает
+SEGMENT_PREFIX = "chess_infer_"
+
+_FRAME = struct.Struct("<I")
+
+
+class InferenceDaemonError(Exception):
+    """Демон недоступен или не смог выполнить запрос."""
+
+
+def _send(sock, message: dict):
+    data = json.dumps(message).encode()
+    sock.sendall(_FRAME.pack(len(data)) + data)
+
+
+def _recv_exact(sock, size):
+    data = bytearray()
+    while len(data) < size:
+        chunk = sock.recv(size - len(data))
+        if not chunk:
+            return None
+        data += chunk
+    return bytes(data)
+
+
+def _recv(sock):
+    """Следующее сообщение или None, если соединение закрыто."""
+    header = _recv_exact(sock, _FRAME.size)
+    if header is None:
+        return None
+    data = _recv_exact(sock, _FRAME.unpack(header)[0])
+    return None if data is None else json.loads(data)
+
+
+def _remove_socket(path):
+    """Удаляет файл сокета path (например, оставшийся от прошлого запуска); файлы других типов не трогает."""
+    with contextlib.suppress(FileNotFoundError):
+        if stat.S_ISSOCK(os.lstat(path).st_mode):
+            os.unlink(path)
+
+
+def _attach(name):
+    """
+    Подключается к сегменту клиента, не передавая его resource_tracker
+    демона: сегментом владеет клиент, и демон не должен удалять его
+    при своём завершении.
+    """
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        # Python < 3.13: отслеживание отключается после подключения
+        shm = shared_memory.SharedMemory(name=name)
+        resource_tracker.unregister(shm._name, "shared_memory")
+        return shm
+
+
+class _Handler(socketserver.BaseRequestHandler):
+    """Подключение одного клиента (потока воркера)."""
+
+    def handle(self):
+        segments = {}
+        try:
+            while True:
+                message = _recv(self.request)
+                if message is None:
+                    break
+                try:
+                    reply = self.server.dispatch(message, segments)
+                except Exception as e:
+                    logger.exception("Запрос к демону инференса не выполнен")
+                    reply = {"error": str(e)}
+                _send(self.request, reply)
+        except OSError:
+            pass
+        finally:
+            for shm in segments.values():
+                # Представление сегмента может ещё жить в кадре исключения;
+                # тогда отображение освободит сборщик мусора
+                with contextlib.suppress(BufferError):
+                    shm.close()
+
+
+class InferenceDaemon(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    """
+    Сервер демона.
+
+    Args:
+        socket_path: Путь к Unix-сокету
+        predict: Функция uint8-батч (N, ...) -> вероятности (N, C)
+        classes: Число классов C на выходе predict
+        info: Сведения о модели для команды info
+    """
+
+    daemon_threads = True
+
+    def __init__(self, socket_path: str, predict, classes: int, info: dict = None):
+        _remove_socket(socket_path)
+        super().__init__(socket_path, _Handler)
+        self.predict = predict
+        self.classes = classes
+        self.info = dict(info or {}, classes=classes, pid=os.getpid())
+
+    def server_bind(self):
+        # Права 0600 задаются маской уже при создании файла сокета,
+        # так что нет момента, когда он доступен другим пользователям
+        umask = os.umask(0o177)
+        try:
+            super().server_bind()
+        finally:
+            os.umask(umask)
+
+    def dispatch(self, message: dict, segments: dict) -> dict:
+        """
+        Выполняет команду клиента.
+
+        Args:
+            message: Сообщение клиента
+            segments: Сегменты, к которым подключено это соединение
+
+        Raises:
+            ValueError: Если команда неизвестна, сегмент чужой или мал для батча
+        """
+        op = message.get("op")
+        if op == "info":
+            return self.info
+        if op != "predict":
+            raise ValueError(f"Неизвестная команда демона: {op}")
+
+        name, count = str(message["shm"]), int(message["count"])
+        if not name.startswith(SEGMENT_PREFIX):
+            raise ValueError(f"Сегмент {name} не принадлежит клиенту демона")
+        shm = segments.get(name)
+        if shm is None:
+            # Клиент сменил сегмент (батч не поместился): старый больше не нужен
+            for old in segments.values():
+                with contextlib.suppress(BufferError):
+                    old.close()
+            segments.clear()
+            shm = segments[name] = _attach(name)
+
+        offset = count * SQUARE_BYTES
+        if count <= 0 or shm.size < offset + count * self.classes * 4:
+            raise ValueError(f"Сегмент {name} не вмещает {count} клеток")
+
+        batch = np.ndarray((count,) + INPUT_SHAPE, dtype=np.uint8, buffer=shm.buf)
+        output = np.ndarray((count, self.classes), dtype=np.float32, buffer=shm.buf, offset=offset)
+        output[:] = self.predict(batch)
+        return {"count": count}
+
+
+class DaemonClient:
+    """
+    Клиент демона. Потокобезопасен: у каждого потока своё
+    соединение и свой сегмент разделяемой памяти.
+
+    Args:
+        socket_path: Путь к Unix-сокету демона
+        timeout: Сколько ждать ответа, с
+
+    Raises:
+        InferenceDaemonError: Если демон недоступен
+    """
+
+    def __init__(self, socket_path: str, timeout: float = None):
+        self.socket_path = socket_path
+        self.timeout = timeout
+        self._local = threading.local()
+        self._segments = []
+        self._lock = threading.Lock()
+        self.info = self._call({"op": "info"})
+        self.classes = self.info["classes"]
+
+    def _connection(self):
+        sock = getattr(self._local, "sock", None)
+        if sock is None:
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            sock.settimeout(self.timeout)
+            try:
+                sock.connect(self.socket_path)
+            except OSError:
+                sock.close()
+                raise
+            self._local.sock = sock
+        return sock
+
+    def _disconnect(self):
+        sock = getattr(self._local, "sock", None)
+        if sock is not None:
+            sock.close()
+            self._local.sock = None
+
+    def _call(self, message: dict) -> dict:
+        try:
+            sock = self._connection()
+            _send(sock, message)
+            reply = _recv(sock)
+        except OSError as e:
+            # После таймаута ответ может прийти позже и перепутаться со следующим
+            self._disconnect()
+            raise InferenceDaemonError(f"Демон инференса недоступен ({self.socket_path}): {e}") from e
+        if reply is None:
+            self._disconnect()
+            raise InferenceDaemonError("Демон инференса закрыл соединение")
+        if "error" in reply:
+            raise InferenceDaemonError(reply["error"])
+        return reply
+
+    def _segment(self, size):
+        """Сегмент потока не меньше size байт."""
+        shm = getattr(self._local, "shm", None)
+        if shm is None or shm.size < size:
+            if shm is not None:
+                self._release(shm)
+            size = max(size, SEGMENT_SQUARES * (SQUARE_BYTES + self.classes * 4))
+            name = f"{SEGMENT_PREFIX}{os.getpid()}_{secrets.token_hex(4)}"
+            shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+            with self._lock:
+                self._segments.append(shm)
+            self._local.shm = shm
+        return shm
+
+    def _release(self, shm):
+        with self._lock:
+            self._segments.remove(shm)
+        shm.close()
+        shm.unlink()
+
+    def predict(self, batch: np.ndarray) -> np.ndarray:
+        """
+        Вероятности классов для батча клеток.
+
+        Args:
+            batch: Массив (N, 180, 180, 3), uint8
+
+        Returns:
+            np.ndarray: Массив (N, C), float32
+        """
+        batch = np.ascontiguousarray(batch, dtype=np.uint8)
+        count = len(batch)
+        offset = count * SQUARE_BYTES
+        shm = self._segment(offset + count * self.classes * 4)
+
+        np.ndarray(batch.shape, dtype=np.uint8, buffer=shm.buf)[:] = batch
+        self._call({"op": "predict", "shm": shm.name, "count": count})
+        return np.ndarray((count, self.classes), dtype=np.float32, buffer=shm.buf, offset=offset).copy()
+
+    def close(self):
+        """Закрывает соединение текущего потока и удаляет сегменты всех потоков."""
+        self._disconnect()
+        with self._lock:
+            segments, self._segments = self._segments, []
+        for shm in segments:
+            shm.close()
+            shm.unlink()
+
+
+def serve(socket_path: str, backend_name: str, path: str):
+    """Загружает и прогревает модель и обслуживает клиентов до остановки процесса."""
+    backend = create_backend(backend_name, path)
+    predict = backend.predict
+    if settings.MICROBATCH_MAX_WAIT_MS > 0:
+        # Батчи воркеров объединяются и проходят через модель целиком
+        from .batcher import MicroBatcher
+        limit = settings.MICROBATCH_MAX_SIZE
+        predict = MicroBatcher(
+            lambda batch: backend.predict(batch, limit=limit), limit, settings.MICROBATCH_MAX_WAIT_MS,
+        ).predict
+        backend.warmup(limit)
+    else:
+        backend.warmup()
+    classes = backend.predict(np.zeros((1,) + INPUT_SHAPE, dtype=np.uint8)).shape[1]
+
+    server = InferenceDaemon(socket_path, predict, classes, {"backend": backend_name, "model": path})
+    logger.warning("inference daemon: %s (%s) on %s", path, backend_name, socket_path)
+    try:
+        server.serve_forever()
+    finally:
+        server.server_close()
+        _remove_socket(socket_path)
+
+
+def main():
+    from .classifier import model_path
+
+    parser = argparse.ArgumentParser(description="Демон инференса классификатора клеток")
+    parser.add_argument("--socket", default=settings.INFERENCE_DAEMON_SOCKET, help="путь к Unix-сокету")
+    parser.add_argument("--backend", default=settings.INFERENCE_DAEMON_BACKEND, help="бэкенд модели в демоне")
+    parser.add_argument("--model", help="путь к модели (по умолчанию рядом с MODEL_PATH)")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    try:
+        serve(args.socket, args.backend, args.model or model_path(args.backend))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
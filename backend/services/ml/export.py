@@ -0,0 +1,152 @@
+"""
+Экспорт model.keras в облегчённые среды выполнения и проверка паритета.
+
+ONNX (для ONNX Runtime и OpenCV DNN) и TFLite экспортируются
+с uint8-входом: приведение к float32 остаётся внутри графа, как
+у KerasBackend, и бэкендам не нужно копировать батч во float.
+
+Запуск (из backend/):
+    python -m services.ml.export [--model PATH] [--formats onnx tflite npz weights]
+"""
+
+import argparse
+import os
+import tempfile
+
+import numpy as np
+
+from .backends import BACKENDS, INPUT_SHAPE, create_backend
+
+# Форматы экспорта по умолчанию. Форматы npz и weights (NumPy-движок,
+# weights — отображаемый в память) подходят только для простых
+# свёрточных сетей вроде model_1 и включаются явно
+EXPORT_FORMATS = ("onnx", "tflite")
+
+# Допустимое расхождение вероятностей с Keras при проверке паритета
+PARITY_TOLERANCE = 1e-4
+
+
+def input_signature():
+    """Сигнатура экспорта: uint8-батч клеток произвольного размера."""
+    import tensorflow as tf
+    return [tf.TensorSpec((None,) + INPUT_SHAPE, tf.uint8)]
+
+
+def export_onnx(model, path):
+    """Экспорт в ONNX (нужны пакеты onnx и tf2onnx)."""
+    model.export(path, format="onnx", input_signature=input_signature(), verbose=False)
+    return path
+
+
+def export_tflite(model, path):
+    """Экспорт в TFLite через SavedModel с uint8-сигнатурой."""
+    import tensorflow as tf
+
+    with tempfile.TemporaryDirectory() as saved_model_dir:
+        model.export(saved_model_dir, format="tf_saved_model", input_signature=input_signature(), verbose=False)
+        data = tf.lite.TFLiteConverter.from_saved_model(saved_model_dir).convert()
+
+    with open(path, "wb") as f:
+        f.write(data)
+    return path
+
+
+def export_numpy(model, path):
+    """Экспорт весов в .npz для NumPy-движка (только простые свёрточные сети)."""
+    from .numpy_engine import export_npz
+    return export_npz(model, path)
+
+
+def export_mapped(model, path):
+    """Экспорт весов в плоский файл .weights для отображения в память (NumPy-движок)."""
+    from .numpy_engine import export_weights
+    return export_weights(model, path)
+
+
+_EXPORTERS = {"onnx": export_onnx, "tflite": export_tflite, "npz": export_numpy, "weights": export_mapped}
+
+
+def export_model(model_path, formats=EXPORT_FORMATS, out_dir=None):
+    """
+    Экспортирует модель Keras в указанные форматы.
+
+    Файлы кладутся рядом с исходной моделью (или в out_dir) с тем же
+    именем и расширением формата — там их ищет classifier.model_path.
+
+    Returns:
+        dict: {формат: путь к файлу}
+    """
+    from tensorflow import keras
+
+    model = keras.models.load_model(model_path)
+    base = os.path.splitext(os.path.basename(model_path))[0]
+    out_dir = out_dir or os.path.dirname(os.path.abspath(model_path))
+
+    paths = {}
+    for fmt in formats:
+        if fmt not in _EXPORTERS:
+            raise ValueError(f"Неизвестный формат экспорта: {fmt}")
+        paths[fmt] = _EXPORTERS[fmt](model, os.path.join(out_dir, f"{base}.{fmt}"))
+    return paths
+
+
+def _exported_backends(formats):
+    """Бэкенды, читающие файлы указанных форматов экспорта."""
+    return [name for name, backend in BACKENDS.items() if backend.suffix.lstrip(".") in formats]
+
+
+def check_parity(model_path, names=None, batch=None, reference="keras"):
+    """
+    Сравнивает выходы бэкендов с эталонным на одном батче.
+
+    Файлы моделей для бэкендов ищутся рядом с model_path
+    по расширению бэкенда.
+
+    Args:
+        model_path: Путь к эталонной модели (.keras)
+        names: Бэкенды для сравнения (по умолчанию все, читающие
+               форматы EXPORT_FORMATS)
+        batch: uint8-батч (N, 180, 180, 3); по умолчанию 64 случайные клетки
+        reference: Эталонный бэкенд
+
+    Returns:
+        dict: {бэкенд: максимальное абсолютное расхождение}
+    """
+    if batch is None:
+        batch = np.random.default_rng(0).integers(0, 256, (64,) + INPUT_SHAPE, dtype=np.uint8)
+    if names is None:
+        names = _exported_backends(EXPORT_FORMATS)
+
+    base = os.path.splitext(model_path)[0]
+    expected = create_backend(reference, base + BACKENDS[reference].suffix).predict(batch)
+
+    diffs = {}
+    for name in names:
+        output = create_backend(name, base + BACKENDS[name].suffix).predict(batch)
+        diffs[name] = float(np.abs(output - expected).max())
+    return diffs
+
+
+def main():
+    from .classifier import MODEL_PATH
+
+    parser = argparse.ArgumentParser(description="Экспорт модели классификатора")
+    parser.add_argument("--model", default=MODEL_PATH, help="путь к model.keras")
+    parser.add_argument("--formats", nargs="+", default=list(EXPORT_FORMATS), choices=list(_EXPORTERS))
+    args = parser.parse_args()
+
+    for fmt, path in export_model(args.model, args.formats).items():
+        print(f"{fmt:<8}{path}")
+
+    names = _exported_backends(args.formats)
+    failed = False
+    for name, diff in check_parity(args.model, names).items():
+        ok = diff <= PARITY_TOLERANCE
+        failed |= not ok
+        print(f"{name:<8}max |diff| = {diff:.2e} {'OK' if ok else 'FAIL'}")
+
+    raise SystemExit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,244 @@
+"""
+Инференс простых свёрточных сетей на NumPy, без TensorFlow.
+
+Поддерживаются последовательные модели из слоёв Rescaling, Conv2D,
+MaxPooling2D, Flatten, GlobalAveragePooling2D, Dropout и Dense —
+этого хватает для model_1 из model/chess-classifier.ipynb. Свёртки
+считаются через im2col: окна раскладываются в матрицу и умножаются
+на ядро одним matmul (BLAS, многопоточно).
+
+Веса выгружаются из .keras в .npz функцией export_npz или в плоский
+файл .weights функцией export_weights (нужен TensorFlow), а загрузка
+и инференс используют только NumPy. Файл .weights отображается
+в память без копирования (см. weights.py).
+"""
+
+import json
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+# Сколько изображений проходит через сеть за раз. Матрица im2col
+# первой свёртки model_1 — около 3.4 МБ на изображение, второй —
+# около 8.7 МБ, так что кусок из 8 изображений держит пиковую
+# память в пределах ~100 МБ, а matmul остаются достаточно крупными
+CHUNK_SIZE = 8
+
+_ACTIVATIONS = ("linear", "relu", "softmax")
+
+
+def _activate(x, activation):
+    if activation == "relu":
+        np.maximum(x, 0, out=x)
+    elif activation == "softmax":
+        x -= x.max(axis=-1, keepdims=True)
+        np.exp(x, out=x)
+        x /= x.sum(axis=-1, keepdims=True)
+    return x
+
+
+def _pad_same(x, kernel, stride):
+    """Дополнение нулями как у padding="same" в Keras (лишнее — справа/снизу)."""
+    pads = []
+    for size, k, s in zip(x.shape[1:3], kernel, stride):
+        out = -(-size // s)
+        total = max((out - 1) * s + k - size, 0)
+        pads.append((total // 2, total - total // 2))
+    return np.pad(x, [(0, 0), pads[0], pads[1], (0, 0)])
+
+
+def conv2d(x, kernel, bias, strides=(1, 1), padding="valid"):
+    """
+    Свёртка NHWC через im2col.
+
+    Args:
+        x: (N, H, W, C_in), float32
+        kernel: (kh, kw, C_in, C_out)
+        bias: (C_out,)
+
+    Returns:
+        np.ndarray: (N, H_out, W_out, C_out)
+    """
+    kh, kw, c_in, c_out = kernel.shape
+    if padding == "same":
+        x = _pad_same(x, (kh, kw), strides)
+
+    # Окна (N, H', W', C, kh, kw) -> строки im2col в порядке (kh, kw, C),
+    # как у ядра Keras
+    windows = sliding_window_view(x, (kh, kw), axis=(1, 2))[:, ::strides[0], ::strides[1]]
+    n, h_out, w_out = windows.shape[:3]
+    cols = np.ascontiguousarray(windows.transpose(0, 1, 2, 4, 5, 3)).reshape(-1, kh * kw * c_in)
+
+    out = cols @ kernel.reshape(-1, c_out)
+    out += bias
+    return out.reshape(n, h_out, w_out, c_out)
+
+
+def max_pool2d(x, pool=(2, 2)):
+    """MaxPooling2D с шагом, равным окну, и padding="valid"."""
+    n, h, w, c = x.shape
+    ph, pw = pool
+    h, w = h // ph * ph, w // pw * pw
+    return x[:, :h, :w].reshape(n, h // ph, ph, w // pw, pw, c).max(axis=(2, 4))
+
+
+class NumpyModel:
+    """
+    Последовательная модель: список слоёв (spec, веса).
+
+    spec — словарь с ключом type и параметрами слоя, веса — словарь
+    массивов (kernel, bias), у слоёв без весов пустой.
+    """
+
+    def __init__(self, layers):
+        self.layers = layers
+
+    @classmethod
+    def load(cls, path):
+        """Загружает модель из .npz, созданного export_npz."""
+        if str(path).endswith(".weights"):
+            return cls.load_mapped(path)
+        with np.load(path) as data:
+            specs = json.loads(str(data["layers"]))
+            layers = [
+                (spec, {name: data[f"{i}.{name}"].astype(np.float32) for name in spec.get("weights", [])})
+                for i, spec in enumerate(specs)
+            ]
+        return cls(layers)
+
+    @classmethod
+    def load_mapped(cls, path):
+        """
+        Загружает модель из .weights, созданного export_weights.
+
+        Веса не копируются: это представления файла, отображённого
+        в память только для чтения.
+        """
+        from .weights import load_weights
+
+        specs, arrays = load_weights(path)
+        layers = [
+            (spec, {name: arrays[f"{i}.{name}"] for name in spec.get("weights", [])})
+            for i, spec in enumerate(specs)
+        ]
+        return cls(layers)
+
+    def _forward(self, x):
+        for spec, weights in self.layers:
+            kind = spec["type"]
+            if kind == "rescaling":
+                x = x * np.float32(spec["scale"]) + np.float32(spec["offset"])
+            elif kind == "conv2d":
+                x = conv2d(x, weights["kernel"], weights["bias"], tuple(spec["strides"]), spec["padding"])
+                x = _activate(x, spec["activation"])
+            elif kind == "max_pool2d":
+                x = max_pool2d(x, tuple(spec["pool_size"]))
+            elif kind == "flatten":
+                x = x.reshape(len(x), -1)
+            elif kind == "global_average_pool2d":
+                x = x.mean(axis=(1, 2))
+            elif kind == "dense":
+                x = x @ weights["kernel"] + weights["bias"]
+                x = _activate(x, spec["activation"])
+        return x
+
+    def predict(self, batch):
+        """
+        Выход модели для uint8-батча (N, H, W, C).
+
+        Батч проходит через сеть кусками по CHUNK_SIZE изображений.
+        """
+        outputs = [
+            self._forward(batch[start:start + CHUNK_SIZE].astype(np.float32))
+            for start in range(0, len(batch), CHUNK_SIZE)
+        ]
+        return np.concatenate(outputs)
+
+
+def _layer_spec(layer):
+    """Описание слоя Keras для NumpyModel или ValueError, если слой не поддерживается."""
+    config = layer.get_config()
+    kind = type(layer).__name__
+    if config.get("data_format", "channels_last") != "channels_last":
+        raise ValueError(f"Слой {layer.name}: поддерживается только channels_last")
+
+    activation = config.get("activation", "linear")
+    if activation not in _ACTIVATIONS:
+        raise ValueError(f"Активация {activation} слоя {layer.name} не поддерживается")
+
+    if kind == "InputLayer" or kind == "Dropout":
+        return None
+    if kind == "Rescaling":
+        return {"type": "rescaling", "scale": float(config["scale"]), "offset": float(config["offset"])}
+    if kind == "Conv2D":
+        if tuple(config["dilation_rate"]) != (1, 1) or config.get("groups", 1) != 1:
+            raise ValueError(f"Свёртка {layer.name}: dilation и groups не поддерживаются")
+        return {
+            "type": "conv2d", "strides": list(config["strides"]), "padding": config["padding"],
+            "activation": activation, "weights": ["kernel", "bias"],
+        }
+    if kind == "MaxPooling2D":
+        if tuple(config["strides"]) != tuple(config["pool_size"]) or config["padding"] != "valid":
+            raise ValueError(f"Пулинг {layer.name}: поддерживается только шаг, равный окну, без padding")
+        return {"type": "max_pool2d", "pool_size": list(config["pool_size"])}
+    if kind == "Flatten":
+        return {"type": "flatten"}
+    if kind == "GlobalAveragePooling2D":
+        return {"type": "global_average_pool2d"}
+    if kind == "Dense":
+        return {"type": "dense", "activation": activation, "weights": ["kernel", "bias"]}
+
+    raise ValueError(f"Слой {layer.name} ({kind}) не поддерживается NumPy-движком")
+
+
+def _export_layers(model):
+    """
+    Описания слоёв и веса последовательной модели Keras.
+
+    Returns:
+        (specs, arrays): список описаний и словарь {"i.kernel": ..., "i.bias": ...}
+
+    Raises:
+        ValueError: Если в модели есть неподдерживаемые слои
+    """
+    specs = []
+    arrays = {}
+    for layer in model.layers:
+        spec = _layer_spec(layer)
+        if spec is None:
+            continue
+        if "weights" in spec:
+            weights = layer.get_weights()
+            kernel = weights[0]
+            bias = weights[1] if len(weights) > 1 else np.zeros(kernel.shape[-1])
+            arrays[f"{len(specs)}.kernel"] = kernel.astype(np.float32)
+            arrays[f"{len(specs)}.bias"] = bias.astype(np.float32)
+        specs.append(spec)
+    return specs, arrays
+
+
+def export_npz(model, path):
+    """
+    Выгружает последовательную модель Keras в .npz для NumpyModel.
+
+    Raises:
+        ValueError: Если в модели есть неподдерживаемые слои
+    """
+    specs, arrays = _export_layers(model)
+    with open(path, "wb") as f:
+        np.savez(f, layers=json.dumps(specs), **arrays)
+    return path
+
+
+def export_weights(model, path):
+    """
+    Выгружает последовательную модель Keras в плоский файл .weights,
+    который NumpyModel.load_mapped отображает в память.
+
+    Raises:
+        ValueError: Если в модели есть неподдерживаемые слои
+    """
+    from .weights import save_weights
+
+    specs, arrays = _export_layers(model)
+    return save_weights(specs, arrays, path)
@@ -0,0 +1,234 @@
+"""
+INT8-квантование классификатора (post-training) с проверкой точности.
+
+Модель калибруется на выборке из обучающей части датасета
+(model/data/train, структура как у image_dataset_from_directory
+в model/chess-classifier.ipynb), затем точность INT8-модели
+сравнивается с float-моделью на тестовой части — так же, как
+evaluate_model в ноутбуке. Если точность упала больше допуска,
+модель не публикуется. Для обеих моделей выводятся время
+инференса и память.
+
+Запуск (из backend/):
+    python -m services.ml.quantize [--data DIR] [--tolerance 0.01]
+"""
+
+import argparse
+import os
+import random
+import tempfile
+import time
+
+import cv2
+import numpy as np
+
+from config import settings
+from .backends import BACKENDS, INPUT_SHAPE, create_backend
+from .export import input_signature
+
+# Каталог датасета по умолчанию (как DEST_DIR в ноутбуке)
+DATA_DIR = settings.BASE_DIR / "model" / "data"
+
+# Сколько изображений обучающей части использовать для калибровки
+CALIBRATION_SIZE = 300
+
+# Допустимое падение точности INT8-модели (доля, 0.01 — один процент)
+ACCURACY_TOLERANCE = 0.01
+
+_IMAGE_EXTENSIONS = (".png", ".jpg", ".jpeg", ".bmp")
+
+
+class AccuracyGateError(Exception):
+    """INT8-модель потеряла больше допустимой точности и не опубликована."""
+
+
+def load_split(split_dir, limit=None, seed=42):
+    """
+    Загружает часть датасета: подкаталоги — классы в алфавитном порядке.
+
+    Изображения приводятся к 180x180 билинейной интерполяцией в RGB,
+    как в image_dataset_from_directory при обучении.
+
+    Args:
+        split_dir: Каталог части (train, val или test)
+        limit: Сколько изображений взять (случайная выборка); None — все
+        seed: Зерно выборки
+
+    Returns:
+        (images, labels): uint8 (N, 180, 180, 3) и int (N,)
+    """
+    classes = sorted(d for d in os.listdir(split_dir) if os.path.isdir(os.path.join(split_dir, d)))
+    files = [
+        (os.path.join(split_dir, name, f), label)
+        for label, name in enumerate(classes)
+        for f in sorted(os.listdir(os.path.join(split_dir, name)))
+        if f.lower().endswith(_IMAGE_EXTENSIONS)
+    ]
+    if limit is not None and limit < len(files):
+        files = random.Random(seed).sample(files, limit)
+
+    images = np.empty((len(files),) + INPUT_SHAPE, dtype=np.uint8)
+    for i, (path, _) in enumerate(files):
+        image = cv2.imread(path, cv2.IMREAD_COLOR)
+        image = cv2.resize(image, INPUT_SHAPE[1::-1], interpolation=cv2.INTER_LINEAR)
+        cv2.cvtColor(image, cv2.COLOR_BGR2RGB, dst=images[i])
+    labels = np.array([label for _, label in files], dtype=np.int64)
+    return images, labels
+
+
+def quantize_int8(model_path, calibration_images, out_path):
+    """
+    Post-training INT8-квантование в TFLite.
+
+    Веса и активации квантуются в int8 (веса — поканально),
+    вход остаётся uint8-клетками, выход — float32-вероятностями.
+    Диапазоны активаций калибруются на calibration_images.
+    """
+    import tensorflow as tf
+    from tensorflow import keras
+
+    model = keras.models.load_model(model_path)
+
+    def representative_dataset():
+        for image in calibration_images:
+            yield [image[None]]
+
+    with tempfile.TemporaryDirectory() as saved_model_dir:
+        model.export(saved_model_dir, format="tf_saved_model", input_signature=input_signature(), verbose=False)
+        converter = tf.lite.TFLiteConverter.from_saved_model(saved_model_dir)
+        converter.optimizations = [tf.lite.Optimize.DEFAULT]
+        converter.representative_dataset = representative_dataset
+        converter.target_spec.supported_ops = [tf.lite.OpsSet.TFLITE_BUILTINS_INT8]
+        data = converter.convert()
+
+    with open(out_path, "wb") as f:
+        f.write(data)
+    return out_path
+
+
+def evaluate(backend, images, labels, batch_size=64):
+    """Доля верно классифицированных изображений."""
+    correct = 0
+    for start in range(0, len(images), batch_size):
+        predictions = backend.predict(images[start:start + batch_size])
+        correct += int((predictions.argmax(axis=1) == labels[start:start + batch_size]).sum())
+    return correct / max(1, len(images))
+
+
+def _rss_mb():
+    """Текущий RSS процесса в МБ (Linux), иначе пиковый."""
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    import resource
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def profile_backend(name, path, repeat=10):
+    """
+    Время инференса доски (батч 64) и память бэкенда.
+
+    Returns:
+        dict: latency_ms (медиана), rss_mb (прирост RSS после загрузки
+              и прогрева), size_mb (размер файла модели)
+    """
+    rss_before = _rss_mb()
+    backend = create_backend(name, path)
+    backend.warmup()
+    rss_mb = _rss_mb() - rss_before
+
+    batch = np.random.default_rng(0).integers(0, 256, (64,) + INPUT_SHAPE, dtype=np.uint8)
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        backend.predict(batch)
+        times.append((time.perf_counter() - start) * 1000)
+
+    return {
+        "latency_ms": float(np.median(times)),
+        "rss_mb": rss_mb,
+        "size_mb": os.path.getsize(path) / 2 ** 20,
+    }
+
+
+def quantize_model(model_path, data_dir=DATA_DIR, tolerance=ACCURACY_TOLERANCE,
+                   calibration_size=CALIBRATION_SIZE, out_path=None):
+    """
+    Полный цикл: калибровка, квантование, проверка точности, публикация.
+
+    INT8-модель сначала пишется во временный файл и переносится
+    в out_path (по умолчанию — рядом с моделью, model.int8.tflite,
+    где её ищет бэкенд tflite_int8), только если её точность
+    на тестовой части не ниже точности float-модели минус tolerance.
+
+    Returns:
+        dict: Отчёт — точности float/int8, время и память обеих моделей
+
+    Raises:
+        AccuracyGateError: Если точность упала больше допуска
+    """
+    if out_path is None:
+        out_path = os.path.splitext(model_path)[0] + BACKENDS["tflite_int8"].suffix
+
+    calibration, _ = load_split(os.path.join(data_dir, "train"), limit=calibration_size)
+    test_images, test_labels = load_split(os.path.join(data_dir, "test"))
+
+    out_dir = os.path.dirname(os.path.abspath(out_path))
+    fd, tmp_path = tempfile.mkstemp(suffix=BACKENDS["tflite_int8"].suffix, dir=out_dir)
+    os.close(fd)
+    try:
+        quantize_int8(model_path, calibration, tmp_path)
+
+        report = {
+            "float_accuracy": evaluate(create_backend("keras", model_path), test_images, test_labels),
+            "int8_accuracy": evaluate(create_backend("tflite_int8", tmp_path), test_images, test_labels),
+            "tolerance": tolerance,
+            "float": profile_backend("keras", model_path),
+            "int8": profile_backend("tflite_int8", tmp_path),
+        }
+        report["published"] = report["int8_accuracy"] >= report["float_accuracy"] - tolerance
+        if not report["published"]:
+            raise AccuracyGateError(
+                f"Точность INT8 {report['int8_accuracy']:.4f} ниже float "
+                f"{report['float_accuracy']:.4f} больше чем на {tolerance}"
+            )
+
+        os.replace(tmp_path, out_path)
+        report["path"] = out_path
+        return report
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def main():
+    from .classifier import MODEL_PATH
+
+    parser = argparse.ArgumentParser(description="INT8-квантование модели классификатора")
+    parser.add_argument("--model", default=MODEL_PATH, help="путь к model.keras")
+    parser.add_argument("--data", default=str(DATA_DIR), help="каталог с train/ и test/")
+    parser.add_argument("--tolerance", type=float, default=ACCURACY_TOLERANCE,
+                        help="допустимое падение точности (доля)")
+    parser.add_argument("--calibration-size", type=int, default=CALIBRATION_SIZE)
+    args = parser.parse_args()
+
+    try:
+        report = quantize_model(args.model, args.data, args.tolerance, args.calibration_size)
+    except AccuracyGateError as e:
+        print(f"Модель не опубликована: {e}")
+        raise SystemExit(1)
+
+    print(f"{'модель':<8}{'точность':>10}{'батч 64, мс':>13}{'RSS, МБ':>10}{'файл, МБ':>10}")
+    for kind in ("float", "int8"):
+        stats = report[kind]
+        print(f"{kind:<8}{report[kind + '_accuracy']:>10.4f}{stats['latency_ms']:>13.1f}"
+              f"{stats['rss_mb']:>10.1f}{stats['size_mb']:>10.1f}")
+    print(f"Опубликовано: {report['path']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,272 @@
+"""
+Реестр моделей классификатора: горячая замена и теневая проверка.
+
+Модели ищутся по имени файла в MODEL_DIRS: рабочая
+services/ml/model.keras (имя "model") и модели из ноутбука
+model/model_1..4.keras ("model_1" ... "model_4"). Для бэкендов
+кроме keras берётся файл с тем же именем и расширением бэкенда.
+Версия модели — префикс SHA-256 её файла: замена файла на диске
+даёт новую версию.
+
+activate() загружает и прогревает модель в стороне и одним
+присваиванием подменяет бэкенд классификатора. Запросы, уже
+получившие старый бэкенд, дорабатывают на нём, новые идут на новый.
+
+set_shadow() назначает модель-кандидата: доля досок, распознанных
+основной моделью (режим squares), повторно прогоняется через
+кандидата в фоновом потоке с пониженным приоритетом. Для кандидата
+копятся доля расхождений с основной моделью и время инференса.
+"""
+
+import hashlib
+import logging
+import os
+import random
+import threading
+import time
+from collections import deque, namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from config import settings
+from . import classifier
+from .backends import BACKENDS, create_backend
+
+logger = logging.getLogger(__name__)
+
+# Каталоги, в которых ищутся модели (по порядку: первое совпадение имени)
+MODEL_DIRS = (
+    os.path.dirname(classifier.MODEL_PATH),
+    str(settings.BASE_DIR / "model"),
+)
+
+# Очередь теневой проверки: сколько досок может ждать кандидата.
+# Если кандидат не успевает, лишние доски пропускаются, а не копятся
+SHADOW_QUEUE_SIZE = 4
+
+# Приоритет (nice) потока теневой проверки
+SHADOW_NICE = 10
+
+# По скольким последним доскам считаются медианы времени
+SHADOW_LATENCY_WINDOW = 1000
+
+# Загруженная модель: имя, версия, бэкенд и путь к файлу
+ModelVersion = namedtuple("ModelVersion", ["name", "version", "backend", "path"])
+
+
+def file_version(path: str) -> str:
+    """Версия модели: первые 12 символов SHA-256 файла (или каталога SavedModel)."""
+    digest = hashlib.sha256()
+    paths = [path]
+    if os.path.isdir(path):
+        paths = sorted(os.path.join(root, f) for root, _, files in os.walk(path) for f in files)
+    for file_path in paths:
+        with open(file_path, "rb") as f:
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                digest.update(chunk)
+    return digest.hexdigest()[:12]
+
+
+class ShadowStats:
+    """Счётчики теневой проверки кандидата. Потокобезопасны."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.clear()
+
+    def clear(self):
+        with self._lock:
+            self.boards = 0
+            self.skipped = 0
+            self.squares = 0
+            self.disagreements = 0
+            self.boards_disagree = 0
+            self.primary_ms = deque(maxlen=SHADOW_LATENCY_WINDOW)
+            self.shadow_ms = deque(maxlen=SHADOW_LATENCY_WINDOW)
+
+    def record(self, disagreements, squares, primary_ms, shadow_ms):
+        with self._lock:
+            self.boards += 1
+            self.squares += squares
+            self.disagreements += disagreements
+            self.boards_disagree += bool(disagreements)
+            self.primary_ms.append(primary_ms)
+            self.shadow_ms.append(shadow_ms)
+
+    def skip(self):
+        with self._lock:
+            self.skipped += 1
+
+    def snapshot(self) -> dict:
+        """Доли расхождений по клеткам и доскам, медианы времени обеих моделей."""
+        with self._lock:
+            return {
+                "boards": self.boards,
+                "skipped": self.skipped,
+                "squares": self.squares,
+                "square_disagreement": self.disagreements / self.squares if self.squares else 0.0,
+                "board_disagreement": self.boards_disagree / self.boards if self.boards else 0.0,
+                "primary_ms": float(np.median(self.primary_ms)) if self.primary_ms else None,
+                "shadow_ms": float(np.median(self.shadow_ms)) if self.shadow_ms else None,
+            }
+
+
+def _lower_priority():
+    """Инициализатор потока теневой проверки: понижает его приоритет (Linux)."""
+    try:
+        os.setpriority(os.PRIO_PROCESS, threading.get_native_id(), SHADOW_NICE)
+    except (AttributeError, OSError):
+        pass
+
+
+class ModelRegistry:
+    """
+    Реестр моделей: активная модель классификатора и кандидат
+    для теневой проверки.
+    """
+
+    def __init__(self, model_dirs=MODEL_DIRS):
+        self.model_dirs = model_dirs
+        self.active = None
+        self.shadow = None
+        self.shadow_rate = 0.0
+        self.shadow_stats = ShadowStats()
+        self._shadow_backend = None
+        self._shadow_pending = 0
+        self._lock = threading.Lock()
+        self._swap_lock = threading.Lock()
+        self._executor = None
+
+    def available(self) -> dict:
+        """Модели в model_dirs: {имя: путь к .keras}."""
+        models = {}
+        for directory in self.model_dirs:
+            if not os.path.isdir(directory):
+                continue
+            for f in sorted(os.listdir(directory)):
+                name, ext = os.path.splitext(f)
+                if ext == BACKENDS["keras"].suffix:
+                    models.setdefault(name, os.path.join(directory, f))
+        return models
+
+    def resolve(self, name: str, backend: str) -> str:
+        """
+        Путь к файлу модели name для бэкенда backend.
+
+        Raises:
+            ValueError: Если модели или бэкенда нет
+        """
+        if backend not in BACKENDS:
+            raise ValueError(f"Неизвестный бэкенд инференса: {backend}")
+        models = self.available()
+        if name not in models:
+            raise ValueError(f"Модель {name} не найдена")
+        return os.path.splitext(models[name])[0] + BACKENDS[backend].suffix
+
+    def load(self, name: str, backend: str = None):
+        """
+        Загружает и прогревает модель.
+
+        Returns:
+            (ModelVersion, InferenceBackend)
+        """
+        backend = backend or settings.INFERENCE_BACKEND
+        path = self.resolve(name, backend)
+        loaded = create_backend(backend, path)
+        loaded.warmup(classifier.batch_limit())
+        return ModelVersion(name, file_version(path), backend, path), loaded
+
+    def activate(self, name: str, backend: str = None) -> ModelVersion:
+        """
+        Делает модель активной без остановки приложения.
+
+        Модель загружается и прогревается до замены, так что запросы
+        не ждут загрузки; одновременные замены выполняются по очереди.
+        Индекс шаблонов очищается: его классы выданы старой моделью.
+        """
+        with self._swap_lock:
+            version, loaded = self.load(name, backend)
+            with classifier._model_lock:
+                classifier.backend = loaded
+                classifier._load_error = None
+                classifier._ready.set()
+            self.active = version
+
+        from .templates import template_index
+        template_index.clear()
+        logger.warning("model activated: %s@%s (%s)", version.name, version.version, version.backend)
+        return version
+
+    def set_shadow(self, name: str, rate: float, backend: str = None) -> ModelVersion:
+        """
+        Назначает кандидата для теневой проверки на доле rate досок.
+
+        Raises:
+            ValueError: Если rate вне (0, 1]
+        """
+        if not 0 < rate <= 1:
+            raise ValueError("Доля досок для теневой проверки должна быть в (0, 1]")
+        version, loaded = self.load(name, backend)
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=1, thread_name_prefix="shadow", initializer=_lower_priority,
+                )
+            self.shadow, self._shadow_backend, self.shadow_rate = version, loaded, rate
+            self.shadow_stats.clear()
+        return version
+
+    def clear_shadow(self):
+        """Отключает теневую проверку."""
+        with self._lock:
+            self.shadow, self._shadow_backend, self.shadow_rate = None, None, 0.0
+
+    def observe(self, batch: np.ndarray, probabilities: np.ndarray, primary_ms: float):
+        """
+        Передаёт распознанную доску кандидату (с вероятностью shadow_rate).
+
+        Вызывается после ответа основной модели и не ждёт кандидата.
+        """
+        with self._lock:
+            shadow = self._shadow_backend
+            if shadow is None or random.random() >= self.shadow_rate:
+                return
+            if self._shadow_pending >= SHADOW_QUEUE_SIZE:
+                self.shadow_stats.skip()
+                return
+            self._shadow_pending += 1
+            executor = self._executor
+
+        executor.submit(self._run_shadow, shadow, batch, probabilities.argmax(axis=1), primary_ms)
+
+    def _run_shadow(self, shadow, batch, primary_classes, primary_ms):
+        try:
+            start = time.perf_counter()
+            shadow_classes = shadow.predict(batch).argmax(axis=1)
+            shadow_ms = (time.perf_counter() - start) * 1000
+            disagreements = int((shadow_classes != primary_classes).sum())
+            self.shadow_stats.record(disagreements, len(batch), primary_ms, shadow_ms)
+        except Exception:
+            logger.exception("Теневая проверка модели не удалась")
+        finally:
+            with self._lock:
+                self._shadow_pending -= 1
+
+    def status(self) -> dict:
+        """Доступные модели, активная модель и кандидат со статистикой."""
+        active = self.active
+        if active is None:
+            # Модель, загруженная при старте из MODEL_PATH
+            name = os.path.splitext(os.path.basename(classifier.MODEL_PATH))[0]
+            active = ModelVersion(name, None, settings.INFERENCE_BACKEND, classifier.model_path(settings.INFERENCE_BACKEND))
+        return {
+            "available": sorted(self.available()),
+            "active": active._asdict(),
+            "shadow": self.shadow._asdict() if self.shadow else None,
+            "shadow_rate": self.shadow_rate,
+            "shadow_stats": self.shadow_stats.snapshot(),
+        }
+
+
+model_registry = ModelRegistry()
@@ -0,0 +1,180 @@
+"""
+Индекс шаблонов клеток для отрисованных досок.
+
+На скриншотах одной темы сайта каждая фигура на клетке каждого цвета
+выглядит одинаково до пикселя, и гонять её через CNN на каждой доске
+незачем. Индекс хранит компактные дескрипторы (клетка, уменьшенная
+до TEMPLATE_SIZE) с классами, которые классификатор выдал
+с уверенностью не ниже TEMPLATE_MIN_CONFIDENCE. Клетка, дескриптор
+которой отличается от сохранённого не больше чем на TEMPLATE_TOLERANCE,
+получает класс из индекса, остальные идут в классификатор.
+
+Индекс ограничен settings.TEMPLATE_INDEX_SIZE записями: при
+переполнении вытесняется запись, которая дольше всех не совпадала
+ни с одной клеткой (LRU). Используется только для досок, найденных
+путём "screenshot": на фотографиях клетки не повторяются.
+"""
+
+import threading
+from collections import OrderedDict
+
+import cv2
+import numpy as np
+
+from config import settings
+from .classifier import CLASS_NAMES, predict_batch
+
+# Сторона дескриптора клетки в пикселях (INTER_AREA из 180x180)
+TEMPLATE_SIZE = 12
+
+# Максимальное среднеквадратичное отличие дескрипторов одной и той же
+# фигуры на клетке одного цвета (в уровнях яркости 0..255). Сдвиг
+# нарезки на пиксель-два и сжатие скриншота дают единицы уровней,
+# а разные фигуры и разные цвета клеток — десятки
+TEMPLATE_TOLERANCE = 6.0
+
+# Минимальная уверенность классификатора, с которой клетка
+# попадает в индекс
+TEMPLATE_MIN_CONFIDENCE = 0.99
+
+
+def describe(batch: np.ndarray) -> np.ndarray:
+    """
+    Дескрипторы клеток: клетка, уменьшенная до TEMPLATE_SIZE.
+
+    Args:
+        batch: uint8 (N, S, S, 3)
+
+    Returns:
+        np.ndarray: float32 (N, TEMPLATE_SIZE * TEMPLATE_SIZE * 3)
+    """
+    size = (TEMPLATE_SIZE, TEMPLATE_SIZE)
+    descriptors = np.empty((len(batch), TEMPLATE_SIZE, TEMPLATE_SIZE, 3), dtype=np.uint8)
+    for i, square in enumerate(batch):
+        cv2.resize(square, size, dst=descriptors[i], interpolation=cv2.INTER_AREA)
+    return descriptors.reshape(len(batch), -1).astype(np.float32)
+
+
+class TemplateIndex:
+    """
+    Ограниченный индекс дескрипторов клеток с вытеснением LRU.
+
+    Дескрипторы лежат в одной матрице (max_size, D), расстояния
+    до всех записей считаются одним matmul. Порядок использования
+    записей хранит OrderedDict {номер_строки: класс}. Потокобезопасен.
+    """
+
+    def __init__(self, max_size: int, tolerance: float = TEMPLATE_TOLERANCE):
+        self.max_size = max_size
+        self.tolerance = tolerance
+        self._lock = threading.Lock()
+        self._descriptors = np.empty((max_size, TEMPLATE_SIZE * TEMPLATE_SIZE * 3), dtype=np.float32)
+        self._norms = np.empty(max_size, dtype=np.float32)
+        self.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def clear(self):
+        with self._lock:
+            self._entries = OrderedDict()
+            self.hits = 0
+            self.misses = 0
+
+    def _nearest(self, descriptors):
+        """Ближайшая запись и среднеквадратичное расстояние до неё для каждого дескриптора."""
+        rows = np.fromiter(self._entries, dtype=np.int64, count=len(self._entries))
+        stored = self._descriptors[rows]
+        # |a - b|^2 = |a|^2 + |b|^2 - 2ab
+        dist = (descriptors * descriptors).sum(axis=1)[:, None] + self._norms[rows] - 2 * descriptors @ stored.T
+        best = dist.argmin(axis=1)
+        rms = np.sqrt(np.maximum(dist[np.arange(len(descriptors)), best], 0) / descriptors.shape[1])
+        return rows[best], rms
+
+    def lookup(self, descriptors: np.ndarray) -> np.ndarray:
+        """
+        Классы клеток из индекса.
+
+        Args:
+            descriptors: float32 (N, D) — результат describe()
+
+        Returns:
+            np.ndarray: int (N,) — индекс класса в CLASS_NAMES
+                        или -1, если подходящего шаблона нет
+        """
+        classes = np.full(len(descriptors), -1, dtype=np.int64)
+        with self._lock:
+            if self._entries and len(descriptors):
+                rows, rms = self._nearest(descriptors)
+                for i in np.flatnonzero(rms <= self.tolerance):
+                    classes[i] = self._entries[rows[i]]
+                    self._entries.move_to_end(rows[i])
+            hit = int((classes >= 0).sum())
+            self.hits += hit
+            self.misses += len(descriptors) - hit
+        return classes
+
+    def add(self, descriptors: np.ndarray, classes: np.ndarray):
+        """
+        Добавляет шаблоны; дубликаты уже сохранённых не добавляются.
+
+        Args:
+            descriptors: float32 (N, D) — результат describe()
+            classes: int (N,) — индексы классов в CLASS_NAMES
+        """
+        if self.max_size <= 0:
+            return
+        with self._lock:
+            for descriptor, class_idx in zip(descriptors, classes):
+                if self._entries and self._nearest(descriptor[None])[1][0] <= self.tolerance:
+                    continue
+                if len(self._entries) < self.max_size:
+                    row = len(self._entries)
+                else:
+                    row, _ = self._entries.popitem(last=False)
+                self._descriptors[row] = descriptor
+                self._norms[row] = descriptor @ descriptor
+                self._entries[row] = int(class_idx)
+
+    def snapshot(self) -> dict:
+        """Размер индекса и счётчики совпадений."""
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": self.hits / total if total else 0.0,
+            }
+
+
+template_index = TemplateIndex(settings.TEMPLATE_INDEX_SIZE)
+
+
+def predict_with_templates(batch: np.ndarray) -> np.ndarray:
+    """
+    Вероятности классов клеток: из индекса шаблонов, остальные — классификатором.
+
+    Клетке из индекса достаётся её класс с вероятностью 1. Клетки,
+    которые классификатор распознал уверенно, пополняют индекс.
+
+    Args:
+        batch: uint8 (N, 180, 180, 3)
+
+    Returns:
+        np.ndarray: float32 (N, len(CLASS_NAMES)), как у predict_batch
+    """
+    descriptors = describe(batch)
+    classes = template_index.lookup(descriptors)
+
+    probabilities = np.zeros((len(batch), len(CLASS_NAMES)), dtype=np.float32)
+    hit = np.flatnonzero(classes >= 0)
+    probabilities[hit, classes[hit]] = 1
+
+    miss = np.flatnonzero(classes < 0)
+    if len(miss):
+        probabilities[miss] = predict_batch(batch[miss])
+        confident = miss[probabilities[miss].max(axis=1) >= TEMPLATE_MIN_CONFIDENCE]
+        template_index.add(descriptors[confident], probabilities[confident].argmax(axis=1))
+    return probabilities
@@ -0,0 +1,77 @@
+"""
+Уточнение неуверенных клеток аугментациями (test-time augmentation).
+
+Клетка, у которой вероятность лучшего класса ниже порога, ещё раз
+проходит через классификатор в нескольких видах: со сдвигами на
+TTA_SHIFT пикселей и с изменённой яркостью. Вероятности всех видов
+и исходного предсказания усредняются. Виды всех неуверенных клеток
+доски собираются в один батч, так что цена уточнения растёт
+с числом сомнительных клеток, а не с числом клеток доски.
+
+Включается настройкой TTA_CONFIDENCE > 0.
+"""
+
+import cv2
+import numpy as np
+
+from .classifier import predict_batch
+
+# Сдвиг вида в пикселях клетки 180x180 (в каждую из четырёх сторон)
+TTA_SHIFT = 6
+
+# Множители яркости видов
+TTA_BRIGHTNESS = (0.85, 1.15)
+
+_SHIFTS = ((-TTA_SHIFT, 0), (TTA_SHIFT, 0), (0, -TTA_SHIFT), (0, TTA_SHIFT))
+
+# Видов на одну клетку
+TTA_VIEWS = len(_SHIFTS) + len(TTA_BRIGHTNESS)
+
+
+def augment(square: np.ndarray) -> np.ndarray:
+    """
+    Аугментированные виды клетки.
+
+    Сдвиг дополняет край повтором крайних пикселей (BORDER_REPLICATE),
+    чтобы на клетке не появлялись чёрные полосы, которых не было
+    в обучающих данных.
+
+    Args:
+        square: uint8 (S, S, 3)
+
+    Returns:
+        np.ndarray: uint8 (TTA_VIEWS, S, S, 3)
+    """
+    h, w = square.shape[:2]
+    views = np.empty((TTA_VIEWS,) + square.shape, dtype=np.uint8)
+    for i, (dx, dy) in enumerate(_SHIFTS):
+        shift = np.float32([[1, 0, dx], [0, 1, dy]])
+        cv2.warpAffine(square, shift, (w, h), dst=views[i], borderMode=cv2.BORDER_REPLICATE)
+    for i, factor in enumerate(TTA_BRIGHTNESS, start=len(_SHIFTS)):
+        cv2.convertScaleAbs(square, dst=views[i], alpha=factor)
+    return views
+
+
+def refine(batch: np.ndarray, probabilities: np.ndarray, threshold: float):
+    """
+    Уточняет клетки с уверенностью ниже threshold.
+
+    Args:
+        batch: uint8 (N, 180, 180, 3) — клетки
+        probabilities: (N, len(CLASS_NAMES)) — исходные вероятности
+        threshold: Порог уверенности
+
+    Returns:
+        (probabilities, unsure): новая матрица вероятностей и индексы
+        уточнённых клеток
+    """
+    unsure = np.flatnonzero(probabilities.max(axis=1) < threshold)
+    if len(unsure) == 0:
+        return probabilities, unsure
+
+    views = np.concatenate([augment(batch[i]) for i in unsure])
+    view_probs = predict_batch(views).reshape(len(unsure), TTA_VIEWS, -1)
+
+    probabilities = probabilities.copy()
+    probabilities[unsure] = (probabilities[unsure] + view_probs.sum(axis=1)) / (TTA_VIEWS + 1)
+    return probabilities, unsure
@@ -0,0 +1,103 @@
+"""
+Плоский формат весов для NumPy-движка, отображаемый в память.
+
+Файл .weights:
+
+    MAGIC (8 байт) | длина заголовка (uint64, little-endian) |
+    заголовок JSON | выравнивание | массив 0 | выравнивание | массив 1 ...
+
+Заголовок — описание слоёв (как в .npz у numpy_engine) и таблица
+массивов {имя: смещение, форма, dtype}. Каждый массив начинается
+с границы ALIGNMENT байт, так что страницы весов не смешиваются
+с заголовком и друг с другом.
+
+load_weights отображает файл в память только для чтения (mmap),
+и массивы весов — представления этого отображения без копирования.
+Процессы (воркеры uvicorn), загрузившие один и тот же файл, делят
+одну физическую копию весов через страничный кэш ОС, вместо того
+чтобы каждый держал свою.
+"""
+
+import json
+import mmap
+import struct
+
+import numpy as np
+
+MAGIC = b"CHWT0001"
+
+# Выравнивание массивов: кратно размеру страницы x86-64 (4 КБ)
+# и ARM64 с 16-килобайтными страницами
+ALIGNMENT = 16384
+
+_HEADER_LENGTH = struct.Struct("<Q")
+
+
+def _align(offset):
+    return -(-offset // ALIGNMENT) * ALIGNMENT
+
+
+def save_weights(specs, arrays, path):
+    """
+    Записывает описание слоёв и массивы весов в файл .weights.
+
+    Args:
+        specs: Список описаний слоёв (JSON-совместимых словарей)
+        arrays: Словарь {имя: np.ndarray}
+        path: Путь к файлу
+    """
+    arrays = {name: np.ascontiguousarray(array, dtype=np.float32) for name, array in arrays.items()}
+
+    # Смещения зависят от длины заголовка, а заголовок — от смещений:
+    # считаем, пока длина заголовка не перестанет меняться
+    table = {}
+    data_start = 0
+    while True:
+        offset = data_start
+        for name, array in arrays.items():
+            offset = _align(offset)
+            table[name] = {"offset": offset, "shape": list(array.shape), "dtype": array.dtype.str}
+            offset += array.nbytes
+        header = json.dumps({"layers": specs, "arrays": table}).encode()
+        start = _align(len(MAGIC) + _HEADER_LENGTH.size + len(header))
+        if start == data_start:
+            break
+        data_start = start
+
+    with open(path, "wb") as f:
+        f.write(MAGIC + _HEADER_LENGTH.pack(len(header)) + header)
+        end = data_start
+        for name, array in arrays.items():
+            f.seek(table[name]["offset"])
+            f.write(array.tobytes())
+            end = table[name]["offset"] + array.nbytes
+        f.truncate(end)
+    return path
+
+
+def load_weights(path):
+    """
+    Отображает файл .weights в память только для чтения.
+
+    Returns:
+        (specs, arrays): описание слоёв и словарь {имя: np.ndarray}
+        с представлениями отображения (запись в них невозможна)
+
+    Raises:
+        ValueError: Если файл не в формате .weights
+    """
+    with open(path, "rb") as f:
+        mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    if mapped[:len(MAGIC)] != MAGIC:
+        mapped.close()
+        raise ValueError(f"{path}: не файл весов {MAGIC.decode()}")
+    (length,) = _HEADER_LENGTH.unpack_from(mapped, len(MAGIC))
+    start = len(MAGIC) + _HEADER_LENGTH.size
+    header = json.loads(mapped[start:start + length])
+
+    arrays = {
+        name: np.ndarray(tuple(entry["shape"]), dtype=np.dtype(entry["dtype"]), buffer=mapped, offset=entry["offset"])
+        for name, entry in header["arrays"].items()
+    }
+    return header["layers"], arrays
@@ -0,0 +1,139 @@
+"""
+Исполнитель распознавания досок.
+
+Поиск доски и классификация фигур — работа для процессора на сотни
+миллисекунд. Если выполнять её прямо в async-обработчике, цикл
+событий воркера стоит всё это время, и вместе с загрузкой снимка
+ждут все остальные запросы: страницы, вход, списки партий.
+
+RecognitionExecutor выполняет такие задачи в пуле из
+settings.RECOGNITION_WORKERS потоков (OpenCV и TensorFlow отпускают
+GIL на время вычислений). Очередь ограничена: если задач в работе
+и в ожидании уже RECOGNITION_WORKERS + RECOGNITION_QUEUE_SIZE,
+новая сразу получает RecognitionBusyError, а не копится в памяти.
+Задача занимает место, пока выполняется в пуле, даже если запрос,
+который её ждал, уже отменён.
+
+Исполнитель создаётся и останавливается в lifespan приложения.
+"""
+
+import asyncio
+import functools
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class RecognitionBusyError(Exception):
+    """Очередь распознавания заполнена."""
+
+
+class RecognitionExecutor:
+    """
+    Ограниченный пул потоков для распознавания.
+
+    Args:
+        workers: Число потоков
+        queue_size: Сколько задач может ждать свободного потока
+    """
+
+    def __init__(self, workers: int, queue_size: int):
+        self.workers = workers
+        self.queue_size = queue_size
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="recognition")
+        self._lock = threading.Lock()
+        self._pending = 0
+
+    @property
+    def pending(self) -> int:
+        """Задачи в работе и в очереди."""
+        return self._pending
+
+    async def run(self, func, *args, **kwargs):
+        """
+        Выполняет func(*args, **kwargs) в пуле и ждёт результат,
+        не блокируя цикл событий.
+
+        Raises:
+            RecognitionBusyError: Если очередь заполнена
+        """
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            if self._pending >= self.workers + self.queue_size:
+                raise RecognitionBusyError("Сервер распознавания перегружен, повторите позже")
+            self._pending += 1
+
+        try:
+            future = self._executor.submit(functools.partial(func, *args, **kwargs))
+        except BaseException:
+            self._release()
+            raise
+        # Место освобождается, когда задача завершилась в пуле, а не когда
+        # запрос перестал её ждать (клиент отключился, запрос отменён)
+        future.add_done_callback(lambda _: self._job_done(loop))
+        return await asyncio.wrap_future(future, loop=loop)
+
+    def _release(self):
+        with self._lock:
+            self._pending -= 1
+
+    def _job_done(self, loop):
+        try:
+            loop.call_soon_threadsafe(self._release)
+        except RuntimeError:
+            # Цикл событий уже закрыт
+            self._release()
+
+    def shutdown(self, wait: bool = True):
+        self._executor.shutdown(wait=wait)
+
+
+# Исполнитель приложения; None — ещё не создан
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def start_recognition_executor() -> RecognitionExecutor:
+    """Создаёт исполнитель с настройками из settings (вызывается в lifespan)."""
+    global _executor
+
+    with _executor_lock:
+        if _executor is None:
+            _executor = RecognitionExecutor(settings.RECOGNITION_WORKERS, settings.RECOGNITION_QUEUE_SIZE)
+            logger.warning(
+                "recognition executor: workers=%s, queue=%s",
+                settings.RECOGNITION_WORKERS, settings.RECOGNITION_QUEUE_SIZE,
+            )
+            if (settings.MICROBATCH_MAX_WAIT_MS > 0 and settings.RECOGNITION_WORKERS == 1
+                    and settings.INFERENCE_BACKEND != "daemon"):
+                logger.warning(
+                    "MICROBATCH_MAX_WAIT_MS=%s не даёт объединения при RECOGNITION_WORKERS=1 "
+                    "без демона инференса: доски доходят до модели по одной и только ждут "
+                    "до %s мс; увеличьте RECOGNITION_WORKERS или используйте INFERENCE_BACKEND=daemon",
+                    settings.MICROBATCH_MAX_WAIT_MS, settings.MICROBATCH_MAX_WAIT_MS,
+                )
+    return _executor
+
+
+def get_recognition_executor() -> RecognitionExecutor:
+    """
+    Исполнитель приложения.
+
+    Создаётся при первом обращении, если lifespan не запускался
+    (например, в тестах с ASGITransport).
+    """
+    return _executor or start_recognition_executor()
+
+
+def stop_recognition_executor():
+    """Дожидается текущих задач и останавливает исполнитель (вызывается в lifespan)."""
+    global _executor
+
+    with _executor_lock:
+        executor, _executor = _executor, None
+    if executor is not None:
+        executor.shutdown(wait=True)
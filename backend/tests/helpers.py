@@ -0,0 +1,85 @@
+"""
+Общие построители данных и моделей для тестов.
+"""
+
+import cv2
+import numpy as np
+
+from services.ml import CLASS_NAMES
+from services.ml.backends import InferenceBackend
+
+
+class FakeBackend(InferenceBackend):
+    """
+    Бэкенд с заданным ответом: на все клетки класс piece
+    с уверенностью confidence. Клетки, у которых первый пиксель
+    равен low_marker, получают почти равномерное распределение.
+    Размеры батчей, поданных в модель, копятся в calls.
+    """
+
+    name = "fake"
+
+    def __init__(self, piece, confidence=0.95, low_marker=None):
+        super().__init__("")
+        self.piece = CLASS_NAMES.index(piece)
+        self.confidence = confidence
+        self.low_marker = low_marker
+        self.calls = []
+
+    def _run(self, batch):
+        self.calls.append(len(batch))
+        rest = (1 - self.confidence) / (len(CLASS_NAMES) - 1)
+        probs = np.full((len(batch), len(CLASS_NAMES)), rest, dtype=np.float32)
+        probs[:, self.piece] = self.confidence
+        if self.low_marker is not None:
+            low = batch[:, 0, 0, 0] == self.low_marker
+            probs[low] = 1 / len(CLASS_NAMES)
+            probs[low, self.piece] += 1e-3
+        return probs
+
+
+def make_screenshot(top, left, cell=60):
+    """PNG-скриншот доски: две заливки клеток и «фигуры»-круги."""
+    screenshot = np.full((600, 900, 3), 40, dtype=np.uint8)
+    for row in range(8):
+        for col in range(8):
+            color = (181, 217, 240) if (row + col) % 2 == 0 else (99, 136, 181)
+            y, x = top + row * cell, left + col * cell
+            screenshot[y:y + cell, x:x + cell] = color
+            if (row * 3 + col) % 5 == 0:
+                cv2.circle(screenshot, (x + cell // 2, y + cell // 2), 20, (20, 20, 20), -1)
+    _, encoded = cv2.imencode(".png", screenshot)
+    return encoded.tobytes()
+
+
+def build_tiny_model():
+    """
+    Маленькая модель с тем же входом и выходом, что у рабочей.
+
+    Веса рабочей модели в репозитории не хранятся, поэтому тесты
+    инференса используют случайно инициализированную модель.
+    """
+    from tensorflow import keras
+
+    inputs = keras.Input(shape=(180, 180, 3))
+    x = keras.layers.Rescaling(1. / 255)(inputs)
+    x = keras.layers.Conv2D(4, 3, strides=4, activation="relu")(x)
+    x = keras.layers.GlobalAveragePooling2D()(x)
+    outputs = keras.layers.Dense(len(CLASS_NAMES), activation="softmax")(x)
+    return keras.Model(inputs, outputs)
+
+
+def build_model_1():
+    """Архитектура model_1 из model/chess-classifier.ipynb (случайные веса)."""
+    from tensorflow import keras
+    from tensorflow.keras import layers
+
+    inputs = keras.Input(shape=(180, 180, 3))
+    x = layers.Rescaling(1. / 255)(inputs)
+    for filters in (32, 64, 128, 256):
+        x = layers.Conv2D(filters=filters, kernel_size=3, activation="relu")(x)
+        x = layers.MaxPooling2D(pool_size=2)(x)
+    x = layers.Conv2D(filters=256, kernel_size=3, activation="relu")(x)
+    x = layers.Flatten()(x)
+    outputs = layers.Dense(len(CLASS_NAMES), activation="softmax")(x)
+    return keras.Model(inputs=inputs, outputs=outputs)
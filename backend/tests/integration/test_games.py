@@ -2,6 +2,9 @@
 Интеграционные тесты для API партий.
 """
 
+import asyncio
+import statistics
+import time
 from pathlib import Path
 from unittest.mock import patch
 
@@ -543,3 +546,82 @@ class TestGames:
         )
 
         await delete_game(client, teacher_cookie, game["id"])
+
+
+    @pytest.mark.asyncio(loop_scope="session")
+    async def test_game_08_list_latency_during_uploads(
+        self,
+        client: AsyncClient,
+        test_user: User,
+        teacher_user: User,
+    ):
+        """
+        GAME-08: Список партий отвечает без задержек, пока распознаются снимки.
+
+        Тип: Нагрузочный
+        Приоритет: Высокий
+
+        Шаги:
+            1. Замерить время GET /api/games без нагрузки
+            2. Загрузить три снимка одновременно (распознавание каждого
+               занимает процессор на 0.5 с)
+            3. Пока снимки распознаются, повторять GET /api/games
+
+        Ожидаемый результат:
+            - Все снимки распознаны
+            - Время GET /api/games не растёт: распознавание идёт
+              в исполнителе, а не в цикле событий
+        """
+        auth_cookie = await login_user(client, test_user.email, "testpassword123")
+        teacher_cookie = await login_user(client, teacher_user.email, "teacherpass123")
+
+        game = await create_game(
+            client, auth_cookie,
+            "Game for latency GAME-08", test_user.id, teacher_user.id
+        )
+
+        async def list_games_ms():
+            # Замер включает паузу, в которую цикл событий продвигает
+            # загрузки: если распознавание блокирует цикл, это видно здесь
+            start = time.perf_counter()
+            response = await client.get("/api/games", cookies={"auth": auth_cookie})
+            assert response.status_code == 200
+            await asyncio.sleep(0.01)
+            return (time.perf_counter() - start) * 1000
+
+        baseline = [await list_games_ms() for _ in range(10)]
+
+        mock_predictions = {
+            f"{col}{row}": "empty" for col in "abcdefgh" for row in range(1, 9)
+        }
+
+        def slow_predict(squares):
+            # Держит поток, как нейросеть на процессоре
+            time.sleep(0.5)
+            return mock_predictions
+
+        with open(TEST_IMAGE_PATH, "rb") as f:
+            image = f.read()
+
+        async def upload():
+            return await client.post(
+                f"/api/games/{game['id']}/snapshots",
+                files={"image": ("test_img.png", image, "image/png")},
+                cookies={"auth": auth_cookie}
+            )
+
+        with patch("routers.games.predict_all_squares", side_effect=slow_predict):
+            uploads = asyncio.ensure_future(asyncio.gather(*(upload() for _ in range(3))))
+            during = []
+            while not uploads.done():
+                during.append(await list_games_ms())
+            responses = await uploads
+
+        assert [r.status_code for r in responses] == [200] * 3
+        assert len(during) >= 5
+        # Одно распознавание — 500 мс; если бы оно шло в цикле событий,
+        # запросы списка ждали бы его целиком
+        assert max(during) < 250, f"GET /api/games во время загрузок: до {max(during):.0f} мс"
+        assert statistics.median(during) < 3 * statistics.median(baseline) + 50
+
+        await delete_game(client, teacher_cookie, game["id"])
@@ -0,0 +1,150 @@
+"""
+Исходные реализации алгоритмов поиска доски.
+
+Эталоны для тестов эквивалентности (tests/unit/test_board_service.py)
+и для сравнения скорости в бенчмарках (benchmarks/).
+"""
+
+import bisect
+
+import cv2
+import numpy as np
+
+from services.board_service import _find_grid_peaks
+
+
+def checkerboard_ratio_legacy(squares):
+    """
+    Исходная реализация _verify_checkerboard, возвращающая долю
+    совпавших клеток (None, если клеток не хватает).
+    """
+    vals = {}
+    for row in range(8):
+        for col in range(8):
+            name = f"{chr(ord('a') + col)}{8 - row}"
+            img = squares.get(name)
+            if img is None or img.size == 0:
+                return None
+            gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY) if len(img.shape) == 3 else img
+            vals[(row, col)] = np.mean(gray)
+
+    best_ratio = 0
+    for parity in (0, 1):
+        group_a = [v for (r, c), v in vals.items() if (c + r) % 2 == parity]
+        group_b = [v for (r, c), v in vals.items() if (c + r) % 2 != parity]
+
+        avg_a = np.mean(group_a)
+        avg_b = np.mean(group_b)
+
+        if abs(avg_a - avg_b) < 20:
+            continue
+
+        mid = (avg_a + avg_b) / 2
+        correct = sum(
+            1 for (r, c), v in vals.items()
+            if ((c + r) % 2 == parity) == (v > mid)
+        )
+        best_ratio = max(best_ratio, correct / 64)
+
+    return best_ratio
+
+
+def find_grid_peaks_legacy(profile):
+    """
+    Исходная реализация _find_grid_peaks (цикл по пикселям + bisect).
+
+    Используется как эталон для сравнения скорости и результата.
+    """
+    n = len(profile)
+    window = max(3, n // 80)
+
+    peaks = []
+    for i in range(window, n - window):
+        if profile[i] >= np.max(profile[max(0, i - window):min(n, i + window + 1)]):
+            peaks.append((i, profile[i]))
+
+    if len(peaks) < 9:
+        return None
+
+    top_peaks = sorted([p[0] for p in sorted(peaks, key=lambda x: x[1], reverse=True)[:30]])
+
+    best_score = -float('inf')
+    best_span = 0
+    best_matched = None
+
+    for i in range(len(top_peaks)):
+        for j in range(i + 1, len(top_peaks)):
+            span = top_peaks[j] - top_peaks[i]
+            spacing = span / 8
+
+            if span < n * 0.5:
+                continue
+
+            matched = []
+            threshold = spacing * 0.15
+            for k in range(9):
+                expected = top_peaks[i] + k * spacing
+                idx = bisect.bisect_left(top_peaks, expected)
+                best_match = None
+                best_dist = threshold
+                for ci in (idx - 1, idx):
+                    if 0 <= ci < len(top_peaks):
+                        dist = abs(top_peaks[ci] - expected)
+                        if dist < best_dist:
+                            best_dist = dist
+                            best_match = top_peaks[ci]
+                if best_match is not None:
+                    matched.append(best_match)
+
+            if len(matched) < 9:
+                continue
+
+            spacings = [matched[k + 1] - matched[k] for k in range(8)]
+            mean_sp = np.mean(spacings)
+            if mean_sp == 0:
+                continue
+            cv = np.std(spacings) / mean_sp
+            if cv > 0.10:
+                continue
+
+            score = -cv
+            if score > best_score or (np.isclose(score, best_score) and span > best_span):
+                best_score = score
+                best_span = span
+                best_matched = matched
+
+    return best_matched
+
+
+def synthetic_profile(n, seed=0):
+    """
+    Синтетический профиль длины n: 9 равноотстоящих пиков на шумном фоне.
+    """
+    rng = np.random.default_rng(seed)
+    x = np.arange(n)
+    profile = rng.random(n) * 50
+    start, step = n * 0.08, n * 0.84 / 8
+    for k in range(9):
+        profile += 400 * np.exp(-0.5 * ((x - (start + k * step)) / max(1.0, n / 800)) ** 2)
+    return profile
+
+
+def find_grid_lines_legacy(image):
+    """Исходная реализация: полноразмерные градиенты CV_64F."""
+    gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+
+    grad_x = np.abs(cv2.Sobel(gray, cv2.CV_64F, 1, 0, ksize=3))
+    grad_y = np.abs(cv2.Sobel(gray, cv2.CV_64F, 0, 1, ksize=3))
+
+    row_lines = _find_grid_peaks(np.sum(grad_y, axis=1))
+    col_lines = _find_grid_peaks(np.sum(grad_x, axis=0))
+
+    if row_lines is None or col_lines is None:
+        return None
+
+    row_span = row_lines[-1] - row_lines[0]
+    col_span = col_lines[-1] - col_lines[0]
+    if min(row_span, col_span) / max(row_span, col_span) < 0.8:
+        return None
+
+    return row_lines, col_lines
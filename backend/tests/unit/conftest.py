@@ -0,0 +1,35 @@
+"""
+Общие фикстуры юнит-тестов.
+"""
+import threading
+
+import pytest
+
+from services.ml import board_model, cascade, classifier
+from tests.helpers import build_tiny_model
+
+
+@pytest.fixture(autouse=True)
+def model_state(monkeypatch):
+    """
+    Каждый тест начинает с незагруженными моделями: бэкенды,
+    подставленные тестом, после него не остаются в модулях.
+    """
+    monkeypatch.setattr(classifier, "backend", None)
+    monkeypatch.setattr(classifier, "_ready", threading.Event())
+    monkeypatch.setattr(classifier, "_load_error", None)
+    monkeypatch.setattr(cascade, "small_backend", None)
+    monkeypatch.setattr(board_model, "model", None)
+    monkeypatch.setattr(board_model, "_infer", None)
+
+
+@pytest.fixture
+def tiny_model(tmp_path, monkeypatch):
+    """Маленькая модель (build_tiny_model) в роли рабочей модели классификатора."""
+    model = build_tiny_model()
+    path = tmp_path / "model.keras"
+    model.save(path)
+
+    monkeypatch.setattr(classifier, "MODEL_PATH", str(path))
+    monkeypatch.setattr(classifier.settings, "INFERENCE_BACKEND", "keras")
+    return model
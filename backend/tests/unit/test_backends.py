@@ -0,0 +1,63 @@
+"""
+Юнит-тесты для backends.py и export.py (среды выполнения модели).
+"""
+import numpy as np
+import pytest
+from tensorflow import keras
+
+from services.ml import CLASS_NAMES
+from services.ml.backends import BACKENDS, create_backend
+from services.ml.export import PARITY_TOLERANCE, check_parity, export_model
+
+
+@pytest.fixture(scope="module")
+def exported_model(tmp_path_factory):
+    """
+    Маленькая модель со структурой рабочей (Rescaling, свёртки,
+    Flatten, Dense), экспортированная во все форматы.
+    """
+    pytest.importorskip("onnxruntime")
+    pytest.importorskip("tf2onnx")
+
+    inputs = keras.Input(shape=(180, 180, 3))
+    x = keras.layers.Rescaling(1. / 255)(inputs)
+    x = keras.layers.Conv2D(4, 3, strides=2, activation="relu")(x)
+    x = keras.layers.MaxPooling2D(pool_size=2)(x)
+    x = keras.layers.Conv2D(8, 3, strides=2, activation="relu")(x)
+    x = keras.layers.Flatten()(x)
+    outputs = keras.layers.Dense(len(CLASS_NAMES), activation="softmax")(x)
+
+    path = tmp_path_factory.mktemp("model") / "model.keras"
+    keras.Model(inputs, outputs).save(path)
+    export_model(str(path))
+    return str(path)
+
+
+class TestBackends:
+
+    def test_unknown_backend(self):
+        """Неизвестное имя бэкенда — ValueError."""
+        with pytest.raises(ValueError):
+            create_backend("caffe", "model.caffemodel")
+
+
+    def test_export_parity(self, exported_model):
+        """Все бэкенды дают те же вероятности, что Keras."""
+        diffs = check_parity(exported_model)
+
+        assert set(diffs) == {"tflite", "onnx", "opencv"}
+        for name, diff in diffs.items():
+            assert diff <= PARITY_TOLERANCE, name
+
+
+    @pytest.mark.parametrize("name", ["keras", "tflite", "onnx", "opencv"])
+    @pytest.mark.parametrize("n", [3, 70])
+    def test_predict_shape_for_any_batch(self, exported_model, name, n):
+        """Неполные и большие батчи обрабатываются без потери клеток."""
+        backend = create_backend(name, exported_model.replace(".keras", BACKENDS[name].suffix))
+        batch = np.random.default_rng(n).integers(0, 256, (n, 180, 180, 3), dtype=np.uint8)
+
+        result = backend.predict(batch)
+
+        assert result.shape == (n, len(CLASS_NAMES))
+        np.testing.assert_allclose(result[:3], backend.predict(batch[:3]), atol=1e-6)
@@ -0,0 +1,137 @@
+"""
+Юнит-тесты для batcher.py (объединение батчей классификатора).
+"""
+import threading
+import time
+
+import numpy as np
+import pytest
+
+from config import settings
+from services.board_service import BoardSquares, SQUARE_SIZE
+from services.ml import batcher as batcher_module, classifier, predict_all_squares
+from services.ml.batcher import MicroBatcher
+from tests.helpers import FakeBackend
+
+
+class RecordingModel:
+    """Модель-заглушка: «вероятность» клетки — её первый пиксель; запоминает батчи."""
+
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        self.batches = []
+
+    def predict(self, batch):
+        self.batches.append(len(batch))
+        time.sleep(self.delay)
+        return batch[:, :1].astype(np.float32)
+
+
+def run_concurrently(func, inputs):
+    """Вызывает func из отдельного потока для каждого входа."""
+    results = [None] * len(inputs)
+    barrier = threading.Barrier(len(inputs))
+
+    def call(i):
+        barrier.wait()
+        results[i] = func(inputs[i])
+
+    threads = [threading.Thread(target=call, args=(i,)) for i in range(len(inputs))]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return results
+
+
+class TestMicroBatcher:
+
+    def test_concurrent_calls_share_forward_pass(self):
+        """Одновременные запросы проходят через модель одним батчем, результаты возвращаются своим."""
+        model = RecordingModel()
+        batcher = MicroBatcher(model.predict, max_size=64, max_wait_ms=200)
+        batches = [np.full((n, 2), i, dtype=np.uint8) for i, n in enumerate((3, 5, 7, 9))]
+        try:
+            results = run_concurrently(batcher.predict, batches)
+        finally:
+            batcher.close()
+
+        assert model.batches == [24]
+        for i, (batch, result) in enumerate(zip(batches, results)):
+            assert result.shape == (len(batch), 1)
+            assert (result == i).all()
+
+        stats = batcher.stats.snapshot()
+        assert stats["batches"] == 1
+        assert stats["requests"] == 4
+        assert stats["mean_fill"] == pytest.approx(24 / 64)
+
+
+    def test_max_size_splits_batches(self):
+        """Запрос, не помещающийся в батч, уходит в следующий; батч размером max_size проходит один."""
+        model = RecordingModel()
+        batcher = MicroBatcher(model.predict, max_size=10, max_wait_ms=200)
+        try:
+            results = run_concurrently(batcher.predict, [np.zeros((6, 2), np.uint8)] * 3)
+            assert model.batches == [6, 6, 6]
+            assert all(len(r) == 6 for r in results)
+
+            model.batches.clear()
+            assert len(batcher.predict(np.zeros((10, 2), np.uint8))) == 10
+            assert model.batches == [10]
+        finally:
+            batcher.close()
+
+
+    def test_single_request_waits_at_most_max_wait(self):
+        """Одиночный запрос ждёт других не дольше max_wait_ms."""
+        batcher = MicroBatcher(RecordingModel().predict, max_size=64, max_wait_ms=20)
+        try:
+            start = time.perf_counter()
+            batcher.predict(np.zeros((4, 2), np.uint8))
+            elapsed = time.perf_counter() - start
+        finally:
+            batcher.close()
+
+        assert 0.015 <= elapsed < 0.5
+        assert batcher.stats.snapshot()["wait_ms_p50"] >= 15
+
+
+    def test_error_reaches_every_caller(self):
+        """Ошибка модели передаётся всем запросам батча, поток продолжает работу."""
+        def failing(batch):
+            raise RuntimeError("модель не загружена")
+
+        batcher = MicroBatcher(failing, max_size=64, max_wait_ms=5)
+        try:
+            for _ in range(2):
+                with pytest.raises(RuntimeError):
+                    batcher.predict(np.zeros((4, 2), np.uint8))
+        finally:
+            batcher.close()
+
+
+    def test_concurrent_boards_share_forward_pass(self, monkeypatch):
+        """Одновременные доски проходят через модель за меньшее число вызовов бэкенда, чем досок."""
+        backend = FakeBackend("wP")
+        classifier.backend = backend
+        monkeypatch.setattr(settings, "RECOGNITION_MODE", "squares")
+        monkeypatch.setattr(settings, "TTA_CONFIDENCE", 0)
+        monkeypatch.setattr(settings, "MICROBATCH_MAX_SIZE", 256)
+        monkeypatch.setattr(settings, "MICROBATCH_MAX_WAIT_MS", 200)
+        batcher = MicroBatcher(batcher_module._predict_with_model, max_size=256, max_wait_ms=200)
+        monkeypatch.setattr(batcher_module, "micro_batcher", batcher)
+
+        rng = np.random.default_rng(0)
+        boards = [
+            BoardSquares(rng.integers(0, 256, (64, SQUARE_SIZE, SQUARE_SIZE, 3), dtype=np.uint8))
+            for _ in range(4)
+        ]
+        try:
+            results = run_concurrently(predict_all_squares, boards)
+        finally:
+            batcher.close()
+
+        assert backend.calls == [256]
+        assert all(set(result.values()) == {"wP"} for result in results)
+
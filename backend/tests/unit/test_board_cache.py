@@ -0,0 +1,94 @@
+"""
+Юнит-тесты для board_cache.py (кэш геометрии доски).
+"""
+from pathlib import Path
+
+import cv2
+import numpy as np
+import pytest
+
+from services.board_cache import BoardGeometryCache, board_geometry_cache
+from services.board_service import process_board_image
+
+TEST_IMAGE_PATH = Path(__file__).parent.parent / "test_img.png"
+
+
+class TestBoardGeometryCache:
+
+    def test_lru_eviction(self):
+        """Сверх max_size вытесняется самая давно использованная запись."""
+        cache = BoardGeometryCache(max_size=2, ttl=60)
+        cache.put(1, "g1")
+        cache.put(2, "g2")
+        cache.get(1)
+        cache.put(3, "g3")
+
+        assert cache.get(2) is None
+        assert cache.get(1) == "g1"
+        assert cache.get(3) == "g3"
+        assert cache.stats()["evictions"] == 1
+
+
+    def test_ttl_expiry(self):
+        """Запись с истёкшим временем жизни считается промахом."""
+        cache = BoardGeometryCache(max_size=2, ttl=0)
+        cache.put(1, "g1")
+
+        assert cache.get(1) is None
+        assert cache.stats() == {"size": 0, "hits": 0, "misses": 1, "rejections": 0, "evictions": 0}
+
+
+    def test_confirm_and_reject_counters(self):
+        """confirm считает попадания, reject удаляет запись."""
+        cache = BoardGeometryCache(max_size=2, ttl=60)
+        cache.put(1, "g1")
+        cache.confirm(1)
+        cache.reject(1)
+
+        stats = cache.stats()
+        assert stats["hits"] == 1
+        assert stats["rejections"] == 1
+        assert cache.get(1) is None
+
+
+class TestProcessWithCache:
+
+    @pytest.fixture(autouse=True)
+    def clear_cache(self):
+        board_geometry_cache.clear()
+        yield
+        board_geometry_cache.clear()
+
+
+    def test_repeat_snapshot_uses_cached_geometry(self):
+        """Повторный снимок той же партии берёт геометрию из кэша."""
+        image_bytes = TEST_IMAGE_PATH.read_bytes()
+
+        first = process_board_image(image_bytes, cache_key=1)
+        second = process_board_image(image_bytes, cache_key=1)
+
+        stats = board_geometry_cache.stats()
+        assert stats["misses"] == 1
+        assert stats["hits"] == 1
+        diff = np.abs(first.batch.astype(int) - second.batch.astype(int)).mean()
+        assert diff < 2
+
+
+    def test_moved_board_falls_back_to_detection(self):
+        """Если доска сдвинулась, геометрия отклоняется и доска ищется заново."""
+        image = cv2.imread(str(TEST_IMAGE_PATH))
+        h, w = image.shape[:2]
+
+        def snapshot(offset):
+            canvas = np.full((h + 100, w + 100, 3), (20, 40, 60), dtype=np.uint8)
+            canvas[offset:offset + h, offset:offset + w] = image
+            return cv2.imencode(".png", canvas)[1].tobytes()
+
+        process_board_image(snapshot(0), cache_key=1)
+        # Сдвиг примерно на половину клетки
+        squares = process_board_image(snapshot(55), cache_key=1)
+
+        stats = board_geometry_cache.stats()
+        assert len(squares) == 64
+        assert stats["rejections"] == 1
+        assert stats["hits"] == 0
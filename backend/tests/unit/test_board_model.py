@@ -0,0 +1,136 @@
+"""
+Юнит-тесты для board_model.py (распознавание доски одним проходом).
+"""
+from pathlib import Path
+
+import cv2
+import numpy as np
+import pytest
+
+from services import board_service
+from services.board_service import BoardSquares, SQUARE_NAMES, SQUARE_SIZE, process_board_image
+from services.ml import CLASS_NAMES, predict_all_squares
+from services.ml import board_model, classifier
+from tests.helpers import make_screenshot
+
+TEST_IMAGE_PATH = Path(__file__).parent.parent / "test_img.png"
+
+
+@pytest.fixture
+def small_board_model(tmp_path, monkeypatch):
+    """Модель доски с клеткой 16 px, сохранённая как BOARD_MODEL_PATH."""
+    model = board_model.build_board_model(cell_size=16)
+    path = tmp_path / "board_model.keras"
+    model.save(path)
+
+    monkeypatch.setattr(board_model, "BOARD_MODEL_PATH", str(path))
+    return model
+
+
+class TestBoardModel:
+
+    @pytest.mark.parametrize("cell_size", [16, 64])
+    def test_output_is_8x8_grid_of_logits(self, cell_size):
+        """Выход сети — сетка 8x8 по 13 логитов для доски любого поддерживаемого размера."""
+        model = board_model.build_board_model(cell_size)
+        assert model.output_shape == (None, 8, 8, len(CLASS_NAMES))
+
+
+    def test_invalid_cell_size(self):
+        """Размер клетки не степень двойки — ValueError."""
+        with pytest.raises(ValueError):
+            board_model.build_board_model(48)
+
+
+    def test_board_from_squares_layout(self):
+        """Клетка a8 — левый верхний угол доски, h1 — правый нижний."""
+        batch = np.zeros((64, SQUARE_SIZE, SQUARE_SIZE, 3), dtype=np.uint8)
+        batch[SQUARE_NAMES.index("a8")] = 10
+        batch[SQUARE_NAMES.index("h1")] = 250
+
+        board = board_model.board_from_squares(BoardSquares(batch), cell_size=16)
+
+        assert board.shape == (128, 128, 3)
+        assert (board[:16, :16] == 10).all()
+        assert (board[-16:, -16:] == 250).all()
+        assert (board[16:32, :16] == 0).all()
+
+
+    def test_tile_boards_labels_match_cells(self):
+        """Метки синтетической доски совпадают с классами уложенных клеток."""
+        images = np.stack([np.full((30, 30, 3), label * 19, dtype=np.uint8) for label in range(13)])
+        labels = np.arange(13)
+
+        boards, grids = board_model.tile_boards(images, labels, 3, cell_size=16)
+
+        assert boards.shape == (3, 128, 128, 3) and grids.shape == (3, 8, 8)
+        cells = boards.reshape(3, 8, 16, 8, 16, 3)[:, :, 0, :, 0, 0]
+        assert (cells == grids * 19).all()
+
+
+    def test_predict_all_squares_board_mode(self, small_board_model, monkeypatch):
+        """В режиме board predict_all_squares отдаёт классы всех 64 клеток из сетки логитов."""
+        monkeypatch.setattr(classifier.settings, "RECOGNITION_MODE", "board")
+        squares = BoardSquares(np.random.default_rng(0).integers(0, 256, (64, SQUARE_SIZE, SQUARE_SIZE, 3), dtype=np.uint8))
+
+        board = board_model.board_from_squares(squares, cell_size=16)
+        cv2.cvtColor(board, cv2.COLOR_BGR2RGB, dst=board)
+        expected = np.asarray(small_board_model(board[None].astype(np.float32))).argmax(axis=-1).ravel()
+
+        result = predict_all_squares(squares)
+
+        assert list(result) == SQUARE_NAMES
+        assert [CLASS_NAMES.index(result[name]) for name in SQUARE_NAMES] == expected.tolist()
+
+
+    def test_board_mode_passes_aligned_board_to_model(self, small_board_model, monkeypatch):
+        """Выровненная доска из process_board_image подаётся в модель без сборки из клеток."""
+        monkeypatch.setattr(classifier.settings, "RECOGNITION_MODE", "board")
+        board = np.random.default_rng(0).integers(0, 256, (128, 128, 3), dtype=np.uint8)
+        squares = BoardSquares.from_board(board)
+        monkeypatch.setattr(board_model, "board_from_squares", None)
+
+        rgb = cv2.cvtColor(board, cv2.COLOR_BGR2RGB)
+        expected = np.asarray(small_board_model(rgb[None].astype(np.float32))).argmax(axis=-1).ravel()
+
+        result = predict_all_squares(squares)
+
+        assert [CLASS_NAMES.index(result[name]) for name in SQUARE_NAMES] == expected.tolist()
+        # Доска клиента не меняется (BGR -> RGB на копии)
+        assert (squares.board == board).all()
+
+
+    @pytest.mark.parametrize("image_bytes, path", [
+        (TEST_IMAGE_PATH.read_bytes(), "detected"),
+        (make_screenshot(50, 200), "screenshot"),
+    ])
+    def test_board_mode_skips_square_batch(self, image_bytes, path, monkeypatch):
+        """В режиме board доска выравнивается сразу в размер модели, батч клеток не строится."""
+        monkeypatch.setattr(board_service.settings, "RECOGNITION_MODE", "board")
+        monkeypatch.setattr(board_service, "extract_square_batch", None)
+        monkeypatch.setattr(board_service, "_cut_square_batch", None)
+
+        squares = process_board_image(image_bytes)
+
+        assert squares.path == path
+        assert squares.batch is None
+        assert squares.board.shape == (8 * board_model.CELL_SIZE, 8 * board_model.CELL_SIZE, 3)
+        assert squares["a8"].shape == (board_model.CELL_SIZE, board_model.CELL_SIZE, 3)
+        assert np.shares_memory(squares["h1"], squares.board)
+
+
+    def test_train_on_notebook_dataset_layout(self, tmp_path):
+        """Обучение на датасете клеток (train/, val/) сохраняет модель доски."""
+        for split in ("train", "val"):
+            for label, name in enumerate(CLASS_NAMES):
+                class_dir = tmp_path / "data" / split / name
+                class_dir.mkdir(parents=True)
+                cv2.imwrite(str(class_dir / "0.png"), np.full((40, 40, 3), label * 19, dtype=np.uint8))
+        out_path = tmp_path / "board_model.keras"
+
+        history = board_model.train_board_model(
+            str(tmp_path / "data"), epochs=1, boards_per_epoch=8, cell_size=16, out_path=str(out_path),
+        )
+
+        assert out_path.exists()
+        assert "val_loss" in history.history
@@ -1,12 +1,39 @@
 """
 Юнит-тесты для board_service.py (обработка изображений).
 """
+import io
 from pathlib import Path
 
 import cv2
 import numpy as np
+import pytest
+from PIL import Image, PngImagePlugin
 
-from services.board_service import process_board_image, find_board_contour, four_point_transform
+from services.board_service import (
+    process_board_image,
+    find_board_contour,
+    four_point_transform,
+    _find_grid_peaks,
+    _order_points,
+    _detect_board_contour,
+    _board_homography,
+    _locate_grid,
+    extract_square_batch,
+    find_board_grid,
+    split_board_to_squares,
+    SQUARE_NAMES,
+    SQUARE_SIZE,
+    BoardSquares,
+    cell_brightness,
+    checkerboard_score,
+    decode_image,
+    read_image_header,
+    _find_grid_lines,
+    check_image_quality,
+    ImageQualityError,
+)
+from tests.helpers import make_screenshot
+from tests.reference import checkerboard_ratio_legacy, find_grid_lines_legacy, find_grid_peaks_legacy, synthetic_profile
 
 # Путь к тестовому изображению
 TEST_IMAGE_PATH = Path(__file__).parent.parent / "test_img.png"
@@ -84,3 +111,356 @@ class TestBoardService:
 
         assert result.shape[0] == result.shape[1], "Результат не квадратный"
         assert result.shape[0] >= 200, "Результат слишком маленький"
+
+
+    def test_board_05_grid_peaks_on_synthetic_profile(self):
+        """
+        BOARD-05: _find_grid_peaks находит 9 равноотстоящих линий.
+
+        Тип: Позитивный
+        Приоритет: Средний
+        """
+        profile = synthetic_profile(3000)
+
+        lines = _find_grid_peaks(profile)
+
+        assert lines is not None
+        assert len(lines) == 9
+        spacings = np.diff(lines)
+        assert spacings.std() / spacings.mean() < 0.02
+
+
+    def test_board_06_grid_peaks_matches_legacy(self):
+        """
+        BOARD-06: векторизованный _find_grid_peaks совпадает с исходной реализацией.
+
+        Тип: Регрессионный
+        Приоритет: Высокий
+        """
+        rng = np.random.default_rng(42)
+        for seed in range(30):
+            n = int(rng.integers(100, 1500))
+            profiles = [
+                rng.random(n),
+                synthetic_profile(n, seed=seed) + rng.random(n) * 300,
+                rng.integers(0, 5, n).astype(float),
+            ]
+            for profile in profiles:
+                assert _find_grid_peaks(profile) == find_grid_peaks_legacy(profile)
+
+
+    def test_board_07_pyramid_contour_full_resolution_corners(self):
+        """
+        BOARD-07: find_board_contour на большом изображении возвращает
+        уточнённые углы в координатах исходного разрешения.
+
+        Тип: Позитивный
+        Приоритет: Высокий
+        """
+        image = np.full((3000, 4000, 3), 30, dtype=np.uint8)
+        corners = np.array([[700, 400], [3300, 500], [3200, 2700], [800, 2600]], dtype="float32")
+        cv2.fillPoly(image, [corners.astype(np.int32)], (220, 220, 220))
+        image = cv2.GaussianBlur(image, (7, 7), 0)
+
+        contour = find_board_contour(image)
+
+        assert contour is not None
+        found = _order_points(contour.reshape(4, 2).astype("float32"))
+        assert np.abs(found - corners).max() < 2.0
+
+
+    def test_board_08_pyramid_contour_on_upscaled_photo(self):
+        """
+        BOARD-08: контур реального фото находится и после увеличения в 4 раза.
+
+        Тип: Позитивный
+        Приоритет: Средний
+        """
+        image = cv2.imread(str(TEST_IMAGE_PATH))
+        big = cv2.resize(image, None, fx=4, fy=4, interpolation=cv2.INTER_CUBIC)
+
+        contour = find_board_contour(big)
+        reference = find_board_contour(big, max_side=None)
+
+        assert contour is not None and reference is not None
+        found = _order_points(contour.reshape(4, 2).astype("float32"))
+        expected = _order_points(reference.reshape(4, 2).astype("float32"))
+        # Допуск ~0.5% от стороны доски
+        assert np.abs(found - expected).max() < 20
+
+
+    @pytest.mark.parametrize("strategy", ["sequential", "otsu", "adaptive", "parallel"])
+    def test_board_09_threshold_strategies_find_board(self, strategy):
+        """
+        BOARD-09: каждая стратегия бинаризации находит доску на реальном фото.
+
+        Тип: Позитивный
+        Приоритет: Средний
+        """
+        image = cv2.imread(str(TEST_IMAGE_PATH))
+
+        contour = find_board_contour(image, strategy=strategy)
+
+        assert contour is not None
+        assert len(contour) == 4
+
+
+    def test_board_10_parallel_strategy_matches_sequential(self):
+        """
+        BOARD-10: параллельный перебор порогов даёт тот же контур и порог,
+        что и последовательный.
+
+        Тип: Регрессионный
+        Приоритет: Средний
+        """
+        image = cv2.imread(str(TEST_IMAGE_PATH))
+
+        seq_contour, seq_thresh = _detect_board_contour(image, strategy="sequential")
+        par_contour, par_thresh = _detect_board_contour(image, strategy="parallel")
+
+        assert seq_thresh == par_thresh
+        assert np.array_equal(seq_contour, par_contour)
+
+
+    def test_board_11_unknown_threshold_strategy(self):
+        """
+        BOARD-11: неизвестная стратегия бинаризации — ValueError.
+
+        Тип: Негативный
+        Приоритет: Низкий
+        """
+        image = cv2.imread(str(TEST_IMAGE_PATH))
+
+        with pytest.raises(ValueError):
+            find_board_contour(image, strategy="unknown")
+
+
+    def test_board_12_process_returns_square_batch(self):
+        """
+        BOARD-12: process_board_image возвращает клетки как представления
+        одного батча (64, 180, 180, 3).
+
+        Тип: Позитивный
+        Приоритет: Высокий
+        """
+        with open(TEST_IMAGE_PATH, "rb") as f:
+            squares = process_board_image(f.read())
+
+        assert squares.batch.shape == (64, SQUARE_SIZE, SQUARE_SIZE, 3)
+        assert squares.batch.dtype == np.uint8
+        assert list(squares) == SQUARE_NAMES
+        for i, name in enumerate(SQUARE_NAMES):
+            assert np.shares_memory(squares[name], squares.batch[i])
+
+
+    def test_board_13_fused_batch_matches_legacy_pipeline(self):
+        """
+        BOARD-13: объединённое преобразование даёт те же клетки, что
+        выравнивание в полном размере + обрезка + resize.
+
+        Тип: Регрессионный
+        Приоритет: Высокий
+        """
+        image = cv2.imread(str(TEST_IMAGE_PATH))
+        image = cv2.resize(image, None, fx=3, fy=3, interpolation=cv2.INTER_CUBIC)
+        contour = find_board_contour(image)
+
+        board, h_lines, v_lines = find_board_grid(four_point_transform(image, contour))
+        legacy = split_board_to_squares(board, h_lines, v_lines)
+        expected = np.array([cv2.resize(legacy[name], (SQUARE_SIZE, SQUARE_SIZE)) for name in SQUARE_NAMES])
+
+        M, size = _board_homography(contour)
+        row_lines, col_lines, _ = _locate_grid(image, M, size)
+        batch = extract_square_batch(image, M, row_lines, col_lines)
+
+        diff = np.abs(batch.astype(int) - expected.astype(int)).mean(axis=(1, 2, 3))
+        assert diff.max() < 10
+
+
+    def test_board_14_checkerboard_score_matches_legacy(self):
+        """
+        BOARD-14: векторная проверка шахматного паттерна даёт ту же долю,
+        что и исходная поклеточная.
+
+        Тип: Регрессионный
+        Приоритет: Высокий
+        """
+        rng = np.random.default_rng(0)
+        parity = np.add.outer(np.arange(8), np.arange(8)) % 2
+        for seed in range(20):
+            # Шахматный паттерн с шумом разной силы
+            levels = np.where(parity == seed % 2, 200, 60) + rng.normal(0, 10 + seed * 5, (8, 8))
+            batch = np.empty((64, 20, 20, 3), dtype=np.uint8)
+            batch[:] = np.clip(levels, 0, 255).reshape(64, 1, 1, 1).astype(np.uint8)
+            batch += rng.integers(0, 3, batch.shape, dtype=np.uint8)
+            squares = BoardSquares(batch)
+
+            brightness = cell_brightness(squares)
+
+            assert brightness.shape == (8, 8)
+            assert checkerboard_score(brightness) == checkerboard_ratio_legacy(squares)
+            assert checkerboard_score(cell_brightness(dict(squares))) == checkerboard_ratio_legacy(squares)
+
+
+    def test_board_15_process_exposes_brightness(self):
+        """
+        BOARD-15: process_board_image отдаёт матрицу яркости клеток
+        с шахматным чередованием.
+
+        Тип: Позитивный
+        Приоритет: Средний
+        """
+        with open(TEST_IMAGE_PATH, "rb") as f:
+            squares = process_board_image(f.read())
+
+        assert squares.brightness.shape == (8, 8)
+        assert checkerboard_score(squares.brightness) >= 0.75
+
+
+    def test_board_16_decode_large_jpeg_reduced(self):
+        """
+        BOARD-16: большой JPEG декодируется уменьшенным, доска находится.
+
+        Тип: Позитивный
+        Приоритет: Высокий
+        """
+        image = cv2.imread(str(TEST_IMAGE_PATH))
+        photo = cv2.resize(image, (4000, 3000), interpolation=cv2.INTER_CUBIC)
+        _, encoded = cv2.imencode(".jpg", photo)
+        image_bytes = encoded.tobytes()
+
+        decoded = decode_image(image_bytes, target_side=1440)
+        full = decode_image(image_bytes, target_side=0)
+
+        assert decoded.shape[:2] == (1500, 2000)
+        assert full.shape[:2] == (3000, 4000)
+        assert len(process_board_image(image_bytes)) == 64
+
+
+    def test_board_17_decode_png_not_reduced(self):
+        """
+        BOARD-17: PNG декодируется в исходном разрешении.
+
+        Тип: Позитивный
+        Приоритет: Низкий
+        """
+        image_bytes = TEST_IMAGE_PATH.read_bytes()
+
+        decoded = decode_image(image_bytes, target_side=100)
+
+        assert decoded.shape[:2] == (891, 899)
+
+
+    def test_board_18_header_respects_exif_orientation(self):
+        """
+        BOARD-18: заголовок учитывает EXIF-поворот, imdecode поворачивает изображение.
+
+        Тип: Позитивный
+        Приоритет: Средний
+        """
+        exif = Image.Exif()
+        exif[0x0112] = 6  # поворот на 90° по часовой
+        buf = io.BytesIO()
+        Image.new("RGB", (400, 300)).save(buf, "JPEG", exif=exif.tobytes())
+        image_bytes = buf.getvalue()
+
+        header = read_image_header(image_bytes)
+
+        assert header == {"format": "JPEG", "width": 300, "height": 400, "orientation": 6}
+        assert decode_image(image_bytes).shape[:2] == (400, 300)
+        assert read_image_header(b"not an image") is None
+
+
+    @pytest.mark.parametrize("factor", [1, 3])
+    def test_board_19_reduced_grid_projection_matches_full(self, factor):
+        """
+        BOARD-19: сетка по уменьшенным int16-проекциям с уточнением
+        совпадает с сеткой по полноразмерным градиентам.
+
+        Тип: Регрессионный
+        Приоритет: Высокий
+        """
+        image = cv2.imread(str(TEST_IMAGE_PATH))
+        image = cv2.resize(image, None, fx=factor, fy=factor, interpolation=cv2.INTER_CUBIC)
+        board = four_point_transform(image, find_board_contour(image))
+
+        expected = find_grid_lines_legacy(board)
+        found = _find_grid_lines(board)
+
+        assert expected is not None and found is not None
+        assert np.abs(np.subtract(found[0], expected[0])).max() <= 2
+        assert np.abs(np.subtract(found[1], expected[1])).max() <= 2
+
+
+    def test_board_20_screenshot_fast_path(self):
+        """
+        BOARD-20: скриншот (доска выровнена по осям, заливка однородна)
+        нарезается напрямую, фотография уходит на полный поиск.
+
+        Тип: Функциональный
+        Приоритет: Высокий
+        """
+        squares = process_board_image(make_screenshot(50, 200))
+
+        assert squares.path == "screenshot"
+        center = SQUARE_SIZE // 2
+        assert tuple(squares["a8"][center, 10]) == (181, 217, 240)
+        assert tuple(squares["b8"][center, 10]) == (99, 136, 181)
+        assert tuple(squares["a8"][center, center]) == (20, 20, 20)
+
+        with open(TEST_IMAGE_PATH, "rb") as f:
+            assert process_board_image(f.read()).path == "detected"
+
+
+    @pytest.mark.parametrize("code", ["image_too_small", "image_low_contrast", "image_too_blurry"])
+    def test_board_21_quality_gate_rejects_hopeless_images(self, code):
+        """
+        BOARD-21: маленькие, однородные и сильно размытые изображения
+        отклоняются до поиска доски с кодом причины.
+
+        Тип: Негативный
+        Приоритет: Средний
+        """
+        image = cv2.imread(str(TEST_IMAGE_PATH))
+        if code == "image_too_small":
+            image = cv2.resize(image, (120, 120), interpolation=cv2.INTER_AREA)
+        elif code == "image_low_contrast":
+            image = np.full_like(image, 128)
+        else:
+            image = cv2.GaussianBlur(image, (0, 0), 40)
+        _, encoded = cv2.imencode(".png", image)
+
+        with pytest.raises(ImageQualityError) as exc_info:
+            process_board_image(encoded.tobytes())
+
+        assert exc_info.value.code == code
+        assert isinstance(exc_info.value, ValueError)
+
+
+    def test_board_22_quality_gate_accepts_test_images(self):
+        """
+        BOARD-22: тестовые фотографии проходят предварительную проверку.
+
+        Тип: Функциональный
+        Приоритет: Высокий
+        """
+        for path in (TEST_IMAGE_PATH, TEST_IMAGE_PATH_2):
+            check_image_quality(cv2.imread(str(path)))
+
+
+    def test_board_24_png_header_does_not_decode_pixels(self, monkeypatch):
+        """
+        BOARD-24: заголовок PNG читается без декодирования пикселей.
+
+        Тип: Регрессионный
+        Приоритет: Средний
+        """
+        def fail_load(self):
+            raise AssertionError("пиксели декодированы при чтении заголовка")
+
+        monkeypatch.setattr(Image.Image, "load", fail_load)
+        monkeypatch.setattr(PngImagePlugin.PngImageFile, "load", fail_load, raising=False)
+
+        header = read_image_header(TEST_IMAGE_PATH.read_bytes())
+
+        assert header == {"format": "PNG", "width": 899, "height": 891, "orientation": 1}
@@ -0,0 +1,76 @@
+"""
+Юнит-тесты для cascade.py (каскад: статистика, маленькая и большая модели).
+"""
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from services.board_service import process_board_image, SQUARE_NAMES, SQUARE_SIZE, BoardSquares
+from services.ml import predict_all_squares
+from services.ml import cascade, classifier
+from tests.helpers import FakeBackend
+
+TEST_IMAGE_PATH = Path(__file__).parent.parent / "test_img.png"
+
+# Клетки с фигурами на test_img.png
+TEST_IMAGE_PIECES = {
+    "b8", "d8", "h8", "a6", "c6", "f6", "c5", "d5", "h5",
+    "d4", "e4", "g4", "a3", "b3", "d3", "h3", "f2", "c1", "d1", "g1",
+}
+
+
+@pytest.fixture
+def cascade_backends(monkeypatch):
+    small = FakeBackend("wP", low_marker=1)
+    large = FakeBackend("bQ")
+    cascade.small_backend = small
+    classifier.backend = large
+    monkeypatch.setattr(classifier.settings, "RECOGNITION_MODE", "cascade")
+    monkeypatch.setattr(cascade, "cascade_stats", cascade.CascadeStats())
+    return small, large
+
+
+class TestCascade:
+
+    def test_empty_prefilter_on_photo(self):
+        """Ступень 0 не принимает фигуры за пустые и отсекает большинство пустых клеток."""
+        with open(TEST_IMAGE_PATH, "rb") as f:
+            squares = process_board_image(f.read())
+
+        empty = dict(zip(SQUARE_NAMES, cascade.empty_mask(squares.batch)))
+
+        assert not any(empty[name] for name in TEST_IMAGE_PIECES)
+        assert sum(empty.values()) >= 30
+
+
+    def test_routing_between_stages(self, cascade_backends):
+        """Пустые клетки решает статистика, уверенные — маленькая модель, остальные — большая."""
+        small, large = cascade_backends
+        batch = np.full((64, SQUARE_SIZE, SQUARE_SIZE, 3), 128, dtype=np.uint8)
+        noisy = np.random.default_rng(0).integers(0, 256, (SQUARE_SIZE, SQUARE_SIZE, 3), dtype=np.uint8)
+        for i in range(10):
+            batch[i] = noisy
+        batch[8:10, 0, 0, 0] = 1
+
+        result = predict_all_squares(BoardSquares(batch))
+
+        assert list(result) == SQUARE_NAMES
+        assert [result[name] for name in SQUARE_NAMES[:8]] == ["wP"] * 8
+        assert [result[name] for name in SQUARE_NAMES[8:10]] == ["bQ"] * 2
+        assert set(result[name] for name in SQUARE_NAMES[10:]) == {"empty"}
+        assert small.calls == [16] and large.calls == [8]
+        assert cascade.cascade_stats.snapshot() == {
+            "boards": 1, "stage0": 54, "stage1": 8, "stage2": 2, "large_model_ratio": 2 / 64,
+        }
+
+
+    def test_all_empty_board_skips_models(self, cascade_backends):
+        """Пустая доска вообще не доходит до моделей."""
+        small, large = cascade_backends
+        batch = np.full((64, SQUARE_SIZE, SQUARE_SIZE, 3), 200, dtype=np.uint8)
+
+        result = predict_all_squares(BoardSquares(batch))
+
+        assert set(result.values()) == {"empty"}
+        assert small.calls == [] and large.calls == []
@@ -1,9 +1,14 @@
 """
 Юнит-тесты для classifier.py (ML инференс).
 """
+import threading
+
 import numpy as np
+import pytest
+from tensorflow import keras
 
 from services.ml import CLASS_NAMES, preprocess_square
+from services.ml import classifier
 
 
 class TestClassifier:
@@ -36,3 +41,84 @@ class TestClassifier:
             assert result.shape[1:3] == (180, 180)
 
 
+
+
+    @pytest.mark.parametrize("n", [1, 5, 64, 70])
+    def test_predict_batch_matches_keras_predict(self, tiny_model, n):
+        """Скомпилированный инференс с дополнением батча совпадает с model.predict."""
+        batch = np.random.randint(0, 256, (n, 180, 180, 3), dtype=np.uint8)
+
+        expected = tiny_model.predict(batch, verbose=0)
+        result = classifier.predict_batch(batch)
+
+        assert result.shape == (n, len(CLASS_NAMES))
+        np.testing.assert_allclose(result, expected, atol=1e-5)
+
+
+    def test_load_model_once_under_concurrency(self, tiny_model, monkeypatch):
+        """Одновременные вызовы load_model загружают модель один раз."""
+        calls = []
+        load = keras.models.load_model
+        monkeypatch.setattr(keras.models, "load_model", lambda path: calls.append(path) or load(path))
+
+        threads = [threading.Thread(target=classifier.load_model) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert len(calls) == 1
+
+
+    def test_warmup_reports_ready(self, tiny_model):
+        """После прогрева модель готова, до него — загружается."""
+        assert classifier.model_status() == "loading"
+        classifier.warmup()
+        assert classifier.model_status() == "ready"
+
+
+    def test_warmup_failure_reports_error(self, tiny_model, monkeypatch):
+        """Если модель не загрузилась, готовность сообщает об ошибке."""
+        monkeypatch.setattr(classifier, "MODEL_PATH", "missing.keras")
+
+        with pytest.raises(ValueError):
+            classifier.warmup()
+
+        assert classifier.model_status() == "error"
+
+
+    def test_predict_all_squares_returns_top_k(self, tiny_model):
+        """Предсказания остаются словарём классов и несут вероятности top-k."""
+        squares = {f"{c}1": np.random.randint(0, 256, (50, 50, 3), dtype=np.uint8) for c in "abcd"}
+
+        result = classifier.predict_all_squares(squares)
+
+        assert list(result) == list(squares)
+        for name, top in result.top_k.items():
+            assert len(top) == classifier.TOP_K
+            assert top[0][0] == result[name]
+            assert top[0][1] == pytest.approx(result.confidence[name])
+            assert [p for _, p in top] == sorted((p for _, p in top), reverse=True)
+
+
+    def test_tta_refines_only_uncertain_squares(self, tiny_model, monkeypatch):
+        """Аугментации получают только неуверенные клетки, одним батчем."""
+        from services.ml import tta
+
+        batch = np.random.randint(0, 256, (6, 180, 180, 3), dtype=np.uint8)
+        probabilities = np.full((6, len(CLASS_NAMES)), 0.01, dtype=np.float32)
+        probabilities[:, 0] = 0.88
+        probabilities[[1, 4], 0] = 0.3
+        calls = []
+        predict = tta.predict_batch
+        monkeypatch.setattr(tta, "predict_batch", lambda views: calls.append(len(views)) or predict(views))
+
+        refined, unsure = tta.refine(batch, probabilities, threshold=0.5)
+
+        assert unsure.tolist() == [1, 4]
+        assert calls == [2 * tta.TTA_VIEWS]
+        np.testing.assert_array_equal(refined[[0, 2, 3, 5]], probabilities[[0, 2, 3, 5]])
+        # Исходные вероятности и TTA_VIEWS распределений видов усреднены
+        expected = (probabilities[[1, 4]].sum(axis=1) + tta.TTA_VIEWS) / (tta.TTA_VIEWS + 1)
+        np.testing.assert_allclose(refined[[1, 4]].sum(axis=1), expected, rtol=1e-4)
+        assert tta.augment(batch[0]).shape == (tta.TTA_VIEWS, 180, 180, 3)
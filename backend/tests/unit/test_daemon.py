@@ -0,0 +1,213 @@
+"""
+Юнит-тесты для daemon.py (демон инференса на Unix-сокете).
+"""
+import multiprocessing
+import os
+import stat
+import threading
+
+import numpy as np
+import pytest
+
+from config import settings
+from services.ml.backends import create_backend
+from services.ml.batcher import MicroBatcher
+from services.ml.daemon import DaemonClient, InferenceDaemon, InferenceDaemonError
+
+CLASSES = 13
+
+
+class FakeModel:
+    """Модель-заглушка: в каждом классе — первый пиксель клетки; запоминает батчи."""
+
+    def __init__(self):
+        self.batches = []
+
+    def predict(self, batch):
+        self.batches.append(batch)
+        return np.repeat(batch[:, 0, 0, :1].astype(np.float32), CLASSES, axis=1)
+
+
+def start_daemon(socket_path, predict):
+    server = InferenceDaemon(str(socket_path), predict, CLASSES, {"backend": "fake"})
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server
+
+
+def squares(values):
+    batch = np.zeros((len(values), 180, 180, 3), dtype=np.uint8)
+    batch[:, 0, 0, 0] = values
+    return batch
+
+
+def predict_in_process(socket_path, barrier, value, results):
+    """Клиент в отдельном процессе (воркер): одна доска с первым пикселем value."""
+    client = DaemonClient(socket_path, timeout=10)
+    try:
+        barrier.wait()
+        results.put((value, client.predict(squares([value] * 64))[:, 0].tolist()))
+    finally:
+        client.close()
+
+
+@pytest.fixture
+def socket_path(tmp_path):
+    return str(tmp_path / "inference.sock")
+
+
+@pytest.fixture
+def model(socket_path):
+    model = FakeModel()
+    server = start_daemon(socket_path, model.predict)
+    yield model
+    server.shutdown()
+    server.server_close()
+
+
+class TestInferenceDaemon:
+
+    def test_predict_through_shared_memory(self, model, socket_path):
+        """Батч попадает в модель демона из разделяемой памяти, результат возвращается клиенту."""
+        client = DaemonClient(socket_path, timeout=5)
+        try:
+            assert client.info["backend"] == "fake"
+            result = client.predict(squares([1, 2, 3]))
+        finally:
+            client.close()
+
+        np.testing.assert_array_equal(result[:, 0], [1, 2, 3])
+        assert result.shape == (3, CLASSES)
+        # Демон получил представление сегмента, а не копию из сообщения
+        assert not model.batches[0].flags.owndata
+
+
+    def test_backend_splits_large_batches(self, model, socket_path, monkeypatch):
+        """Бэкенд daemon обрабатывает батчи больше сегмента по умолчанию."""
+        monkeypatch.setattr(settings, "INFERENCE_DAEMON_SOCKET", socket_path)
+        backend = create_backend("daemon", "model.keras")
+        values = np.arange(70) % 256
+        try:
+            result = backend.predict(squares(values))
+        finally:
+            backend.client.close()
+
+        np.testing.assert_array_equal(result[:, 0], values)
+        assert [len(b) for b in model.batches] == [64, 6]
+
+
+    def test_batches_across_clients(self, socket_path):
+        """С объединением батчей одновременные клиенты проходят через модель одним батчем."""
+        model = FakeModel()
+        batcher = MicroBatcher(model.predict, max_size=64, max_wait_ms=200)
+        server = start_daemon(socket_path, batcher.predict)
+        clients = [DaemonClient(socket_path, timeout=5) for _ in range(3)]
+        results = [None] * 3
+        barrier = threading.Barrier(3)
+
+        def call(i):
+            barrier.wait()
+            results[i] = clients[i].predict(squares([i + 1] * 4))
+
+        try:
+            threads = [threading.Thread(target=call, args=(i,)) for i in range(3)]
+            for t in threads:
+                t.start()
+            for t in threads:
+                t.join()
+        finally:
+            for client in clients:
+                client.close()
+            batcher.close()
+            server.shutdown()
+            server.server_close()
+
+        assert [len(b) for b in model.batches] == [12]
+        for i, result in enumerate(results):
+            assert (result == i + 1).all()
+
+
+    def test_errors_are_reported(self, socket_path):
+        """Ошибка модели и недоступный демон дают InferenceDaemonError."""
+        with pytest.raises(InferenceDaemonError):
+            DaemonClient(socket_path, timeout=1)
+
+        def failing(batch):
+            raise RuntimeError("модель не загружена")
+
+        server = start_daemon(socket_path, failing)
+        client = DaemonClient(socket_path, timeout=5)
+        try:
+            with pytest.raises(InferenceDaemonError, match="модель не загружена"):
+                client.predict(squares([1]))
+            # Соединение остаётся рабочим
+            assert client._call({"op": "info"})["classes"] == CLASSES
+        finally:
+            client.close()
+            server.shutdown()
+            server.server_close()
+
+
+    def test_close_removes_segments(self, model, socket_path):
+        """close() удаляет сегменты разделяемой памяти клиента."""
+        client = DaemonClient(socket_path, timeout=5)
+        client.predict(squares([1]))
+        name = client._local.shm.name.lstrip("/")
+        assert os.path.exists(f"/dev/shm/{name}")
+
+        client.close()
+
+        assert not os.path.exists(f"/dev/shm/{name}")
+
+
+    def test_batches_across_processes(self, socket_path):
+        """Доски двух процессов-клиентов проходят через модель демона одним батчем."""
+        model = FakeModel()
+        batcher = MicroBatcher(model.predict, max_size=256, max_wait_ms=1000)
+        server = start_daemon(socket_path, batcher.predict)
+        context = multiprocessing.get_context("spawn")
+        barrier = context.Barrier(2)
+        results = context.Queue()
+        workers = [
+            context.Process(target=predict_in_process, args=(socket_path, barrier, value, results))
+            for value in (1, 2)
+        ]
+        try:
+            for worker in workers:
+                worker.start()
+            received = dict(results.get(timeout=60) for _ in workers)
+            for worker in workers:
+                worker.join(timeout=10)
+        finally:
+            batcher.close()
+            server.shutdown()
+            server.server_close()
+
+        assert [len(b) for b in model.batches] == [128]
+        assert received == {1: [1.0] * 64, 2: [2.0] * 64}
+        assert all(worker.exitcode == 0 for worker in workers)
+
+
+    def test_socket_and_segments_are_private(self, model, socket_path):
+        """Сокет доступен только владельцу, чужие сегменты демон не открывает."""
+        assert stat.S_IMODE(os.stat(socket_path).st_mode) == 0o600
+
+        client = DaemonClient(socket_path, timeout=5)
+        try:
+            with pytest.raises(InferenceDaemonError, match="не принадлежит"):
+                client._call({"op": "predict", "shm": "psm_other", "count": 1})
+        finally:
+            client.close()
+        assert model.batches == []
+
+
+    def test_only_socket_files_are_replaced(self, tmp_path):
+        """Файл другого типа по пути сокета не удаляется."""
+        path = tmp_path / "inference.sock"
+        path.write_text("data")
+
+        with pytest.raises(OSError):
+            InferenceDaemon(str(path), FakeModel().predict, CLASSES)
+
+        assert path.read_text() == "data"
+
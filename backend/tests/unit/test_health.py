@@ -0,0 +1,82 @@
+"""
+Юнит-тесты для запуска приложения и роутера проверок состояния (/api/health).
+"""
+import asyncio
+
+import pytest
+from httpx import ASGITransport, AsyncClient
+
+from app import app, lifespan
+from config import settings
+from services.board_cache import board_geometry_cache
+from services.ml import classifier
+
+
+def get(path):
+    """GET-запрос к приложению без запуска lifespan."""
+    async def request():
+        async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+            return await client.get(path)
+
+    return asyncio.run(request())
+
+
+def start_app():
+    """Запускает и останавливает приложение (lifespan), дожидаясь прогрева."""
+    async def start():
+        async with lifespan(app):
+            pass
+
+    asyncio.run(start())
+
+
+class TestStartup:
+
+    def test_warmup_at_startup_makes_app_ready(self, tiny_model):
+        """Запуск приложения загружает и прогревает модель, /ready отвечает 200."""
+        assert get("/api/health/ready").status_code == 503
+
+        start_app()
+
+        response = get("/api/health/ready")
+        assert response.status_code == 200
+        assert response.json() == {"status": "ready"}
+
+
+    def test_unknown_strategy_in_settings_stops_startup(self, monkeypatch):
+        """Неизвестная стратегия бинаризации в настройках останавливает запуск приложения."""
+        monkeypatch.setattr(settings, "BOARD_THRESHOLD_STRATEGY", "unknown")
+
+        with pytest.raises(ValueError, match="unknown"):
+            start_app()
+
+
+class TestHealth:
+
+    def test_ready_reports_loading_and_error(self, monkeypatch):
+        """/api/health/ready отвечает 503 со состоянием, пока модель не готова."""
+        response = get("/api/health/ready")
+        assert response.status_code == 503
+        assert response.json() == {"status": "loading"}
+
+        monkeypatch.setattr(classifier, "_load_error", RuntimeError("нет файла модели"))
+
+        response = get("/api/health/ready")
+        assert response.status_code == 503
+        assert response.json() == {"status": "error"}
+
+
+    def test_board_cache_counters(self):
+        """/api/health/board-cache отдаёт счётчики кэша геометрии доски."""
+        board_geometry_cache.clear()
+        try:
+            board_geometry_cache.get("game")
+            board_geometry_cache.put("game", object())
+            board_geometry_cache.confirm("game")
+
+            response = get("/api/health/board-cache")
+        finally:
+            board_geometry_cache.clear()
+
+        assert response.status_code == 200
+        assert response.json() == {"size": 1, "hits": 1, "misses": 1, "rejections": 0, "evictions": 0}
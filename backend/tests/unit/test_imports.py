@@ -0,0 +1,69 @@
+"""
+Тесты импорта: TensorFlow не должен попадать в путь импорта кода,
+который не распознаёт доски.
+"""
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+BACKEND_DIR = Path(__file__).parent.parent.parent
+
+# Модули среды выполнения модели: их импорт стоит секунды
+INFERENCE_MODULES = ("tensorflow", "keras", "tf2onnx", "onnxruntime", "ai_edge_litert")
+
+# Бюджет на импорт ML-фасада и его подмодулей (без зависимостей
+# вроде NumPy и OpenCV, которые нужны и поиску доски); импорт
+# TensorFlow занимает секунды и в бюджет не укладывается
+ML_IMPORT_BUDGET_MS = 300
+
+
+def import_times(code):
+    """
+    Запускает code в новом процессе с -X importtime.
+
+    Returns:
+        dict: {модуль: собственное время импорта, мкс}
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=BACKEND_DIR, capture_output=True, text=True, check=True,
+    )
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        self_us, _, name = line[len("import time:"):].split("|")
+        if self_us.strip().isdigit():
+            times[name.strip()] = int(self_us)
+    return times
+
+
+def imported(times, packages):
+    return sorted(name for name in times if name.split(".")[0] in packages)
+
+
+class TestImports:
+
+    def test_non_recognition_paths_skip_ml(self):
+        """Пользователи и партии не импортируют ни ML-модуль, ни OpenCV."""
+        times = import_times("import services, services.user_service, services.game_service, auth")
+
+        assert imported(times, INFERENCE_MODULES) == []
+        assert imported(times, ("cv2",)) == []
+        assert not any(name.startswith("services.ml") for name in times)
+
+
+    @pytest.mark.parametrize("code", [
+        "import services.board_service",
+        "import app",
+        "from services.ml import predict_all_squares, model_registry, cascade_stats, template_index",
+    ])
+    def test_recognition_import_defers_tensorflow(self, code):
+        """Поиск доски и само приложение не импортируют TensorFlow: модель грузится при прогреве."""
+        times = import_times(code)
+
+        assert imported(times, INFERENCE_MODULES) == []
+        ml_ms = sum(us for name, us in times.items() if name.startswith("services.ml")) / 1000
+        assert ml_ms < ML_IMPORT_BUDGET_MS
@@ -0,0 +1,63 @@
+"""
+Юнит-тесты для numpy_engine.py (инференс model_1 на NumPy).
+"""
+import numpy as np
+import pytest
+from tensorflow import keras
+
+from tests.helpers import build_model_1
+from services.ml.backends import create_backend
+from services.ml.numpy_engine import NumpyModel, conv2d, export_npz
+
+
+class TestNumpyEngine:
+
+    def test_model_1_parity_with_keras(self, tmp_path):
+        """Архитектура model_1: вероятности совпадают с Keras."""
+        keras.utils.set_random_seed(0)
+        model = build_model_1()
+        path = export_npz(model, tmp_path / "model.npz")
+        batch = np.random.default_rng(0).integers(0, 256, (10, 180, 180, 3), dtype=np.uint8)
+
+        expected = model.predict(batch.astype(np.float32), verbose=0)
+        result = NumpyModel.load(path).predict(batch)
+
+        assert result.dtype == np.float32
+        np.testing.assert_allclose(result, expected, atol=1e-5)
+        assert (result.argmax(axis=1) == expected.argmax(axis=1)).all()
+
+
+    @pytest.mark.parametrize("padding", ["valid", "same"])
+    @pytest.mark.parametrize("strides", [1, 2])
+    def test_conv2d_matches_keras(self, padding, strides):
+        """Свёртка через im2col совпадает с Conv2D для обоих padding и шагов."""
+        layer = keras.layers.Conv2D(5, 3, strides=strides, padding=padding)
+        x = np.random.default_rng(1).standard_normal((2, 11, 13, 4)).astype(np.float32)
+        expected = np.asarray(layer(x))
+
+        kernel, bias = layer.get_weights()
+        result = conv2d(x, kernel, bias, (strides, strides), padding)
+
+        np.testing.assert_allclose(result, expected, atol=1e-5)
+
+
+    def test_numpy_backend(self, tmp_path):
+        """Бэкенд numpy отдаёт вероятности для любого размера батча."""
+        keras.utils.set_random_seed(0)
+        path = export_npz(build_model_1(), tmp_path / "model.npz")
+        backend = create_backend("numpy", path)
+
+        result = backend.predict(np.zeros((3, 180, 180, 3), dtype=np.uint8))
+
+        assert result.shape == (3, 13)
+        np.testing.assert_allclose(result.sum(axis=1), 1, atol=1e-5)
+
+
+    def test_unsupported_layer(self, tmp_path):
+        """Модель с неподдерживаемым слоем не экспортируется."""
+        inputs = keras.Input(shape=(180, 180, 3))
+        x = keras.layers.BatchNormalization()(inputs)
+        outputs = keras.layers.Dense(13)(keras.layers.Flatten()(x))
+
+        with pytest.raises(ValueError):
+            export_npz(keras.Model(inputs, outputs), tmp_path / "model.npz")
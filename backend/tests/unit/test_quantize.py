@@ -0,0 +1,66 @@
+"""
+Юнит-тесты для quantize.py (INT8-квантование с проверкой точности).
+"""
+import cv2
+import numpy as np
+import pytest
+
+from services.ml import CLASS_NAMES
+from services.ml.quantize import AccuracyGateError, load_split, quantize_model
+from tests.helpers import build_tiny_model
+
+
+@pytest.fixture(scope="module")
+def model_and_data(tmp_path_factory):
+    """Маленькая модель и датасет из train/ и test/ по 13 классам."""
+    root = tmp_path_factory.mktemp("quantize")
+    rng = np.random.default_rng(0)
+    for split in ("train", "test"):
+        for label, name in enumerate(CLASS_NAMES):
+            class_dir = root / "data" / split / name
+            class_dir.mkdir(parents=True)
+            for i in range(2):
+                image = np.full((90, 90, 3), label * 18, dtype=np.uint8)
+                image += rng.integers(0, 10, image.shape, dtype=np.uint8)
+                cv2.imwrite(str(class_dir / f"{i}.png"), image)
+
+    model_path = root / "model.keras"
+    build_tiny_model().save(model_path)
+    return str(model_path), str(root / "data")
+
+
+class TestQuantize:
+
+    def test_load_split_labels_in_class_order(self, model_and_data):
+        """Классы нумеруются по алфавиту, изображения — 180x180 uint8."""
+        _, data_dir = model_and_data
+        images, labels = load_split(f"{data_dir}/test")
+
+        assert images.shape == (26, 180, 180, 3) and images.dtype == np.uint8
+        assert labels.tolist() == [label for label in range(13) for _ in range(2)]
+
+
+    def test_publishes_within_tolerance(self, model_and_data, tmp_path):
+        """INT8-модель в пределах допуска публикуется, отчёт содержит метрики."""
+        model_path, data_dir = model_and_data
+        out_path = tmp_path / "model.int8.tflite"
+
+        report = quantize_model(model_path, data_dir, tolerance=1.0, out_path=str(out_path))
+
+        assert report["published"] and out_path.exists()
+        assert 0 <= report["int8_accuracy"] <= 1 and 0 <= report["float_accuracy"] <= 1
+        for kind in ("float", "int8"):
+            assert report[kind]["latency_ms"] > 0
+            assert report[kind]["size_mb"] > 0
+        assert report["int8"]["size_mb"] < report["float"]["size_mb"]
+
+
+    def test_gate_refuses_to_publish(self, model_and_data, tmp_path):
+        """Если точность упала больше допуска, файл модели не появляется."""
+        model_path, data_dir = model_and_data
+        out_path = tmp_path / "model.int8.tflite"
+
+        with pytest.raises(AccuracyGateError):
+            quantize_model(model_path, data_dir, tolerance=-1.0, out_path=str(out_path))
+
+        assert list(tmp_path.iterdir()) == []
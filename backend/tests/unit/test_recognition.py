@@ -0,0 +1,173 @@
+"""
+Юнит-тесты для recognition.py (исполнитель распознавания).
+"""
+import asyncio
+import io
+import threading
+import time
+from types import SimpleNamespace
+from unittest.mock import Mock
+
+import pytest
+from fastapi import HTTPException, UploadFile
+
+from config import settings
+from db import GameStatus
+from routers import games
+from services import recognition
+from services.recognition import RecognitionBusyError, RecognitionExecutor
+
+
+def blocking_job(seconds):
+    """Задача, которая держит поток, как поиск доски и нейросеть."""
+    time.sleep(seconds)
+    return seconds
+
+
+async def max_tick_lag(task, interval=0.01):
+    """Наибольшая задержка тиков цикла событий, пока выполняется task."""
+    lag = 0.0
+    while not task.done():
+        start = time.perf_counter()
+        await asyncio.sleep(interval)
+        lag = max(lag, time.perf_counter() - start - interval)
+    return lag
+
+
+class TestRecognitionExecutor:
+
+    def test_event_loop_stays_responsive(self):
+        """Пока задачи распознавания выполняются, цикл событий не стоит."""
+        executor = RecognitionExecutor(workers=1, queue_size=4)
+
+        async def scenario():
+            jobs = asyncio.gather(*(executor.run(blocking_job, 0.2) for _ in range(3)))
+            lag = await max_tick_lag(asyncio.ensure_future(jobs))
+            return await jobs, lag
+
+        try:
+            results, lag = asyncio.run(scenario())
+        finally:
+            executor.shutdown()
+
+        assert results == [0.2] * 3
+        assert lag < 0.1
+
+
+    def test_full_queue_rejects(self):
+        """Сверх workers + queue_size задачи сразу получают RecognitionBusyError."""
+        executor = RecognitionExecutor(workers=1, queue_size=1)
+        release = threading.Event()
+
+        async def scenario():
+            running = [asyncio.ensure_future(executor.run(release.wait, 5)) for _ in range(2)]
+            await asyncio.sleep(0.05)
+            assert executor.pending == 2
+            with pytest.raises(RecognitionBusyError):
+                await executor.run(release.wait, 5)
+            release.set()
+            await asyncio.gather(*running)
+
+        try:
+            asyncio.run(scenario())
+        finally:
+            executor.shutdown()
+
+        assert executor.pending == 0
+
+
+    def test_cancelled_request_keeps_its_slot(self):
+        """Отменённый запрос не освобождает место, пока его задача выполняется в пуле."""
+        executor = RecognitionExecutor(workers=1, queue_size=0)
+        release = threading.Event()
+
+        async def scenario():
+            waiting = asyncio.ensure_future(executor.run(release.wait, 5))
+            await asyncio.sleep(0.05)
+            waiting.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await waiting
+
+            # Задача отменённого запроса ещё занимает единственный поток
+            assert executor.pending == 1
+            with pytest.raises(RecognitionBusyError):
+                await executor.run(release.wait, 5)
+
+            release.set()
+            while executor.pending:
+                await asyncio.sleep(0.01)
+            return await executor.run(blocking_job, 0)
+
+        try:
+            assert asyncio.run(scenario()) == 0
+        finally:
+            executor.shutdown()
+        assert executor.pending == 0
+
+
+    def test_errors_propagate(self):
+        """Исключение задачи (например, доска не найдена) доходит до вызывающего."""
+        executor = RecognitionExecutor(workers=1, queue_size=1)
+
+        def fail():
+            raise ValueError("Не удалось найти шахматную доску на изображении")
+
+        try:
+            with pytest.raises(ValueError):
+                asyncio.run(executor.run(fail))
+        finally:
+            executor.shutdown()
+        assert executor.pending == 0
+
+
+    def test_busy_upload_returns_503_before_detection(self, monkeypatch):
+        """
+        Снимок — одна задача исполнителя: при заполненной очереди загрузка
+        сразу получает 503 с Retry-After, поиск доски не запускается.
+        """
+        executor = RecognitionExecutor(workers=1, queue_size=0)
+        release = threading.Event()
+        detect = Mock(return_value={})
+        monkeypatch.setattr(games, "get_recognition_executor", lambda: executor)
+        monkeypatch.setattr(games, "process_board_image", detect)
+        game = SimpleNamespace(id=1, status=GameStatus.IN_PROGRESS, snapshots=[])
+
+        async def scenario():
+            running = asyncio.ensure_future(executor.run(release.wait, 5))
+            await asyncio.sleep(0.05)
+            try:
+                with pytest.raises(HTTPException) as exc_info:
+                    await games.add_snapshot(UploadFile(io.BytesIO(b"image")), game, session=None)
+            finally:
+                release.set()
+                await running
+            return exc_info.value
+
+        try:
+            error = asyncio.run(scenario())
+        finally:
+            executor.shutdown()
+
+        assert error.status_code == 503
+        assert error.headers == {"Retry-After": "1"}
+        detect.assert_not_called()
+
+
+    @pytest.mark.parametrize("workers, backend, warned", [
+        (1, "keras", True),
+        (2, "keras", False),
+        (1, "daemon", False),
+    ])
+    def test_startup_warns_when_microbatching_cannot_merge(self, workers, backend, warned, monkeypatch, caplog):
+        """Объединение батчей при одном потоке без демона ничего не объединяет: при запуске — предупреждение."""
+        monkeypatch.setattr(recognition, "_executor", None)
+        monkeypatch.setattr(settings, "MICROBATCH_MAX_WAIT_MS", 5)
+        monkeypatch.setattr(settings, "RECOGNITION_WORKERS", workers)
+        monkeypatch.setattr(settings, "INFERENCE_BACKEND", backend)
+
+        try:
+            recognition.start_recognition_executor()
+        finally:
+            recognition.stop_recognition_executor()
+
+        assert ("MICROBATCH_MAX_WAIT_MS" in caplog.text) == warned
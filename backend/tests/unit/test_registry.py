@@ -0,0 +1,89 @@
+"""
+Юнит-тесты для registry.py (реестр моделей, горячая замена, теневая проверка).
+"""
+import numpy as np
+import pytest
+from tensorflow import keras
+
+from services.ml import CLASS_NAMES, predict_all_squares
+from services.ml import classifier, registry as registry_module
+from services.ml.registry import ModelRegistry
+
+
+def save_constant_model(path, piece):
+    """Модель, которая на любую клетку отвечает классом piece."""
+    inputs = keras.Input(shape=(180, 180, 3))
+    x = keras.layers.GlobalAveragePooling2D()(inputs)
+    dense = keras.layers.Dense(len(CLASS_NAMES), activation="softmax")
+    outputs = dense(x)
+    model = keras.Model(inputs, outputs)
+    bias = np.zeros(len(CLASS_NAMES), dtype=np.float32)
+    bias[CLASS_NAMES.index(piece)] = 10
+    dense.set_weights([np.zeros((3, len(CLASS_NAMES)), dtype=np.float32), bias])
+    model.save(path)
+
+
+@pytest.fixture
+def registry(tmp_path, monkeypatch):
+    save_constant_model(tmp_path / "model_a.keras", "wK")
+    save_constant_model(tmp_path / "model_b.keras", "bQ")
+    registry = ModelRegistry([str(tmp_path)])
+    monkeypatch.setattr(registry_module, "model_registry", registry)
+    monkeypatch.setattr(classifier.settings, "INFERENCE_BACKEND", "keras")
+    monkeypatch.setattr(classifier.settings, "RECOGNITION_MODE", "squares")
+    monkeypatch.setattr(classifier.settings, "TTA_CONFIDENCE", 0)
+    return registry
+
+
+def squares():
+    rng = np.random.default_rng(0)
+    return {f"{c}1": rng.integers(0, 256, (60, 60, 3), dtype=np.uint8) for c in "abcdefgh"}
+
+
+class TestRegistry:
+
+    def test_available_and_unknown_model(self, registry):
+        """Реестр видит модели в каталогах и отказывает в неизвестных."""
+        assert sorted(registry.available()) == ["model_a", "model_b"]
+
+        with pytest.raises(ValueError):
+            registry.activate("model_z")
+        with pytest.raises(ValueError):
+            registry.activate("model_a", backend="missing")
+
+
+    def test_activate_swaps_model(self, registry, tmp_path):
+        """Замена модели меняет ответы без перезапуска; версия — хеш файла."""
+        first = registry.activate("model_a")
+        assert set(predict_all_squares(squares()).values()) == {"wK"}
+        assert classifier.model_status() == "ready"
+
+        second = registry.activate("model_b")
+        assert set(predict_all_squares(squares()).values()) == {"bQ"}
+        assert first.version != second.version
+        assert registry.status()["active"]["name"] == "model_b"
+
+
+    def test_shadow_records_disagreement(self, registry):
+        """Кандидат проверяется в фоне, расхождения и время копятся в статистике."""
+        registry.activate("model_a")
+        registry.set_shadow("model_b", rate=1.0)
+
+        for _ in range(2):
+            predict_all_squares(squares())
+        registry._executor.submit(lambda: None).result()
+
+        stats = registry.status()["shadow_stats"]
+        assert stats["boards"] + stats["skipped"] == 2
+        assert stats["square_disagreement"] == 1.0
+        assert stats["shadow_ms"] > 0 and stats["primary_ms"] > 0
+
+        registry.clear_shadow()
+        predict_all_squares(squares())
+        assert registry.status()["shadow"] is None
+
+
+    def test_shadow_rate_validated(self, registry):
+        """Доля досок для кандидата — в (0, 1]."""
+        with pytest.raises(ValueError):
+            registry.set_shadow("model_b", rate=0)
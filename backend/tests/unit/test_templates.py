@@ -0,0 +1,75 @@
+"""
+Юнит-тесты для templates.py (индекс шаблонов клеток скриншотов).
+"""
+import numpy as np
+import pytest
+
+from services.board_service import process_board_image, SQUARE_NAMES
+from services.ml import predict_all_squares
+from services.ml import classifier, templates
+from tests.helpers import FakeBackend, make_screenshot
+
+
+@pytest.fixture
+def index(monkeypatch):
+    index = templates.TemplateIndex(64)
+    monkeypatch.setattr(templates, "template_index", index)
+    monkeypatch.setattr(classifier.settings, "RECOGNITION_MODE", "squares")
+    monkeypatch.setattr(classifier.settings, "TEMPLATE_INDEX_SIZE", 64)
+    return index
+
+
+def descriptor(value):
+    return np.full((1, templates.TEMPLATE_SIZE ** 2 * 3), value, dtype=np.float32)
+
+
+class TestTemplates:
+
+    def test_lookup_within_tolerance(self, index):
+        """Совпадение в пределах допуска даёт класс, дальше — промах."""
+        index.add(descriptor(100), [3])
+
+        assert index.lookup(descriptor(100 + templates.TEMPLATE_TOLERANCE / 2))[0] == 3
+        assert index.lookup(descriptor(100 + templates.TEMPLATE_TOLERANCE * 2))[0] == -1
+        assert index.snapshot()["hits"] == 1 and index.snapshot()["misses"] == 1
+
+
+    def test_duplicates_and_lru_eviction(self):
+        """Дубликаты не занимают места, вытесняется давно не совпадавший шаблон."""
+        index = templates.TemplateIndex(2)
+        index.add(np.concatenate([descriptor(0), descriptor(1), descriptor(50)]), [0, 0, 1])
+        assert len(index) == 2
+
+        index.lookup(descriptor(0))
+        index.add(descriptor(200), [2])
+
+        assert len(index) == 2
+        assert index.lookup(np.concatenate([descriptor(0), descriptor(50), descriptor(200)])).tolist() == [0, -1, 2]
+
+
+    def test_screenshot_served_from_index(self, index):
+        """Уверенно распознанные клетки скриншота запоминаются, следующая доска обходится без модели."""
+        backend = FakeBackend("wP", confidence=0.999)
+        classifier.backend = backend
+
+        first = predict_all_squares(process_board_image(make_screenshot(50, 200)))
+        second = predict_all_squares(process_board_image(make_screenshot(53, 207)))
+
+        assert backend.calls == [64]
+        assert list(second) == SQUARE_NAMES
+        assert first == second == {name: "wP" for name in SQUARE_NAMES}
+        # Одинаковые клетки хранятся одним шаблоном
+        assert 4 <= len(index) < 16
+
+
+    def test_uncertain_squares_not_indexed(self, index):
+        """Неуверенные ответы классификатора в индекс не попадают."""
+        backend = FakeBackend("wP", confidence=0.5)
+        classifier.backend = backend
+
+        squares = process_board_image(make_screenshot(50, 200))
+        predict_all_squares(squares)
+        predict_all_squares(squares)
+
+        assert len(index) == 0
+        assert backend.calls == [64, 64]
@@ -0,0 +1,127 @@
+"""
+Юнит-тесты для weights.py (плоский формат весов, отображаемый в память).
+"""
+import json
+import mmap
+import subprocess
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+from tensorflow import keras
+
+from tests.helpers import build_model_1
+from services.ml.backends import create_backend
+from services.ml.numpy_engine import NumpyModel, export_npz, export_weights
+from services.ml.weights import load_weights, save_weights
+
+BACKEND_DIR = Path(__file__).parent.parent.parent
+
+# Воркер: загружает модель, по команде считает прирост собственной
+# (не разделяемой с другими процессами) памяти и ждёт завершения
+WORKER_SCRIPT = """
+import sys
+import numpy as np
+from services.ml.backends import create_backend
+
+def private_kb():
+    with open("/proc/self/smaps_rollup") as f:
+        return sum(int(line.split()[1]) for line in f if line.startswith(("Private_Clean:", "Private_Dirty:")))
+
+before = private_kb()
+backend = create_backend(sys.argv[1], sys.argv[2])
+backend.predict(np.zeros((1, 180, 180, 3), np.uint8))
+print("loaded", flush=True)
+sys.stdin.readline()
+print((private_kb() - before) / 1024, flush=True)
+sys.stdin.read()
+"""
+
+
+def dense_model_files(tmp_path):
+    """Одна и та же модель с ~16 МБ весов в форматах .npz и .weights (без TensorFlow)."""
+    rng = np.random.default_rng(0)
+    specs = [
+        {"type": "rescaling", "scale": 1 / 255, "offset": 0.0},
+        {"type": "conv2d", "strides": [4, 4], "padding": "valid", "activation": "relu", "weights": ["kernel", "bias"]},
+        {"type": "flatten"},
+        {"type": "dense", "activation": "relu", "weights": ["kernel", "bias"]},
+        {"type": "dense", "activation": "softmax", "weights": ["kernel", "bias"]},
+    ]
+    arrays = {
+        "1.kernel": rng.standard_normal((3, 3, 3, 8)), "1.bias": np.zeros(8),
+        "3.kernel": rng.standard_normal((45 * 45 * 8, 256)) * 0.01, "3.bias": np.zeros(256),
+        "4.kernel": rng.standard_normal((256, 13)), "4.bias": np.zeros(13),
+    }
+    arrays = {name: array.astype(np.float32) for name, array in arrays.items()}
+
+    npz_path = tmp_path / "model.npz"
+    with open(npz_path, "wb") as f:
+        np.savez(f, layers=json.dumps(specs), **arrays)
+    weights_path = save_weights(specs, arrays, tmp_path / "model.weights")
+    return npz_path, weights_path, sum(a.nbytes for a in arrays.values()) / 2 ** 20
+
+
+def private_mb_per_worker(backend, path, workers):
+    """Прирост собственной памяти каждого из workers одновременно работающих воркеров, МБ."""
+    procs = [
+        subprocess.Popen(
+            [sys.executable, "-c", WORKER_SCRIPT, backend, str(path)],
+            cwd=BACKEND_DIR, stdin=subprocess.PIPE, stdout=subprocess.PIPE, text=True,
+        )
+        for _ in range(workers)
+    ]
+    try:
+        for proc in procs:
+            assert proc.stdout.readline().strip() == "loaded"
+        # Все воркеры загрузили модель — теперь замеряем
+        results = []
+        for proc in procs:
+            proc.stdin.write("\n")
+            proc.stdin.flush()
+            results.append(float(proc.stdout.readline()))
+        return results
+    finally:
+        for proc in procs:
+            proc.stdin.close()
+            proc.wait()
+
+
+class TestWeights:
+
+    def test_model_1_mapped_parity(self, tmp_path):
+        """Веса из .weights выровнены, только для чтения и дают те же вероятности, что .npz."""
+        keras.utils.set_random_seed(0)
+        model = build_model_1()
+        npz = NumpyModel.load(export_npz(model, tmp_path / "model.npz"))
+        path = export_weights(model, tmp_path / "model.weights")
+        batch = np.random.default_rng(0).integers(0, 256, (3, 180, 180, 3), dtype=np.uint8)
+
+        _, arrays = load_weights(path)
+        mapped = create_backend("numpy_mmap", path)
+
+        assert all(a.ctypes.data % mmap.PAGESIZE == 0 for a in arrays.values())
+        assert not any(a.flags.writeable for a in arrays.values())
+        np.testing.assert_array_equal(mapped.predict(batch), npz.predict(batch))
+
+
+    def test_rejects_foreign_file(self, tmp_path):
+        """Файл не в формате .weights не загружается."""
+        path = tmp_path / "model.weights"
+        path.write_bytes(b"not a weights file" * 10)
+
+        with pytest.raises(ValueError):
+            load_weights(path)
+
+
+    @pytest.mark.skipif(not Path("/proc/self/smaps_rollup").exists(), reason="нужен Linux /proc/self/smaps_rollup")
+    def test_workers_share_mapped_weights(self, tmp_path):
+        """С N воркерами .npz копирует веса в каждый, а .weights делится через страничный кэш."""
+        npz_path, weights_path, weights_mb = dense_model_files(tmp_path)
+
+        npz = private_mb_per_worker("numpy", npz_path, workers=3)
+        mapped = private_mb_per_worker("numpy_mmap", weights_path, workers=3)
+
+        assert min(npz) > 0.9 * weights_mb
+        assert max(mapped) < 0.25 * weights_mb